@@ -3,12 +3,19 @@
 """
 相亲活动分组优化命令行工具
 主程序入口，整合解析、建模、求解和输出功能
+
+pandas 与求解器模块均按需导入，启动耗时可用 `python -X importtime cli.py --help` 查看
 """
 
 import argparse
 import sys
 import os
 import time
+import hashlib
+import itertools
+import logging
+import pickle
+import tempfile
 from pathlib import Path
 
 # 强制输出实时刷新
@@ -26,9 +33,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from src.parser_cn import ChinesePreferenceParser
 from src.parser_ranking import RankingPreferenceParser
 from src.graph import PreferenceGraph, validate_grouping
-from src.solver_ilp import ILPSolver
-from src.solver_heur import HeuristicSolver
-from src.io_excel import DataIO
+from src.io_excel import DataIO, dump_json
 
 
 def print_banner():
@@ -68,6 +73,11 @@ def parse_arguments():
                        default='偏好',
                        help='Excel sheet名称（默认: 偏好）')
     
+    parser.add_argument('--excel-engine',
+                       choices=['calamine', 'openpyxl'],
+                       default='calamine',
+                       help='xlsx读取引擎（默认: calamine，未安装python-calamine时自动使用openpyxl只读模式）')
+    
     parser.add_argument('--mode',
                        choices=['text', 'ranking'],
                        default='ranking',
@@ -84,11 +94,31 @@ def parse_arguments():
                        default=1.0,
                        help='第二偏好权重（ranking模式，默认: 1.0）')
     
+    # 缓存选项
+    parser.add_argument('--cache',
+                       action='store_true',
+                       help='启用读取与解析结果缓存（缓存文件含嘉宾偏好数据，默认不启用）')
+    
+    parser.add_argument('--cache-dir',
+                       default=os.path.join('~', '.cache', 'dating_match'),
+                       help='读取与解析结果的缓存目录（默认: ~/.cache/dating_match）')
+    
     # 约束选项
-    parser.add_argument('--two-by-two',
-                       type=lambda x: x.lower() in ['true', '1', 'yes'],
-                       default=True,
-                       help='是否强制每组2男2女（默认: true）')
+    if hasattr(argparse, 'BooleanOptionalAction'):  # Python 3.9+
+        parser.add_argument('--two-by-two',
+                           action=argparse.BooleanOptionalAction,
+                           default=True,
+                           help='是否强制每组2男2女（默认: 开启，--no-two-by-two 关闭）')
+    else:
+        parser.add_argument('--two-by-two',
+                           dest='two_by_two',
+                           action='store_true',
+                           default=True,
+                           help='强制每组2男2女（默认）')
+        parser.add_argument('--no-two-by-two',
+                           dest='two_by_two',
+                           action='store_false',
+                           help='不强制每组2男2女')
     
     parser.add_argument('--pairing-mode',
                        action='store_true',
@@ -115,7 +145,7 @@ def parse_arguments():
     
     # 求解器选项
     parser.add_argument('--solver',
-                       choices=['auto', 'ilp', 'heuristic'],
+                       choices=['auto', 'ilp', 'heuristic', 'matching'],
                        default='auto',
                        help='求解器选择（默认: auto）')
     
@@ -134,11 +164,26 @@ def parse_arguments():
                        default=5,
                        help='启发式算法重启次数（默认: 5）')
     
+    parser.add_argument('--n-jobs',
+                       type=int,
+                       default=None,
+                       help='启发式算法并行重启及大数据量偏好解析的进程数（默认: CPU核心数的一半；1=串行；-1=全部核心）')
+    
     parser.add_argument('--heur-algorithm',
                        choices=['hill_climbing', 'simulated_annealing'],
                        default='simulated_annealing',
                        help='启发式算法类型（默认: simulated_annealing）')
     
+    parser.add_argument('--cooling-schedule',
+                       choices=['geometric', 'lam'],
+                       default='geometric',
+                       help='模拟退火降温方式（默认: geometric；lam=按接受率自适应升降温）')
+    
+    parser.add_argument('--improvement-strategy',
+                       choices=['best', 'first'],
+                       default='best',
+                       help='爬山算法改进方式（默认: best；first=接受第一个更好的邻居）')
+    
     # 人数配置选项
     parser.add_argument('--group-size',
                        type=int,
@@ -168,22 +213,44 @@ def parse_arguments():
                        action='store_true',
                        help='详细输出模式')
     
+    parser.add_argument('--profile',
+                       action='store_true',
+                       help='使用cProfile分析性能，结果保存到 输出目录/cli.prof 并打印累计耗时前20的调用')
+    
     # ILP选项
     parser.add_argument('--ilp-time-limit',
                        type=int,
                        default=300,
                        help='ILP求解时间限制（秒，默认: 300）')
     
+    parser.add_argument('--ilp-threads',
+                       type=int,
+                       default=None,
+                       help='ILP求解器并行线程数（默认: 全部CPU核）')
+    
+    parser.add_argument('--ilp-backend',
+                       choices=['pulp', 'cbc_lp'],
+                       default='pulp',
+                       help='ILP建模后端：pulp=PuLP建模，cbc_lp=直接生成LP文件调用CBC命令行（默认: pulp）')
+    
     return parser.parse_args()
 
 
 def create_progress_callback(verbose):
-    """创建进度回调函数"""
-    def callback(message):
-        if verbose:
-            print("[INFO] " + str(message))
-            sys.stdout.flush()  # 强制刷新输出
-    return callback
+    """
+    创建进度回调函数
+    
+    返回logger.info：非verbose模式下日志级别为WARNING，进度消息在生成日志记录之前即被丢弃。
+    求解器以格式化好的消息字符串调用回调 callback(message)，与单参数回调兼容。
+    """
+    logger = logging.getLogger("dating_match")
+    logger.setLevel(logging.INFO if verbose else logging.WARNING)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        logger.addHandler(handler)
+    return logger.info
 
 
 def detect_guest_counts(data):
@@ -216,6 +283,273 @@ def detect_guest_counts(data):
     return num_males, num_females
 
 
+def run_heuristic(graph, args, num_males, num_females, privileged_guests, progress_callback,
+                  max_iter=None, num_restarts=None):
+    """
+    按命令行参数构建并运行启发式求解器
+    
+    Args:
+        graph: 偏好图
+        args: 命令行参数
+        num_males: 男性人数
+        num_females: 女性人数
+        privileged_guests: 特权嘉宾集合
+        progress_callback: 进度回调
+        max_iter: 覆盖 --max-iter（None表示沿用参数）
+        num_restarts: 覆盖 --num-restarts（None表示沿用参数）
+        
+    Returns:
+        (solution, solve_info)
+    """
+    from src.solver_heur import HeuristicSolver
+    
+    heur_solver = HeuristicSolver(
+        graph, args.two_by_two, args.seed, args.max_iter if max_iter is None else max_iter,
+        pairing_mode=args.pairing_mode,
+        num_males=num_males, num_females=num_females, group_size=args.group_size,
+        privileged_guests=privileged_guests,
+        cooling_schedule=args.cooling_schedule,
+        improvement_strategy=args.improvement_strategy
+    )
+    return heur_solver.solve(
+        algorithm=args.heur_algorithm,
+        initial_strategy='greedy',
+        num_restarts=args.num_restarts if num_restarts is None else num_restarts,
+        callback=progress_callback,
+        n_jobs=args.n_jobs
+    )
+
+
+def auto_solve(graph, args, num_males, num_females, privileged_guests, progress_callback):
+    """
+    自动选择求解器：先用零迭代启发式探测可行性，再决定完整求解或直接回退ILP
+    
+    启发式失败的原因（初始解/最终解无效）与迭代预算无关，零迭代的探测只构造并验证初始解，
+    探测失败时跳过完整启发式，避免同一失败重复求解一次；探测成功时只做一次完整求解。
+    
+    Returns:
+        (solution, solve_info)
+    """
+    print_flush("\n🤖 自动选择求解器...")
+    
+    # 优先使用启发式求解器（更稳定）
+    print_flush("🔧 使用启发式求解器...")
+    probe_solution, probe_info = run_heuristic(
+        graph, args, num_males, num_females, privileged_guests, progress_callback,
+        max_iter=0, num_restarts=1
+    )
+    
+    if probe_solution is not None:
+        solution, solve_info = run_heuristic(graph, args, num_males, num_females,
+                                             privileged_guests, progress_callback)
+        # 完整求解异常失败时保留探测得到的初始解
+        if solution is None:
+            solution, solve_info = probe_solution, probe_info
+        solve_info['solver_used'] = 'Heuristic'
+        return solution, solve_info
+    
+    probe_info['solver_used'] = 'Heuristic'
+    
+    # 启发式失败，尝试ILP（ILP求解器暂不支持配对模式）
+    if args.pairing_mode:
+        print("🔧 启发式求解失败，配对模式暂不支持ILP求解器")
+        return probe_solution, probe_info
+    
+    print("🔧 启发式求解失败，尝试ILP求解器...")
+    try:
+        from src.solver_ilp import ILPSolver
+        ilp_solver = ILPSolver(graph, args.two_by_two, args.ilp_time_limit,
+                               num_males=num_males, num_females=num_females, group_size=args.group_size,
+                               privileged_guests=privileged_guests, threads=args.ilp_threads,
+                               backend=args.ilp_backend)
+        if args.ilp_backend == 'pulp' and not ilp_solver.pulp_available:
+            print("ILP求解器不可用")
+            return probe_solution, probe_info
+        solution, solve_info = ilp_solver.solve_with_callback(progress_callback)
+        solve_info['solver_used'] = 'ILP (fallback)'
+        return solution, solve_info
+    except Exception as e:
+        print("ILP求解器出错: " + str(e))
+        # 保持启发式的结果
+        return probe_solution, probe_info
+
+
+def heuristic_solve(graph, args, num_males, num_females, privileged_guests, progress_callback):
+    """使用启发式求解器求解，返回 (solution, solve_info)"""
+    print("\n🎯 使用启发式求解器...")
+    solution, solve_info = run_heuristic(graph, args, num_males, num_females,
+                                         privileged_guests, progress_callback)
+    solve_info['solver_used'] = 'Heuristic'
+    return solution, solve_info
+
+
+def ilp_solve(graph, args, num_males, num_females, privileged_guests, progress_callback):
+    """使用ILP求解器求解，配对模式或ILP出错时回退到启发式，返回 (solution, solve_info)"""
+    print("\n🎯 使用ILP求解器...")
+    if args.pairing_mode:
+        print("❌ ILP求解器不支持配对模式，自动切换到启发式求解器")
+        solution, solve_info = run_heuristic(graph, args, num_males, num_females,
+                                             privileged_guests, progress_callback)
+        solve_info['solver_used'] = 'Heuristic (Pairing mode)'
+        return solution, solve_info
+    
+    try:
+        from src.solver_ilp import ILPSolver
+        ilp_solver = ILPSolver(graph, args.two_by_two, args.ilp_time_limit,
+                               num_males=num_males, num_females=num_females, group_size=args.group_size,
+                               privileged_guests=privileged_guests, threads=args.ilp_threads,
+                               backend=args.ilp_backend)
+        solution, solve_info = ilp_solver.solve_with_callback(progress_callback)
+        solve_info['solver_used'] = 'ILP'
+    except Exception as e:
+        print("❌ ILP求解器出错: " + str(e))
+        print("🔧 自动回退到启发式求解器...")
+        solution, solve_info = run_heuristic(graph, args, num_males, num_females,
+                                             privileged_guests, progress_callback)
+        solve_info['solver_used'] = 'Heuristic (ILP failed)'
+    return solution, solve_info
+
+
+def matching_solve(graph, args, num_males, num_females, privileged_guests, progress_callback):
+    """使用匹配求解器（匈牙利算法）求解，当前配置不支持时回退到启发式，返回 (solution, solve_info)"""
+    print("\n🎯 使用匹配求解器...")
+    from src.solver_matching import MatchingSolver
+    
+    matching_solver = MatchingSolver(graph, args.two_by_two, num_males, num_females, args.group_size,
+                                     pairing_mode=args.pairing_mode, privileged_guests=privileged_guests,
+                                     num_restarts=args.num_restarts, seed=args.seed)
+    reason = matching_solver.unsupported_reason()
+    if reason is not None:
+        print(f"❌ {reason}，自动切换到启发式求解器")
+        solution, solve_info = run_heuristic(graph, args, num_males, num_females,
+                                             privileged_guests, progress_callback)
+        solve_info['solver_used'] = 'Heuristic (matching unsupported)'
+        return solution, solve_info
+    
+    solution, solve_info = matching_solver.solve()
+    solve_info['solver_used'] = 'Matching'
+    return solution, solve_info
+
+
+# --solver 选项到求解函数的映射，每个求解函数自行设置 solve_info['solver_used']
+SOLVERS = {
+    'auto': auto_solve,
+    'ilp': ilp_solve,
+    'heuristic': heuristic_solve,
+    'matching': matching_solve,
+}
+
+# 输出文件名后缀
+FILE_SUFFIXES = {
+    'pairing': '_双人配对',
+    'round_two': '_第二轮',
+    'default': '_第一轮',
+}
+
+
+# 缓存格式版本，解析逻辑或缓存内容变化时递增以使旧缓存失效
+CACHE_VERSION = 1
+
+# 缓存目录中保留的最大缓存文件数，超出时删除最旧的文件
+PARSE_CACHE_MAX_FILES = 16
+
+# 缓存文件头：不以此开头的文件不是本工具写入的缓存，不做反序列化
+CACHE_MAGIC = b"DATING_MATCH_CACHE\n"
+
+# 读取缓存时视为缓存损坏或不兼容的异常（IO错误、截断文件、pickle数据损坏、类定义已变化）
+CACHE_LOAD_ERRORS = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError)
+
+
+def get_parse_cache_path(args):
+    """
+    计算读取+解析结果的缓存文件路径
+    
+    缓存键包含输入文件路径、修改时间、大小以及影响解析的参数。
+    
+    Args:
+        args: 命令行参数
+        
+    Returns:
+        缓存文件路径；未启用缓存或输入文件不存在时返回None
+    """
+    if not args.cache:
+        return None
+    
+    try:
+        stat = os.stat(args.input)
+    except OSError:
+        return None
+    
+    key_source = "|".join(str(part) for part in (
+        CACHE_VERSION, os.path.abspath(args.input), stat.st_mtime_ns, stat.st_size,
+        args.sheet, args.mode, args.first_preference_weight, args.second_preference_weight
+    ))
+    key = hashlib.blake2b(key_source.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(os.path.expanduser(args.cache_dir), f"{key}.pkl")
+
+
+def load_parse_cache(cache_path):
+    """
+    读取缓存的 (data, io_warnings, parse_result)
+    
+    Args:
+        cache_path: 缓存文件路径
+        
+    Returns:
+        缓存内容元组；未命中或缓存损坏时返回None
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                print(f"⚠️  忽略非本工具写入的解析缓存文件: {cache_path}")
+                return None
+            payload = pickle.load(f)
+    except CACHE_LOAD_ERRORS as e:
+        print(f"⚠️  解析缓存无法读取，将重新解析: {cache_path}（{type(e).__name__}: {str(e)}）")
+        return None
+    
+    if not (isinstance(payload, tuple) and len(payload) == 3):
+        print(f"⚠️  解析缓存内容格式不符，将重新解析: {cache_path}")
+        return None
+    return payload
+
+
+def save_parse_cache(cache_path, payload):
+    """
+    原子写入缓存（先写临时文件再替换），并按修改时间删除超出 PARSE_CACHE_MAX_FILES 的旧缓存；
+    写入失败时只打印警告
+    
+    Args:
+        cache_path: 缓存文件路径
+        payload: (data, io_warnings, parse_result) 元组
+    """
+    if not cache_path:
+        return
+    
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(CACHE_MAGIC)
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except (OSError, pickle.PicklingError):
+            os.unlink(tmp_path)
+            raise
+        
+        cache_files = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith('.pkl')]
+        cache_files.sort(key=os.path.getmtime)
+        for old_path in cache_files[:-PARSE_CACHE_MAX_FILES]:
+            os.unlink(old_path)
+    except (OSError, pickle.PicklingError) as e:
+        print(f"⚠️  解析缓存写入失败: {str(e)}")
+
+
 def main():
     """主函数"""
     # 打印横幅
@@ -224,6 +558,32 @@ def main():
     # 解析命令行参数
     args = parse_arguments()
     
+    if not args.profile:
+        run(args)
+        return
+    
+    # 性能分析模式：结果写入 output_dir/cli.prof（可用snakeviz查看），并打印累计耗时前20的调用
+    import cProfile
+    import pstats
+    
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args)
+    finally:
+        profile_file = Path(args.output_dir) / 'cli.prof'
+        profile_file.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_file)
+        print(f"\n⏱️  性能分析结果已保存: {profile_file}")
+        pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+
+
+def run(args):
+    """
+    执行完整流程：读取、解析、建图、求解、导出
+    
+    Args:
+        args: 命令行参数
+    """
     # 创建进度回调
     progress_callback = create_progress_callback(args.verbose)
     
@@ -237,7 +597,11 @@ def main():
                 print("❌ 第二轮模式暂不支持配对模式")
                 return
         
-        io_handler = DataIO()
+        io_handler = DataIO(excel_engine=args.excel_engine)
+        
+        # 输出目录只创建一次，干运行与正式导出共用
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         # 第二轮模式：解析第一轮结果
         first_round_penalties = set()
@@ -258,7 +622,13 @@ def main():
         print(f"\n📖 正在读取偏好数据...")
         progress_callback("从文件读取: " + str(args.input))
         
-        if args.mode == 'ranking':
+        cache_path = get_parse_cache_path(args)
+        cached = load_parse_cache(cache_path)
+        
+        if cached is not None:
+            data, io_warnings, parse_result = cached
+            progress_callback("命中解析缓存: " + cache_path)
+        elif args.mode == 'ranking':
             data, io_warnings = io_handler.read_ranking_from_excel(args.input, args.sheet)
         else:
             data, io_warnings = io_handler.read_preferences_from_excel(args.input, args.sheet)
@@ -318,57 +688,47 @@ def main():
                 max_male_id=num_males,
                 max_female_id=num_females
             )
-            parse_result = parser.parse_all_preferences(data)
-            
-            print_flush(f"✅ 解析出 {len(parse_result.weighted_edges)} 条加权偏好边")
-            
-            if parse_result.warnings:
-                print("⚠️  解析警告:")
-                for warning in parse_result.warnings[:10]:  # 只显示前10个警告
-                    print(f"   {warning}")
-                if len(parse_result.warnings) > 10:
-                    print(f"   ... 还有 {len(parse_result.warnings) - 10} 个警告")
-            
-            # 打印解析摘要
-            if args.verbose:
-                parser.print_parse_summary(parse_result)
-                
+            edges_attr, edges_desc = 'weighted_edges', '加权偏好边'
         else:
             print_flush("\n🔍 正在解析中文偏好...")
             parser = ChinesePreferenceParser(max_male_id=num_males, max_female_id=num_females)
-            parse_result = parser.parse_all_preferences(data)
-            
-            print_flush(f"✅ 解析出 {len(parse_result.edges)} 条有向偏好边")
-            
-            if parse_result.warnings:
-                print("⚠️  解析警告:")
-                for warning in parse_result.warnings[:10]:  # 只显示前10个警告
-                    print(f"   {warning}")
-                if len(parse_result.warnings) > 10:
-                    print(f"   ... 还有 {len(parse_result.warnings) - 10} 个警告")
-            
-            # 打印解析摘要
-            if args.verbose:
-                parser.print_parse_summary(parse_result)
+            edges_attr, edges_desc = 'edges', '有向偏好边'
+        
+        if cached is None:
+            # 行数较多时按 --n-jobs 多进程解析，行数少时自动串行
+            parse_result = parser.parse_all_preferences_parallel(data, args.n_jobs)
+        
+        print_flush(f"✅ 解析出 {len(getattr(parse_result, edges_attr))} 条{edges_desc}")
+        
+        if parse_result.warnings:
+            print("⚠️  解析警告:")
+            for warning in itertools.islice(parse_result.warnings, 10):  # 只显示前10个警告
+                print(f"   {warning}")
+            if len(parse_result.warnings) > 10:
+                print(f"   ... 还有 {len(parse_result.warnings) - 10} 个警告")
+        
+        # 打印解析摘要
+        if args.verbose:
+            parser.print_parse_summary(parse_result)
+        
+        if cached is None:
+            save_parse_cache(cache_path, (data, io_warnings, parse_result))
         
         # 如果是干运行模式，仅解析后退出
         if args.dry_run_parse:
             print("\n🏃 干运行模式 - 仅解析偏好，不进行求解")
             
             # 输出解析结果到JSON
-            os.makedirs(args.output_dir, exist_ok=True)
-            parse_output_file = os.path.join(args.output_dir, '偏好解析结果.json')
+            parse_output_file = output_dir / '偏好解析结果.json'
             
-            import json
             parse_summary = {
                 "total_edges": len(parse_result.edges),
                 "warnings_count": len(parse_result.warnings),
                 "edges": [{"from": src, "to": dst} for src, dst in parse_result.edges],
-                "warnings": parse_result.warnings
+                "warnings": list(parse_result.warnings)
             }
             
-            with open(parse_output_file, 'w', encoding='utf-8') as f:
-                json.dump(parse_summary, f, ensure_ascii=False, indent=2)
+            dump_json(parse_summary, parse_output_file)
             
             print(f"💾 解析结果已保存到: {parse_output_file}")
             return
@@ -394,6 +754,9 @@ def main():
                 penalty_weight=args.penalty_weight
             )
         
+        if graph.num_duplicate_edges or graph.num_self_loops:
+            print(f"⚠️  偏好图: 合并了 {graph.num_duplicate_edges} 条重复边，忽略了 {graph.num_self_loops} 条自环边")
+        
         graph_stats = graph.get_graph_stats()
         print(f"✅ 偏好图构建完成:")
         print(f"   - 总边数: {graph_stats['total_edges']}")
@@ -401,118 +764,22 @@ def main():
         print(f"   - 互相喜欢对数: {graph_stats['mutual_pairs']}")
         print(f"   - 平均出度: {graph_stats['avg_out_degree']:.1f}")
         
-        # 4. 选择求解器并求解
-        solution = None
-        solve_info = {}
-        
-        start_time = time.time()
-        
-        if args.solver == 'auto':
-            # 自动选择求解器 - 优先使用启发式（更稳定）
-            print_flush("\n🤖 自动选择求解器...")
-            
-            # 优先使用启发式求解器（更稳定）
-            print_flush("🔧 使用启发式求解器...")
-            heur_solver = HeuristicSolver(
-                graph, args.two_by_two, args.seed, args.max_iter, 
-                pairing_mode=args.pairing_mode,
-                num_males=num_males, num_females=num_females, group_size=args.group_size,
-                privileged_guests=privileged_guests
-            )
-            solution, solve_info = heur_solver.solve(
-                algorithm=args.heur_algorithm,
-                initial_strategy='greedy',
-                num_restarts=args.num_restarts,
-                callback=progress_callback
-            )
-            solve_info['solver_used'] = 'Heuristic'
-            
-            # 如果启发式失败，尝试ILP
-            if solution is None:
-                print("🔧 启发式求解失败，尝试ILP求解器...")
-                if not args.pairing_mode:  # ILP求解器暂不支持配对模式
-                    try:
-                        ilp_solver = ILPSolver(graph, args.two_by_two, args.ilp_time_limit,
-                                             num_males=num_males, num_females=num_females, group_size=args.group_size,
-                                             privileged_guests=privileged_guests)
-                        if ilp_solver.pulp_available:
-                            solution, solve_info = ilp_solver.solve_with_callback(progress_callback)
-                            solve_info['solver_used'] = 'ILP (fallback)'
-                        else:
-                            print("ILP求解器不可用")
-                    except Exception as e:
-                        print("ILP求解器出错: " + str(e))
-                        # 保持启发式的结果
-                else:
-                    print("配对模式暂不支持ILP求解器")
+        # 4. 选择求解器并求解（求解器模块仅在需要求解时导入）
+        start_ns = time.perf_counter_ns()
         
-        elif args.solver == 'ilp':
-            print("\n🎯 使用ILP求解器...")
-            if args.pairing_mode:
-                print("❌ ILP求解器不支持配对模式，自动切换到启发式求解器")
-                heur_solver = HeuristicSolver(
-                    graph, args.two_by_two, args.seed, args.max_iter,
-                    pairing_mode=args.pairing_mode,
-                    num_males=num_males, num_females=num_females, group_size=args.group_size,
-                    privileged_guests=privileged_guests
-                )
-                solution, solve_info = heur_solver.solve(
-                    algorithm=args.heur_algorithm,
-                    initial_strategy='greedy', 
-                    num_restarts=args.num_restarts,
-                    callback=progress_callback
-                )
-                solve_info['solver_used'] = 'Heuristic (Pairing mode)'
-            else:
-                try:
-                    ilp_solver = ILPSolver(graph, args.two_by_two, args.ilp_time_limit,
-                                         num_males=num_males, num_females=num_females, group_size=args.group_size,
-                                         privileged_guests=privileged_guests)
-                    solution, solve_info = ilp_solver.solve_with_callback(progress_callback)
-                    solve_info['solver_used'] = 'ILP'
-                except Exception as e:
-                    print("❌ ILP求解器出错: " + str(e))
-                    print("🔧 自动回退到启发式求解器...")
-                    heur_solver = HeuristicSolver(
-                        graph, args.two_by_two, args.seed, args.max_iter,
-                        pairing_mode=args.pairing_mode,
-                        num_males=num_males, num_females=num_females, group_size=args.group_size,
-                        privileged_guests=privileged_guests
-                    )
-                    solution, solve_info = heur_solver.solve(
-                        algorithm=args.heur_algorithm,
-                        initial_strategy='greedy', 
-                        num_restarts=args.num_restarts,
-                        callback=progress_callback
-                    )
-                    solve_info['solver_used'] = 'Heuristic (ILP failed)'
-        
-        else:  # heuristic
-            print("\n🎯 使用启发式求解器...")
-            heur_solver = HeuristicSolver(
-                graph, args.two_by_two, args.seed, args.max_iter,
-                pairing_mode=args.pairing_mode,
-                num_males=num_males, num_females=num_females, group_size=args.group_size,
-                privileged_guests=privileged_guests
-            )
-            solution, solve_info = heur_solver.solve(
-                algorithm=args.heur_algorithm,
-                initial_strategy='greedy',
-                num_restarts=args.num_restarts,
-                callback=progress_callback
-            )
-            solve_info['solver_used'] = 'Heuristic'
+        solution, solve_info = SOLVERS[args.solver](graph, args, num_males, num_females,
+                                                    privileged_guests, progress_callback)
         
-        solve_time = time.time() - start_time
+        solve_time = (time.perf_counter_ns() - start_ns) / 1e9
         
         # 5. 处理求解结果
         if solution is None:
             print(f"\n❌ 求解失败: {solve_info.get('message', '未知错误')}")
             print(f"求解信息: {solve_info}")
-            return
+            sys.exit(1)
         
         print_flush(f"\n✅ 求解成功! 用时 {solve_time:.2f} 秒")
-        print_flush(f"求解器: {solve_info.get('solver_used', 'Unknown')}")
+        print_flush(f"求解器: {solve_info['solver_used']}")
         
         if args.verbose:
             print(f"求解详情: {solve_info}")
@@ -549,7 +816,7 @@ def main():
                 # 检查是否与喜欢的人同组
                 liked_persons_in_group = []
                 for other_person in guest_group:
-                    if other_person != privileged_guest and (privileged_guest, other_person) in graph.edges:
+                    if other_person != privileged_guest and (privileged_guest, other_person) in graph.edge_weights:
                         liked_persons_in_group.append(other_person)
                 
                 if liked_persons_in_group:
@@ -579,15 +846,8 @@ def main():
         
         # 9. 导出结果
         print(f"\n💾 正在导出结果...")
-        os.makedirs(args.output_dir, exist_ok=True)
-        
-        # 文件名后缀
-        if args.pairing_mode:
-            file_suffix = "_双人配对"
-        elif args.round_two:
-            file_suffix = "_第二轮"
-        else:
-            file_suffix = "_第一轮"
+        # 文件名后缀（配对模式优先于第二轮）
+        file_suffix = FILE_SUFFIXES['pairing' if args.pairing_mode else 'round_two' if args.round_two else 'default']
         
         # 准备特权嘉宾信息
         privileged_info = None
@@ -599,22 +859,22 @@ def main():
             }
         
         # 导出JSON
-        json_file = os.path.join(args.output_dir, f'安排结果{file_suffix}.json')
+        json_file = output_dir / f'安排结果{file_suffix}.json'
         io_handler.export_results_to_json(stats, json_file, privileged_info=privileged_info)
         print(f"✅ JSON结果已保存: {json_file}")
         
         # 导出CSV
-        csv_file = os.path.join(args.output_dir, f'安排结果{file_suffix}.csv')
+        csv_file = output_dir / f'安排结果{file_suffix}.csv'
         io_handler.export_results_to_csv(stats, csv_file, privileged_info=privileged_info)
         print(f"✅ CSV结果已保存: {csv_file}")
         
         # 导出Excel（可选）
         if args.export_xlsx:
-            excel_file = os.path.join(args.output_dir, f'安排结果{file_suffix}.xlsx')
+            excel_file = output_dir / f'安排结果{file_suffix}.xlsx'
             io_handler.export_results_to_excel(stats, excel_file, privileged_info=privileged_info)
             print(f"✅ Excel结果已保存: {excel_file}")
         
-        print(f"\n🎊 任务完成! 总用时 {time.time() - start_time:.2f} 秒")
+        print(f"\n🎊 任务完成! 总用时 {(time.perf_counter_ns() - start_ns) / 1e9:.2f} 秒")
         
     except KeyboardInterrupt:
         print(f"\n\n⏹️  用户中断程序")
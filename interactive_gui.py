@@ -124,7 +124,7 @@ class DatingMatchGUI:
         
         ttk.Label(row3_frame, text="求解器:").pack(side="left")
         solver_combo = ttk.Combobox(row3_frame, textvariable=self.solver_choice,
-                                   values=["auto", "heuristic", "ilp"], width=12, state="readonly")
+                                   values=["auto", "heuristic", "ilp", "matching"], width=12, state="readonly")
         solver_combo.pack(side="left", padx=(5, 20))
         
         ttk.Label(row3_frame, text="数据模式:").pack(side="left")
@@ -4,13 +4,31 @@
 用于构建偏好图、计算分组得分和统计信息
 """
 
-from typing import List, Tuple, Dict, Set, Optional
-from dataclasses import dataclass
-from collections import defaultdict, Counter
+from typing import List, Tuple, Dict, Set, Optional, Sequence
+from dataclasses import dataclass, replace
+from collections import Counter
 import json
+import math
+import sys
+import numpy as np
 
+# 分组得分缓存的最大条目数
+GROUP_SCORE_CACHE_SIZE = 4096
 
-@dataclass
+# 使用位掩码表示组成员的最大节点数（uint64）
+MAX_BITMASK_NODES = 64
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba为可选依赖，不可用时使用NumPy实现
+    njit = None
+    prange = range
+
+# Python 3.10+ 的dataclass支持slots（无实例__dict__，内存更小、属性访问更快）
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class GroupScore:
     """分组得分详情"""
     group_id: int
@@ -22,7 +40,7 @@ class GroupScore:
     mutual_count: int
 
 
-@dataclass 
+@dataclass(**_DATACLASS_OPTIONS)
 class OverallStats:
     """整体统计信息"""
     total_score: float
@@ -34,6 +52,97 @@ class OverallStats:
     hit_rate_mutual: float  # 互相喜欢命中率
 
 
+def _score_groups_numpy(src_ids: np.ndarray, dst_ids: np.ndarray, edge_w: np.ndarray, mutual_w: np.ndarray,
+                        is_mutual: np.ndarray, is_head: np.ndarray, penalty_mask: np.ndarray, penalty_weight: float,
+                        group_of: np.ndarray, num_groups: int) -> Tuple[np.ndarray, ...]:
+    """
+    按组汇总组内边的得分（NumPy实现）
+    
+    Returns:
+        (single[G], mutual[G], penalty[G], single_count[G], mutual_count[G]):
+        每组单向喜欢加权得分、互相喜欢加权得分、第一轮惩罚、单向喜欢条数、互相喜欢对数
+    """
+    src_group = group_of[src_ids]
+    in_group = (src_group == group_of[dst_ids]) & (src_group >= 0)
+    single_mask = in_group & ~is_mutual
+    head_mask = in_group & is_head
+    penalty_edges = single_mask & penalty_mask
+    single = np.bincount(src_group[single_mask], weights=edge_w[single_mask], minlength=num_groups)
+    mutual = np.bincount(src_group[head_mask], weights=mutual_w[head_mask], minlength=num_groups)
+    penalty = np.bincount(src_group[penalty_edges], weights=np.full(np.count_nonzero(penalty_edges), penalty_weight),
+                          minlength=num_groups)
+    single_count = np.bincount(src_group[single_mask], minlength=num_groups)
+    mutual_count = np.bincount(src_group[head_mask], minlength=num_groups)
+    return single, mutual, penalty, single_count, mutual_count
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _score_groups_jit(src_ids, dst_ids, edge_w, mutual_w, is_mutual, is_head, penalty_mask, penalty_weight,
+                          group_of, num_groups):
+        """按组汇总组内边的得分（Numba编译的逐边循环，结果与NumPy实现一致）"""
+        single = np.zeros(num_groups)
+        mutual = np.zeros(num_groups)
+        penalty = np.zeros(num_groups)
+        single_count = np.zeros(num_groups, dtype=np.int64)
+        mutual_count = np.zeros(num_groups, dtype=np.int64)
+        for i in range(src_ids.size):
+            g = group_of[src_ids[i]]
+            if g < 0 or g != group_of[dst_ids[i]]:
+                continue
+            if is_mutual[i]:
+                if is_head[i]:
+                    mutual[g] += mutual_w[i]
+                    mutual_count[g] += 1
+            else:
+                single[g] += edge_w[i]
+                single_count[g] += 1
+                if penalty_mask[i]:
+                    penalty[g] += penalty_weight
+        return single, mutual, penalty, single_count, mutual_count
+    
+    _score_groups = _score_groups_jit
+else:
+    _score_groups = _score_groups_numpy
+
+
+def _score_population_numpy(src_ids: np.ndarray, dst_ids: np.ndarray, edge_score: np.ndarray,
+                            candidates: np.ndarray) -> np.ndarray:
+    """
+    批量计算多个候选分组方案的总分（NumPy实现）
+    
+    Args:
+        candidates: 形状为 (K, N) 的组序号数组，每行是一个方案的 节点 -> 组序号（-1表示未分组）
+        
+    Returns:
+        形状为 (K,) 的总分数组
+    """
+    src_group = candidates[:, src_ids]
+    in_group = (src_group == candidates[:, dst_ids]) & (src_group >= 0)
+    return in_group @ edge_score
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _score_population_jit(src_ids, dst_ids, edge_score, candidates):
+        """批量计算多个候选分组方案的总分（Numba按候选方案并行）"""
+        num_candidates = candidates.shape[0]
+        totals = np.zeros(num_candidates)
+        for k in prange(num_candidates):
+            group_of = candidates[k]
+            total = 0.0
+            for i in range(src_ids.size):
+                g = group_of[src_ids[i]]
+                if g >= 0 and g == group_of[dst_ids[i]]:
+                    total += edge_score[i]
+            totals[k] = total
+        return totals
+    
+    _score_population = _score_population_jit
+else:
+    _score_population = _score_population_numpy
+
+
 class PreferenceGraph:
     """偏好图"""
     
@@ -54,29 +163,93 @@ class PreferenceGraph:
         self.first_round_penalties = first_round_penalties or set()
         self.penalty_weight = penalty_weight
         
-        # 构建图结构
-        self.graph = defaultdict(set)  # src -> {dst1, dst2, ...}
-        self.reverse_graph = defaultdict(set)  # dst -> {src1, src2, ...}
-        self.edge_weights = {}  # (src, dst) -> weight
+        # 边权重表 (src, dst) -> weight；重复边合并为一条（加权模式取最大权重），自环边丢弃
+        self.edge_weights = {}
+        # 如果有加权边，优先使用加权边；传统模式所有边权重为1
+        raw_edges = self.weighted_edges if self.weighted_edges else [(src, dst, 1.0) for src, dst in edges]
+        self_loops = 0
+        for src, dst, weight in raw_edges:
+            if src == dst:
+                self_loops += 1
+                continue
+            key = (src, dst)
+            if key not in self.edge_weights or weight > self.edge_weights[key]:
+                self.edge_weights[key] = weight
+        
+        # 合并的重复边数与丢弃的自环边数，由调用方决定是否提示
+        self.num_duplicate_edges = len(raw_edges) - self_loops - len(self.edge_weights)
+        self.num_self_loops = self_loops
         
-        # 如果有加权边，优先使用加权边
+        self.edges = list(self.edge_weights)
         if self.weighted_edges:
-            for src, dst, weight in self.weighted_edges:
-                self.graph[src].add(dst)
-                self.reverse_graph[dst].add(src)
-                self.edge_weights[(src, dst)] = weight
             # 同时保持edges兼容性
-            self.edges = [(src, dst) for src, dst, _ in self.weighted_edges]
-        else:
-            # 传统模式，所有边权重为1
-            for src, dst in edges:
-                self.graph[src].add(dst)
-                self.reverse_graph[dst].add(src)
-                self.edge_weights[(src, dst)] = 1.0
+            self.weighted_edges = [(src, dst, weight) for (src, dst), weight in self.edge_weights.items()]
         
-        # 统计信息
         self.all_nodes = self._get_all_nodes()
-        self.mutual_pairs = self._find_mutual_pairs()
+        
+        # 节点编码为连续整数，边存为SoA数组（与去重后的self.edges一一对应）
+        self.node_names = sorted(self.all_nodes)
+        self.node_index = {name: i for i, name in enumerate(self.node_names)}
+        self.num_nodes = len(self.node_index)
+        num_edges = len(self.edges)
+        
+        self.src_ids = np.fromiter((self.node_index[src] for src, _ in self.edges), dtype=np.int32, count=num_edges)
+        self.dst_ids = np.fromiter((self.node_index[dst] for _, dst in self.edges), dtype=np.int32, count=num_edges)
+        self.edge_w = np.fromiter((self.edge_weights[edge] for edge in self.edges), dtype=np.float64, count=num_edges)
+        
+        # 节点数不超过64时用uint64位掩码表示组成员（节点i对应第i位）
+        self.use_bitmask = self.num_nodes <= MAX_BITMASK_NODES
+        if self.use_bitmask:
+            self.node_bits = {name: 1 << i for i, name in enumerate(self.node_names)}
+            # 每条边两个端点的位掩码：边在组内 <=> edge_bits & group_bits == edge_bits
+            one = np.uint64(1)
+            self.edge_bits = (one << self.src_ids.astype(np.uint64)) | (one << self.dst_ids.astype(np.uint64))
+        
+        # CSR邻接结构：节点u的出边为 csr_dst[csr_indptr[u]:csr_indptr[u+1]]（行内按dst升序）
+        order = np.lexsort((self.dst_ids, self.src_ids))
+        self.csr_indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.src_ids, minlength=self.num_nodes), out=self.csr_indptr[1:])
+        self.csr_dst = self.dst_ids[order]
+        self.csr_edge_idx = order.astype(np.int32)  # CSR位置 -> self.edges中的下标
+        
+        # 互相喜欢掩码：反向边存在的边为True；每个互相喜欢对只在其首次出现的边上记一次得分
+        self.is_mutual_edge = self._has_edges(self.dst_ids, self.src_ids)
+        self.mutual_head = np.zeros(num_edges, dtype=bool)
+        self.mutual_w = np.zeros(num_edges, dtype=np.float64)
+        seen_pairs = set()
+        for i in np.flatnonzero(self.is_mutual_edge).tolist():
+            pair = self._mutual_pair(i)
+            if pair not in seen_pairs:
+                seen_pairs.add(pair)
+                self.mutual_head[i] = True
+                if self.weighted_edges:
+                    # 加权模式：两个方向的权重之和
+                    self.mutual_w[i] = self.edge_weights[pair] + self.edge_weights[(pair[1], pair[0])]
+                else:
+                    self.mutual_w[i] = self.mutual_weight
+        
+        # 统计信息
+        self.mutual_pairs = seen_pairs
+        self._total_possible_single = num_edges - 2 * len(self.mutual_pairs)  # 总边数 - 互相喜欢边数
+        self._total_possible_mutual = len(self.mutual_pairs)
+        
+        # 传统模式且无第一轮惩罚时，得分只取决于组内关系条数，无需调用得分内核
+        self._fast_mode = not self.weighted_edges and not self.first_round_penalties
+        
+        # 第一轮惩罚按边下标展开为布尔掩码，内核中直接按下标读取
+        self.penalty_mask = np.fromiter((edge in self.first_round_penalties for edge in self.edges), dtype=bool, count=num_edges)
+        
+        # 每条边在组内时对总分的贡献（互相喜欢对只记在首条边上，单向喜欢含第一轮惩罚）
+        single_w = self.edge_w if self.weighted_edges else np.ones(num_edges)
+        self.edge_score = np.where(self.is_mutual_edge, self.mutual_w,
+                                   single_w + np.where(self.penalty_mask, self.penalty_weight, 0.0))
+        
+        # 分组得分缓存：成员集合 -> GroupScore（图结构初始化后不再变化，得分只取决于成员）
+        self._group_score_cache: Dict[frozenset, GroupScore] = {}
+        # group_total_score 使用的Python列表形式边属性（首次使用时构建）
+        self._edge_lists = None
+        # delta_swap 使用的每个节点关联边列表（首次使用时构建）
+        self._incident_lists = None
     
     def _get_all_nodes(self) -> Set[str]:
         """获取所有节点"""
@@ -86,47 +259,58 @@ class PreferenceGraph:
             nodes.add(dst)
         return nodes
     
-    def _find_mutual_pairs(self) -> Set[Tuple[str, str]]:
-        """找到所有互相喜欢的对"""
-        mutual_pairs = set()
-        for src, dst in self.edges:
-            if dst in self.graph and src in self.graph[dst]:
-                # 确保每对只记录一次，按字典序排序
-                pair = tuple(sorted([src, dst]))
-                mutual_pairs.add(pair)
-        return mutual_pairs
+    def _has_edges(self, src_ids: np.ndarray, dst_ids: np.ndarray) -> np.ndarray:
+        """批量判断边 src -> dst 是否存在（在CSR行内二分查找）"""
+        if self.csr_dst.size == 0:
+            return np.zeros(len(src_ids), dtype=bool)
+        # 行内dst有序，(src, dst) 组合键在全局也有序
+        csr_keys = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.csr_indptr)) * self.num_nodes + self.csr_dst
+        keys = src_ids.astype(np.int64) * self.num_nodes + dst_ids
+        pos = np.minimum(np.searchsorted(csr_keys, keys), csr_keys.size - 1)
+        return csr_keys[pos] == keys
+    
+    def out_neighbors(self, node: str) -> List[str]:
+        """节点喜欢的人（按边的顺序，经CSR只访问该节点的出边）"""
+        u = self.node_index.get(node)
+        if u is None:
+            return []
+        edge_idx = np.sort(self.csr_edge_idx[self.csr_indptr[u]:self.csr_indptr[u + 1]])
+        return [self.edges[k][1] for k in edge_idx.tolist()]
+    
+    def _group_mask(self, group: List[str]) -> np.ndarray:
+        """组成员的节点掩码（不在图中的成员没有任何边，直接忽略）"""
+        mask = np.zeros(self.num_nodes, dtype=bool)
+        mask[[self.node_index[m] for m in group if m in self.node_index]] = True
+        return mask
+    
+    def _group_bits(self, group: List[str]) -> int:
+        """组成员的位掩码（不在图中的成员没有任何边，直接忽略）"""
+        bits = 0
+        for m in group:
+            bits |= self.node_bits.get(m, 0)
+        return bits
+    
+    def _edge_mask_in_group(self, group: List[str]) -> np.ndarray:
+        """两端都在组内的边的掩码（与边数组对齐）"""
+        if self.use_bitmask:
+            return (self.edge_bits & np.uint64(self._group_bits(group))) == self.edge_bits
+        mask = self._group_mask(group)
+        return mask[self.src_ids] & mask[self.dst_ids]
+    
+    def _mutual_pair(self, edge_idx: int) -> Tuple[str, str]:
+        """边对应的互相喜欢对（按字典序排列）"""
+        src, dst = self.edges[edge_idx]
+        return (min(src, dst), max(src, dst))
     
     def get_single_preferences_in_group(self, group: List[str]) -> List[Tuple[str, str]]:
         """获取组内的单向喜欢关系"""
-        single_prefs = []
-        group_set = set(group)
-        
-        for src, dst in self.edges:
-            if src in group_set and dst in group_set:
-                # 检查是否为互相喜欢
-                is_mutual = (dst in self.graph and src in self.graph[dst])
-                if not is_mutual:
-                    single_prefs.append((src, dst))
-        
-        return single_prefs
+        single_mask = self._edge_mask_in_group(group) & ~self.is_mutual_edge
+        return [self.edges[i] for i in np.flatnonzero(single_mask).tolist()]
     
     def get_mutual_preferences_in_group(self, group: List[str]) -> List[Tuple[str, str]]:
         """获取组内的互相喜欢关系"""
-        mutual_prefs = []
-        group_set = set(group)
-        seen_pairs = set()
-        
-        for src, dst in self.edges:
-            if src in group_set and dst in group_set:
-                # 检查是否为互相喜欢
-                if dst in self.graph and src in self.graph[dst]:
-                    # 确保每对只记录一次
-                    pair = tuple(sorted([src, dst]))
-                    if pair not in seen_pairs:
-                        mutual_prefs.append(pair)
-                        seen_pairs.add(pair)
-        
-        return mutual_prefs
+        head_mask = self._edge_mask_in_group(group) & self.mutual_head
+        return [self._mutual_pair(i) for i in np.flatnonzero(head_mask).tolist()]
     
     def calculate_group_score(self, group: List[str], group_id: int = 0) -> GroupScore:
         """
@@ -139,31 +323,76 @@ class PreferenceGraph:
         Returns:
             GroupScore: 分组得分详情
         """
-        single_prefs = self.get_single_preferences_in_group(group)
-        mutual_prefs = self.get_mutual_preferences_in_group(group)
+        # 优化器会反复评估相同的分组，命中缓存时只替换组ID
+        key = frozenset(group)
+        cacheable = len(key) == len(group)  # 有重复成员时members不同，不缓存
+        if cacheable:
+            cached = self._group_score_cache.get(key)
+            if cached is not None:
+                return replace(cached, group_id=group_id)
         
-        # 计算得分 - 支持加权边和第一轮惩罚
-        if self.weighted_edges:
-            # 加权模式：使用边的实际权重
-            single_score = sum(self.edge_weights.get((src, dst), 1.0) for src, dst in single_prefs)
-            # 互相喜欢：两个方向的权重之和
-            mutual_score = 0.0
-            for src, dst in mutual_prefs:
-                weight1 = self.edge_weights.get((src, dst), 1.0)
-                weight2 = self.edge_weights.get((dst, src), 1.0)
-                mutual_score += weight1 + weight2
+        # 组内边掩码与互相喜欢掩码按位运算，区分单向/互相喜欢
+        in_group = self._edge_mask_in_group(group)
+        single_prefs = [self.edges[i] for i in np.flatnonzero(in_group & ~self.is_mutual_edge).tolist()]
+        mutual_prefs = [self._mutual_pair(i) for i in np.flatnonzero(in_group & self.mutual_head).tolist()]
+        
+        if self._fast_mode:
+            # 得分由_build_group_score按条数计算，惩罚为0
+            score = self._build_group_score(group, group_id, single_prefs, mutual_prefs, 0.0, 0.0, 0.0)
         else:
+            # 加权得分与第一轮惩罚由得分内核汇总（单组即 group_of 中只有组0）
+            group_of = np.full(self.num_nodes, -1, dtype=np.int32)
+            group_of[[self.node_index[m] for m in group if m in self.node_index]] = 0
+            single, mutual, penalty = self._score_groups(group_of, 1)[:3]
+            score = self._build_group_score(group, group_id, single_prefs, mutual_prefs,
+                                            float(single[0]), float(mutual[0]), float(penalty[0]))
+        if cacheable:
+            self._cache_group_score(key, score)
+        return score
+    
+    def _cache_group_score(self, key: frozenset, score: GroupScore):
+        """写入分组得分缓存（超过上限时FIFO淘汰最早加入的条目）"""
+        if len(self._group_score_cache) >= GROUP_SCORE_CACHE_SIZE:
+            del self._group_score_cache[next(iter(self._group_score_cache))]
+        self._group_score_cache[key] = score
+    
+    def clear_score_cache(self):
+        """清空分组得分缓存（修改权重或惩罚设置后需要调用）"""
+        self._group_score_cache.clear()
+        self._edge_lists = None
+        self._incident_lists = None
+    
+    def __getstate__(self):
+        """序列化时不携带得分缓存（传给进程池时只发送图结构，缓存在子进程中按需重建）"""
+        state = self.__dict__.copy()
+        state['_group_score_cache'] = {}
+        state['_edge_lists'] = None
+        state['_incident_lists'] = None
+        return state
+    
+    def _build_group_score(self, group: List[str], group_id: int,
+                           single_prefs: List[Tuple[str, str]], mutual_prefs: List[Tuple[str, str]],
+                           single_score: float, mutual_score: float, penalty_score: float) -> GroupScore:
+        """
+        根据组内关系和内核汇总的得分组装GroupScore（传统模式得分按条数计算）
+        
+        Args:
+            group: 分组成员列表
+            group_id: 分组ID
+            single_prefs: 组内单向喜欢关系
+            mutual_prefs: 组内互相喜欢关系
+            single_score: 加权模式下的单向喜欢得分
+            mutual_score: 加权模式下的互相喜欢得分
+            penalty_score: 第一轮惩罚得分（由penalty_mask按边汇总）
+            
+        Returns:
+            GroupScore: 分组得分详情
+        """
+        if not self.weighted_edges:
             # 传统模式
             single_score = len(single_prefs) * 1.0  # 单向喜欢 1 分
             mutual_score = len(mutual_prefs) * self.mutual_weight  # 互相喜欢按权重计分
         
-        # 应用第一轮惩罚
-        penalty_score = 0.0
-        if self.first_round_penalties:
-            for src, dst in single_prefs:
-                if (src, dst) in self.first_round_penalties:
-                    penalty_score += self.penalty_weight
-        
         total_score = single_score + mutual_score + penalty_score
         
         return GroupScore(
@@ -176,6 +405,255 @@ class PreferenceGraph:
             mutual_count=len(mutual_prefs)
         )
     
+    def encode_groups(self, groups: List[List[str]]) -> Optional[np.ndarray]:
+        """
+        将分组方案编码为 节点 -> 组序号 数组（不在任何组中的节点为-1）
+        
+        Returns:
+            group_of数组；若有成员重复出现（无效分组）则返回None
+        """
+        group_of = np.full(self.num_nodes, -1, dtype=np.int32)
+        assigned = 0
+        for gi, group in enumerate(groups):
+            ids = [self.node_index[m] for m in group if m in self.node_index]
+            group_of[ids] = gi
+            assigned += len(ids)
+        
+        if assigned != np.count_nonzero(group_of >= 0):
+            return None
+        return group_of
+    
+    def delta_swap(self, group_of: Sequence[int], a: int, b: int) -> float:
+        """
+        计算交换两个节点所在分组后的总分变化（只遍历与a、b相连的边）
+        
+        Args:
+            group_of: 节点 -> 组序号 序列（见encode_groups；局部搜索中传入其Python列表形式更快）
+            a: 节点a的编号（node_index中的值）
+            b: 节点b的编号
+            
+        Returns:
+            交换后总分 - 交换前总分
+        """
+        ga, gb = group_of[a], group_of[b]
+        if ga == gb:
+            return 0.0
+        
+        if self._incident_lists is None:
+            # 每个节点的关联边 (另一端点, 该边得分)，出边与入边都计入，得分为0的边省略
+            incident = [[] for _ in range(self.num_nodes)]
+            for u, v, score in zip(self.src_ids.tolist(), self.dst_ids.tolist(), self.edge_score.tolist()):
+                if score:
+                    incident[u].append((v, score))
+                    incident[v].append((u, score))
+            self._incident_lists = incident
+        
+        terms = []
+        for node, g_old, g_new in ((a, ga, gb), (b, gb, ga)):
+            for other, score in self._incident_lists[node]:
+                if other == a or other == b:
+                    # a、b之间的边交换前后都跨组，不影响得分
+                    continue
+                g_other = group_of[other]
+                if g_other == g_new:
+                    terms.append(score)
+                elif g_other == g_old:
+                    terms.append(-score)
+        # 精确求和：实际不变的交换增量恰为0，正反两个方向的增量互为相反数（不会因舍入误判为改进）
+        return math.fsum(terms)
+    
+    def _score_groups(self, group_of: np.ndarray, num_groups: int) -> Tuple[np.ndarray, ...]:
+        """调用得分内核，返回 (single, mutual, penalty, single_count, mutual_count) 各组数组"""
+        return _score_groups(
+            self.src_ids, self.dst_ids, self.edge_w, self.mutual_w, self.is_mutual_edge, self.mutual_head,
+            self.penalty_mask, float(self.penalty_weight), group_of, num_groups
+        )
+    
+    def score_groups_fast(self, groups: List[List[str]]) -> np.ndarray:
+        """
+        只计算各组得分数值，不构建GroupScore（供优化器热循环使用）
+        
+        Args:
+            groups: 所有分组的列表
+            
+        Returns:
+            形状为 (G, 3) 的数组，每行为 [总分, 单向喜欢条数, 互相喜欢对数]
+        """
+        group_of = self.encode_groups(groups)
+        if group_of is None:
+            # 成员重复出现时逐组计算
+            return np.array([[s.total_score, s.single_count, s.mutual_count]
+                             for s in (self.explain_group(group, i + 1) for i, group in enumerate(groups))],
+                            dtype=np.float64).reshape(len(groups), 3)
+        
+        if self._fast_mode:
+            # 传统模式且无惩罚：只需统计各组关系条数
+            src_group = group_of[self.src_ids]
+            in_group = (src_group == group_of[self.dst_ids]) & (src_group >= 0)
+            single_count = np.bincount(src_group[in_group & ~self.is_mutual_edge], minlength=len(groups))
+            mutual_count = np.bincount(src_group[in_group & self.mutual_head], minlength=len(groups))
+            penalty = 0.0
+        else:
+            single, mutual, penalty, single_count, mutual_count = self._score_groups(group_of, len(groups))
+        if not self.weighted_edges:
+            # 传统模式：按条数计分
+            single = single_count * 1.0
+            mutual = mutual_count * self.mutual_weight
+        
+        result = np.empty((len(groups), 3), dtype=np.float64)
+        result[:, 0] = single + mutual + penalty
+        result[:, 1] = single_count
+        result[:, 2] = mutual_count
+        return result
+    
+    def group_total_score(self, group: List[str]) -> float:
+        """
+        单组总分（只遍历组员的出边，供局部搜索逐组重算得分）
+        
+        按边的顺序逐条累加，与 score_groups_fast 中该组的总分数值完全一致。
+        
+        Args:
+            group: 分组成员列表
+            
+        Returns:
+            该组总分
+        """
+        ids = [self.node_index[m] for m in group if m in self.node_index]
+        members = set(ids)
+        if len(members) != len(ids):
+            # 成员重复出现时与 score_groups_fast 一样逐组计算
+            return float(self.score_groups_fast([group])[0, 0])
+        
+        if self._edge_lists is None:
+            # 每个节点的出边下标（升序，即边的顺序）与各边属性
+            out_edges = [sorted(self.csr_edge_idx[self.csr_indptr[u]:self.csr_indptr[u + 1]].tolist())
+                         for u in range(self.num_nodes)]
+            self._edge_lists = (out_edges, self.dst_ids.tolist(), self.is_mutual_edge.tolist(),
+                                self.mutual_head.tolist(), self.edge_w.tolist(), self.mutual_w.tolist(),
+                                self.penalty_mask.tolist())
+        out_edges, dst_ids, is_mutual, is_head, edge_w, mutual_w, penalty_mask = self._edge_lists
+        
+        # 组内边按边的顺序排列，累加顺序与得分内核一致
+        in_group = sorted(k for u in ids for k in out_edges[u] if dst_ids[k] in members)
+        single = mutual = penalty = 0.0
+        single_count = mutual_count = 0
+        penalty_weight = float(self.penalty_weight)
+        for k in in_group:
+            if is_mutual[k]:
+                if is_head[k]:
+                    mutual += mutual_w[k]
+                    mutual_count += 1
+            else:
+                single += edge_w[k]
+                single_count += 1
+                if penalty_mask[k]:
+                    penalty += penalty_weight
+        
+        if not self.weighted_edges:
+            # 传统模式：按条数计分
+            single = single_count * 1.0
+            mutual = mutual_count * self.mutual_weight
+        if self._fast_mode:
+            penalty = 0.0
+        return float(single + mutual + penalty)
+    
+    def calculate_total_score(self, groups: List[List[str]]) -> float:
+        """
+        计算分组方案的总得分（等于calculate_overall_score(groups).total_score，但不构建明细）
+        
+        Args:
+            groups: 所有分组的列表
+            
+        Returns:
+            总得分
+        """
+        # 按组顺序逐项累加，与calculate_overall_score的汇总顺序一致
+        return float(sum(self.score_groups_fast(groups)[:, 0].tolist()))
+    
+    def score_population(self, candidates) -> np.ndarray:
+        """
+        批量计算一批候选分组方案的总分（供遗传算法等一次评估整个种群的优化器使用）
+        
+        Args:
+            candidates: 形状为 (K, N) 的组序号数组，每行为一个方案的 group_of（见encode_groups），
+                        或分组方案列表 [groups1, groups2, ...]
+            
+        Returns:
+            形状为 (K,) 的总分数组（与calculate_total_score相比仅有浮点舍入差异）
+        """
+        if not isinstance(candidates, np.ndarray):
+            encoded = [self.encode_groups(groups) for groups in candidates]
+            if any(group_of is None for group_of in encoded):
+                raise ValueError("候选分组方案中存在重复成员")
+            candidates = np.array(encoded, dtype=np.int32).reshape(len(encoded), self.num_nodes)
+        candidates = np.ascontiguousarray(candidates, dtype=np.int32)
+        return _score_population(self.src_ids, self.dst_ids, self.edge_score, candidates)
+    
+    def explain_group(self, group: List[str], group_id: int = 0) -> GroupScore:
+        """
+        构建单个分组的完整得分明细（用于最终输出和报告）
+        
+        Args:
+            group: 分组成员列表
+            group_id: 分组ID
+            
+        Returns:
+            GroupScore: 分组得分详情
+        """
+        return self.calculate_group_score(group, group_id)
+    
+    def _score_assigned_groups(self, groups: List[List[str]], group_of: np.ndarray) -> List[GroupScore]:
+        """
+        一次性计算所有分组的得分：按 group_of[src] == group_of[dst] 取出全部组内边，
+        加权得分由 _score_groups 按组汇总（有numba时为编译内核）
+        
+        Args:
+            groups: 所有分组的列表
+            group_of: 节点 -> 组序号 数组
+            
+        Returns:
+            每组的GroupScore列表
+        """
+        num_groups = len(groups)
+        
+        # 已缓存的成员集合直接复用（成员排序和关系列表每个集合只构建一次）
+        keys = [frozenset(group) for group in groups]
+        results = [self._group_score_cache.get(key) for key in keys]
+        pending = [r is None for r in results]
+        
+        if any(pending):
+            src_group = group_of[self.src_ids]
+            in_group = (src_group == group_of[self.dst_ids]) & (src_group >= 0)
+            
+            single_idx = np.flatnonzero(in_group & ~self.is_mutual_edge)
+            head_idx = np.flatnonzero(in_group & self.mutual_head)
+            
+            # 按组收集关系（保持边列表顺序）
+            singles_by_group = [[] for _ in range(num_groups)]
+            for i, gi in zip(single_idx.tolist(), src_group[single_idx].tolist()):
+                if pending[gi]:
+                    singles_by_group[gi].append(self.edges[i])
+            mutuals_by_group = [[] for _ in range(num_groups)]
+            for i, gi in zip(head_idx.tolist(), src_group[head_idx].tolist()):
+                if pending[gi]:
+                    mutuals_by_group[gi].append(self._mutual_pair(i))
+            
+            if self._fast_mode:
+                single_scores = mutual_scores = penalty_scores = [0.0] * num_groups
+            else:
+                single_scores, mutual_scores, penalty_scores = (a.tolist() for a in self._score_groups(group_of, num_groups)[:3])
+        
+        group_scores = []
+        for gi, group in enumerate(groups):
+            if pending[gi]:
+                score = self._build_group_score(group, gi + 1, singles_by_group[gi], mutuals_by_group[gi],
+                                                single_scores[gi], mutual_scores[gi], penalty_scores[gi])
+                self._cache_group_score(keys[gi], score)
+            else:
+                score = replace(results[gi], group_id=gi + 1)
+            group_scores.append(score)
+        return group_scores
+    
     def calculate_overall_score(self, groups: List[List[str]]) -> OverallStats:
         """
         计算整体得分和统计
@@ -186,15 +664,19 @@ class PreferenceGraph:
         Returns:
             OverallStats: 整体统计信息
         """
-        group_scores = []
+        group_of = self.encode_groups(groups)
+        if group_of is not None:
+            group_scores = self._score_assigned_groups(groups, group_of)
+        else:
+            # 成员重复出现时各组独立计算
+            group_scores = [self.calculate_group_score(group, i + 1) for i, group in enumerate(groups)]
+        
         total_score = 0.0
         total_single = 0
         total_mutual = 0
         
-        # 计算每组得分
-        for i, group in enumerate(groups):
-            score = self.calculate_group_score(group, i + 1)
-            group_scores.append(score)
+        # 汇总每组得分
+        for score in group_scores:
             total_score += score.total_score
             total_single += score.single_count
             total_mutual += score.mutual_count
@@ -202,9 +684,9 @@ class PreferenceGraph:
         # 计算平均分
         avg_score = total_score / len(groups) if groups else 0.0
         
-        # 计算命中率
-        total_possible_single = len(self.edges) - 2 * len(self.mutual_pairs)  # 总边数 - 互相喜欢边数
-        total_possible_mutual = len(self.mutual_pairs)
+        # 计算命中率（分母在初始化时预先计算）
+        total_possible_single = self._total_possible_single
+        total_possible_mutual = self._total_possible_mutual
         
         hit_rate_single = total_single / total_possible_single if total_possible_single > 0 else 0.0
         hit_rate_mutual = total_mutual / total_possible_mutual if total_possible_mutual > 0 else 0.0
@@ -282,20 +764,89 @@ class PreferenceGraph:
     
     def get_graph_stats(self) -> Dict:
         """获取图的基本统计信息"""
-        node_degrees = Counter()
-        for src, dst in self.edges:
-            node_degrees[src] += 1
+        # 出度直接由CSR行指针得到
+        out_degrees = np.diff(self.csr_indptr)
+        nodes_with_preferences = int(np.count_nonzero(out_degrees))
         
         return {
             "total_edges": len(self.edges),
             "total_nodes": len(self.all_nodes),
             "mutual_pairs": len(self.mutual_pairs),
-            "avg_out_degree": sum(node_degrees.values()) / len(self.all_nodes) if self.all_nodes else 0,
-            "nodes_with_preferences": len(node_degrees),
-            "nodes_without_preferences": len(self.all_nodes) - len(node_degrees)
+            "avg_out_degree": int(out_degrees.sum()) / len(self.all_nodes) if self.all_nodes else 0,
+            "nodes_with_preferences": nodes_with_preferences,
+            "nodes_without_preferences": len(self.all_nodes) - nodes_with_preferences
         }
 
 
+def _count_genders(group: List[str], males: frozenset, females: frozenset) -> Tuple[int, int]:
+    """统计组内男女人数（名单内人员查表，名单外人员按M/F前缀判断）"""
+    male_count = female_count = 0
+    for m in group:
+        if m in males:
+            male_count += 1
+        elif m in females:
+            female_count += 1
+        elif m.startswith('M'):
+            male_count += 1
+        elif m.startswith('F'):
+            female_count += 1
+    return male_count, female_count
+
+
+def is_valid_grouping(groups: List[List[str]], require_2by2: bool = True, pairing_mode: bool = False,
+                      expected_males: int = 12, expected_females: int = 12, group_size: int = 4) -> bool:
+    """
+    快速判断分组方案是否有效（与validate_grouping规则相同，遇到第一个错误即返回，不生成错误信息）
+    
+    Args:
+        groups: 分组方案
+        require_2by2: 是否要求每组等量男女
+        pairing_mode: 是否为配对模式
+        expected_males: 期望男性人数
+        expected_females: 期望女性人数
+        group_size: 标准组大小（最后一组可以小于此值）
+        
+    Returns:
+        是否有效
+    """
+    males = frozenset(f"M{i}" for i in range(1, expected_males + 1))
+    females = frozenset(f"F{i}" for i in range(1, expected_females + 1))
+    last = len(groups) - 1
+    
+    if pairing_mode:
+        if len(groups) != min(expected_males, expected_females):
+            return False
+        for pair in groups:
+            if len(pair) != 2 or _count_genders(pair, males, females) != (1, 1):
+                return False
+    else:
+        total_people = expected_males + expected_females
+        if len(groups) != (total_people + group_size - 1) // group_size:
+            return False
+        for i, group in enumerate(groups):
+            if (not group) if i == last else len(group) != group_size:
+                return False
+    
+    all_members = [m for group in groups for m in group]
+    actual_members = set(all_members)
+    if len(all_members) != len(actual_members) or actual_members != males | females:
+        return False
+    
+    if require_2by2 and not pairing_mode:
+        expected_gender_count = group_size // 2
+        for i, group in enumerate(groups):
+            male_count, female_count = _count_genders(group, males, females)
+            if male_count != female_count:
+                return False
+            if i == last:
+                if len(group) % 2 != 0:
+                    return False
+            elif male_count != expected_gender_count:
+                return False
+    
+    return True
+
+
 def validate_grouping(groups: List[List[str]], require_2by2: bool = True, pairing_mode: bool = False, 
                      expected_males: int = 12, expected_females: int = 12, group_size: int = 4) -> Tuple[bool, List[str]]:
     """
@@ -312,8 +863,16 @@ def validate_grouping(groups: List[List[str]], require_2by2: bool = True, pairin
     Returns:
         (is_valid, error_messages): 是否有效和错误信息列表
     """
+    # 有效分组（常见情况）走快速检查，只有无效时才逐项生成错误信息
+    if is_valid_grouping(groups, require_2by2, pairing_mode, expected_males, expected_females, group_size):
+        return True, []
+    
     errors = []
     
+    # 预先生成性别表，组内统计时只做集合查找
+    males = frozenset(f"M{i}" for i in range(1, expected_males + 1))
+    females = frozenset(f"F{i}" for i in range(1, expected_females + 1))
+    
     total_people = expected_males + expected_females
     expected_pairs = min(expected_males, expected_females)
     
@@ -328,13 +887,12 @@ def validate_grouping(groups: List[List[str]], require_2by2: bool = True, pairin
                 errors.append(f"第{i+1}对人数应为2，实际为{len(pair)}")
             else:
                 # 检查每对是否为一男一女
-                males = [m for m in pair if m.startswith('M')]
-                females = [m for m in pair if m.startswith('F')]
+                male_count, female_count = _count_genders(pair, males, females)
                 
-                if len(males) != 1:
-                    errors.append(f"第{i+1}对男性人数应为1，实际为{len(males)}")
-                if len(females) != 1:
-                    errors.append(f"第{i+1}对女性人数应为1，实际为{len(females)}")
+                if male_count != 1:
+                    errors.append(f"第{i+1}对男性人数应为1，实际为{male_count}")
+                if female_count != 1:
+                    errors.append(f"第{i+1}对女性人数应为1，实际为{female_count}")
     else:
         # 传统分组模式验证
         expected_groups = (total_people + group_size - 1) // group_size  # 向上取整
@@ -357,11 +915,11 @@ def validate_grouping(groups: List[List[str]], require_2by2: bool = True, pairin
         all_members.extend(group)
     
     if len(all_members) != len(set(all_members)):
-        duplicates = [x for x in all_members if all_members.count(x) > 1]
+        duplicates = [m for m, count in Counter(all_members).items() if count > 1]
         errors.append(f"发现重复人员: {set(duplicates)}")
     
     # 检查人员完整性
-    expected_members = {f"M{i}" for i in range(1, expected_males + 1)} | {f"F{i}" for i in range(1, expected_females + 1)}
+    expected_members = males | females
     actual_members = set(all_members)
     
     missing = expected_members - actual_members
@@ -375,12 +933,11 @@ def validate_grouping(groups: List[List[str]], require_2by2: bool = True, pairin
     # 检查性别比例（仅限传统分组模式）
     if require_2by2 and not pairing_mode:
         for i, group in enumerate(groups):
-            males = [m for m in group if m.startswith('M')]
-            females = [m for m in group if m.startswith('F')]
+            male_count, female_count = _count_genders(group, males, females)
             
             # 要求每组男女1:1
-            if len(males) != len(females):
-                errors.append(f"第{i+1}组男女比例应为1:1，实际为{len(males)}:{len(females)}")
+            if male_count != female_count:
+                errors.append(f"第{i+1}组男女比例应为1:1，实际为{male_count}:{female_count}")
             
             # 最后一组可以人数较少，但仍需保持1:1
             if i == len(groups) - 1:  # 最后一组
@@ -388,10 +945,10 @@ def validate_grouping(groups: List[List[str]], require_2by2: bool = True, pairin
                     errors.append(f"第{i+1}组(最后一组)人数应为偶数以保持1:1性别比例，实际为{len(group)}")
             else:  # 非最后一组
                 expected_gender_count = group_size // 2
-                if len(males) != expected_gender_count:
-                    errors.append(f"第{i+1}组男性人数应为{expected_gender_count}，实际为{len(males)}")
-                if len(females) != expected_gender_count:
-                    errors.append(f"第{i+1}组女性人数应为{expected_gender_count}，实际为{len(females)}")
+                if male_count != expected_gender_count:
+                    errors.append(f"第{i+1}组男性人数应为{expected_gender_count}，实际为{male_count}")
+                if female_count != expected_gender_count:
+                    errors.append(f"第{i+1}组女性人数应为{expected_gender_count}，实际为{female_count}")
     
     return len(errors) == 0, errors
 
@@ -4,20 +4,500 @@ Excel/CSV/JSON IO 处理模块
 用于读取偏好数据和导出分组结果
 """
 
-import pandas as pd
+import codecs
+import csv
 import json
 import os
-from typing import List, Dict, Optional, Tuple, Set
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, FrozenSet
 from pathlib import Path
 from .graph import OverallStats
 
+# CSV导出的写缓冲大小（字节）
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+# CSV读取时依次尝试的编码，及探测编码时读取的文件头大小（字节）
+CSV_ENCODINGS = ('utf-8-sig', 'gb2312', 'gbk')
+CSV_ENCODING_PROBE_SIZE = 1 << 16
+
+# 参与者ID格式（如M11、F3）
+_PID_MATCH = re.compile(r'[MF]\d+').fullmatch
+
+# 第一轮结果解析缓存的最大条目数
+FIRST_ROUND_CACHE_SIZE = 32
+
+# 字符串对象ID规范化缓存的最大条目数
+TARGET_ID_CACHE_SIZE = 4096
+
+# 已创建输出目录缓存的最大条目数
+OUTPUT_DIR_CACHE_SIZE = 256
+
+# CSV中视为缺失值的字符串（与pandas.read_csv默认的na_values一致）
+CSV_NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+def dump_json(data, file_path: str):
+    """
+    将数据以UTF-8、2空格缩进写入JSON文件
+    
+    优先使用orjson（C实现，直接输出UTF-8字节），不可用时回退到标准库json。
+    两者对常规数据的输出一致，但以下情况不同：NaN/inf在orjson中写为null
+    （标准库json写为非标准的NaN/Infinity），大浮点数的指数写法不同
+    （orjson写为1e16，标准库json写为1e+16），超出64位的整数orjson会报错。
+    
+    Args:
+        data: 可JSON序列化的数据
+        file_path: 输出文件路径
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    # 一次性编码后整体写出，不经过文本模式的逐块编码
+    Path(file_path).write_bytes(payload)
+
+
+@lru_cache(maxsize=OUTPUT_DIR_CACHE_SIZE)
+def _ensure_dir(path: str):
+    """
+    确保输出目录存在（按进程缓存，批量导出到同一目录时只访问一次文件系统）
+    
+    纯文件名（dirname为''）时输出到当前目录，无需创建。
+    """
+    if path:
+        os.makedirs(path, exist_ok=True)
+
+
+def _to_int(value) -> int:
+    """将编号转换为整数（支持Excel中的浮点数格式），整数直接返回"""
+    if type(value) is int:
+        return value
+    return int(float(value))
+
+
+def _normalize_target_id(value):
+    """
+    规范化对象ID单元格：空值为''，参与者ID（如M11、F3）保留字符串，
+    数字转为整数，其余保留原始字符串交给解析器处理
+    """
+    if value is None:
+        return ''
+    if type(value) is int:
+        return value
+    if type(value) is float:
+        return int(value)
+    return _normalize_target_str(str(value))
+
+
+@lru_cache(maxsize=TARGET_ID_CACHE_SIZE)
+def _normalize_target_str(value: str):
+    """
+    规范化字符串形式的对象ID（带缓存）
+    
+    CSV中所有单元格都是字符串，而对象ID只有少量不同取值，
+    缓存后重复出现的ID不再重复执行strip、正则匹配和数字转换。
+    """
+    col_str = value.strip()
+    if col_str == '':
+        return ''
+    # 检查是否是参与者ID格式（如M11, F3）或纯数字
+    if _PID_MATCH(col_str):
+        return col_str
+    try:
+        return int(float(col_str))
+    except (ValueError, TypeError):
+        return col_str
+
+
+def _match_columns(columns: List, expected_columns: List[str], warnings: List[str]) -> Dict:
+    """
+    将实际列名模糊匹配到期望列名
+    
+    每个期望列取第一个与之互相包含的实际列；找不到时在列数足够的情况下按位置匹配。
+    实际列名的字符串形式只计算一次，不在每个期望列的循环中重复转换。
+    
+    Args:
+        columns: 原始列名
+        expected_columns: 期望的列名
+        warnings: 警告信息列表（原地追加）
+        
+    Returns:
+        实际列名 -> 期望列名 的映射
+    """
+    column_names = [(actual, str(actual)) for actual in columns]
+    positional = len(columns) >= len(expected_columns)
+    
+    column_mapping = {}
+    for idx, expected in enumerate(expected_columns):
+        for actual, name in column_names:
+            if expected in name or name in expected:
+                column_mapping[actual] = expected
+                break
+        else:
+            # 尝试按位置匹配
+            if positional and idx < len(columns):
+                column_mapping[columns[idx]] = expected
+                warnings.append(f"按位置匹配列: {columns[idx]} -> {expected}")
+    
+    return column_mapping
+
+
+@lru_cache(maxsize=FIRST_ROUND_CACHE_SIZE)
+def _parse_first_round_cached(file_path: str, mtime_ns: int, size: int) -> Tuple[Optional[FrozenSet[Tuple[str, str]]], Tuple[str, ...]]:
+    """
+    解析第一轮结果JSON（带缓存）
+    
+    mtime_ns 和 size 只作为缓存键，文件被修改后自动重新解析。
+    优先使用orjson解析；返回不可变集合，避免调用方修改缓存中的结果。
+    
+    Returns:
+        (单向喜欢关系集合, 警告信息)，文件缺少 'groups' 字段时集合为None
+    """
+    warnings = []
+    
+    # 一次性读入字节再解析，不经过文本解码层
+    raw = Path(file_path).read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw.decode('utf-8'))
+    
+    if 'groups' not in data:
+        warnings.append(f"文件 {file_path} 中未找到 'groups' 字段")
+        return None, tuple(warnings)
+    
+    prefs = [pref for group in data['groups'] if 'single_preferences' in group for pref in group['single_preferences']]
+    single_preferences = [(pref['from'], pref['to']) for pref in prefs if 'from' in pref and 'to' in pref]
+    
+    # 只有存在格式不完整的条目时才再遍历一次收集警告
+    if len(single_preferences) < len(prefs):
+        warnings.extend(f"无效的单向喜欢格式: {pref}" for pref in prefs if not ('from' in pref and 'to' in pref))
+    
+    return frozenset(single_preferences), tuple(warnings)
+
+
+def _csv_group_row(group_score) -> tuple:
+    """构建CSV导出中单个分组的一行：成员、得分、命中数及偏好关系详情（无则为'无'）"""
+    # str.join 内部会先把生成器物化为列表，直接传列表推导式更快
+    return (
+        group_score.group_id,
+        ', '.join(group_score.members),
+        float(group_score.total_score),
+        group_score.single_count,
+        group_score.mutual_count,
+        '; '.join([f"{src}→{dst}" for src, dst in group_score.single_preferences]) or '无',
+        '; '.join([f"{src}↔{dst}" for src, dst in group_score.mutual_preferences]) or '无'
+    )
+
+
+def _write_workbook(output_file: str, sheets: List[Tuple[str, tuple, List[tuple]]]):
+    """
+    按顺序写出多个sheet的xlsx文件：每个sheet先写表头，再逐行写入数据
+    
+    优先使用xlsxwriter的constant_memory模式（逐行落盘，内存占用与行数无关），
+    未安装时回退到openpyxl只写模式。表头样式与pandas.to_excel一致（加粗、细边框、居中）；
+    没有数据行时只创建空sheet，与空DataFrame的导出结果一致。
+    
+    Args:
+        output_file: 输出文件路径
+        sheets: [(sheet名称, 表头, 数据行), ...]
+    """
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(output_file, {'constant_memory': True})
+        try:
+            header_format = wb.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            for title, headers, rows in sheets:
+                ws = wb.add_worksheet(title)
+                if not rows:
+                    continue
+                ws.write_row(0, 0, headers, header_format)
+                for row_idx, row in enumerate(rows, 1):
+                    ws.write_row(row_idx, 0, row)
+        finally:
+            wb.close()
+        return
+    
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+    
+    thin = Side(style='thin')
+    font = Font(bold=True)
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    alignment = Alignment(horizontal='center', vertical='top')
+    
+    wb = Workbook(write_only=True)
+    for title, headers, rows in sheets:
+        ws = wb.create_sheet(title)
+        if not rows:
+            continue
+        
+        header_cells = []
+        for name in headers:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = font
+            cell.border = border
+            cell.alignment = alignment
+            header_cells.append(cell)
+        ws.append(header_cells)
+        
+        for row in rows:
+            ws.append(row)
+    wb.save(output_file)
 
 class DataIO:
     """数据输入输出处理器"""
     
-    def __init__(self):
-        """初始化数据IO处理器"""
-        self.supported_extensions = {'.xlsx', '.xls', '.csv'}
+    def __init__(self, excel_engine: str = 'calamine'):
+        """
+        初始化数据IO处理器
+        
+        Args:
+            excel_engine: xlsx读取引擎，'calamine' 或 'openpyxl'；
+                          python-calamine 不可用时自动回退到 openpyxl 只读模式
+        """
+        # 扩展名 -> 读取器，统一签名 (file_path, sheet_name, warnings) -> (columns, rows)
+        self._readers = {
+            '.xlsx': self._read_xlsx_sheet,
+            '.xls': self._read_xls_sheet,
+            '.csv': lambda file_path, sheet_name, warnings: self._read_csv_table(file_path, warnings),
+        }
+        self.supported_extensions = set(self._readers)
+        self.excel_engine = excel_engine
+        self.calamine_available = self._check_calamine()
+    
+    def _check_calamine(self) -> bool:
+        """检查python-calamine库是否可用"""
+        try:
+            import python_calamine
+            return True
+        except ImportError:
+            return False
+    
+    def _load_xlsx_rows_openpyxl(self, file_path: str, sheet_name: str, warnings: List[str]) -> Tuple[tuple, List[tuple]]:
+        """以openpyxl只读模式流式读取sheet，返回 (表头, 数据行)"""
+        from openpyxl import load_workbook
+        
+        wb = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            if sheet_name in wb.sheetnames:
+                ws = wb[sheet_name]
+            else:
+                warnings.append(f"Sheet '{sheet_name}' 不存在，尝试读取第一个sheet")
+                ws = wb.worksheets[0]
+            
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            body = [row for row in rows]
+        finally:
+            wb.close()
+        
+        return header, body
+    
+    def _load_xlsx_rows_calamine(self, file_path: str, sheet_name: str, warnings: List[str]) -> Tuple[tuple, List[tuple]]:
+        """使用python-calamine（Rust实现）读取sheet，返回 (表头, 数据行)"""
+        from python_calamine import CalamineWorkbook
+        
+        wb = CalamineWorkbook.from_path(file_path)
+        if sheet_name in wb.sheet_names:
+            sheet = wb.get_sheet_by_name(sheet_name)
+        else:
+            warnings.append(f"Sheet '{sheet_name}' 不存在，尝试读取第一个sheet")
+            sheet = wb.get_sheet_by_index(0)
+        
+        # calamine 用 '' 表示空单元格、用浮点数表示所有数字，这里统一成openpyxl的取值
+        rows = [
+            tuple(None if cell == '' else int(cell) if isinstance(cell, float) and cell.is_integer() else cell
+                  for cell in row)
+            for row in sheet.to_python(skip_empty_area=False)
+        ]
+        if not rows:
+            return (), []
+        return rows[0], rows[1:]
+    
+    def _build_columns(self, header: tuple, width: int) -> List:
+        """按pandas规则生成列名：空列名命名为 "Unnamed: i"，重复列名追加 ".1"、".2" 后缀"""
+        columns = []
+        seen = {}
+        for idx in range(width):
+            cell = header[idx] if idx < len(header) else None
+            name = f"Unnamed: {idx}" if cell is None else cell
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+    
+    def _read_xlsx_sheet(self, file_path: str, sheet_name: str, warnings: List[str]) -> Tuple[List, List[tuple]]:
+        """
+        流式读取xlsx sheet
+        
+        Args:
+            file_path: xlsx文件路径
+            sheet_name: sheet名称，不存在时回退到第一个sheet
+            warnings: 警告信息列表（原地追加）
+            
+        Returns:
+            (columns, rows): 列名列表和等宽的数据行，空单元格为None
+        """
+        if self.excel_engine == 'calamine' and self.calamine_available:
+            header, body = self._load_xlsx_rows_calamine(file_path, sheet_name, warnings)
+        else:
+            header, body = self._load_xlsx_rows_openpyxl(file_path, sheet_name, warnings)
+        
+        # 去掉末尾的空行（与pandas读取行为一致）
+        while body and all(cell is None for cell in body[-1]):
+            body.pop()
+        
+        # 去掉末尾的空列（表头和数据均为空）：有效宽度为各行最后一个非空单元格位置的最大值，
+        # 每行只从末尾向前扫描到当前宽度为止，格式化导致的大量空列不会被逐列重复遍历
+        width = 0
+        for row in (header, *body):
+            for idx in range(len(row) - 1, width - 1, -1):
+                if row[idx] is not None:
+                    width = idx + 1
+                    break
+        
+        # 只有宽度不一致的行才需要截断/补齐，其余行直接复用读取结果
+        columns = self._build_columns(header, width)
+        rows = [row if len(row) == width else tuple(row[:width]) + (None,) * (width - len(row)) for row in body]
+        return columns, rows
+    
+    def _read_xls_sheet(self, file_path: str, sheet_name: str, warnings: List[str]) -> Tuple[List, List[tuple]]:
+        """读取旧版xls sheet（依赖pandas+xlrd），返回 (columns, rows)，缺失值为None"""
+        import pandas as pd
+        
+        # 工作簿只打开一次，sheet不存在时直接在已解析的工作簿中回退
+        with pd.ExcelFile(file_path) as xl:
+            if sheet_name not in xl.sheet_names:
+                warnings.append(f"Sheet '{sheet_name}' 不存在，尝试读取第一个sheet")
+                sheet_name = 0
+            df = xl.parse(sheet_name)
+        
+        df = df.astype(object).where(df.notna(), None)
+        return df.columns.tolist(), [tuple(row) for row in df.itertuples(index=False, name=None)]
+    
+    def _detect_csv_encoding(self, file_path: str) -> str:
+        """根据文件头（前64KB）探测CSV编码，返回CSV_ENCODINGS中第一个能解码的编码"""
+        with open(file_path, 'rb') as f:
+            head = f.read(CSV_ENCODING_PROBE_SIZE)
+        
+        for encoding in CSV_ENCODINGS:
+            try:
+                # 增量解码，文件头末尾被截断的多字节字符不算错误
+                codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return CSV_ENCODINGS[-1]
+    
+    def _read_csv_table(self, file_path: str, warnings: List[str]) -> Tuple[List, List[tuple]]:
+        """
+        使用标准库csv流式读取CSV文件（依次尝试UTF-8、GB2312、GBK编码）
+        
+        Args:
+            file_path: CSV文件路径
+            warnings: 警告信息列表（原地追加）
+            
+        Returns:
+            (columns, rows): 列名列表和等宽的数据行，缺失值为None
+        """
+        # 先按文件头探测编码，避免整文件解码重试；文件后部解码失败时再换下一种编码
+        candidates = CSV_ENCODINGS[CSV_ENCODINGS.index(self._detect_csv_encoding(file_path)):]
+        for encoding in candidates:
+            try:
+                with open(file_path, 'r', encoding=encoding, newline='') as f:
+                    # 跳过完全空白的行（与pandas的skip_blank_lines一致）
+                    lines = [row for row in csv.reader(f) if row]
+                break
+            except UnicodeDecodeError:
+                if encoding == candidates[-1]:
+                    raise
+        
+        if encoding == 'gb2312':
+            warnings.append("使用GB2312编码读取CSV文件")
+        elif encoding == 'gbk':
+            warnings.append("使用GBK编码读取CSV文件")
+        
+        if not lines:
+            raise ValueError("CSV文件为空")
+        
+        header = tuple(cell if cell != '' else None for cell in lines[0])
+        width = len(header)
+        columns = self._build_columns(header, width)
+        rows = [
+            tuple(None if cell in CSV_NA_VALUES else cell for cell in row[:width]) + (None,) * (width - len(row))
+            for row in lines[1:]
+        ]
+        return columns, rows
+    
+    def _read_table(self, file_path: str, sheet_name: str, warnings: List[str]) -> Tuple[List, List[tuple]]:
+        """按扩展名分派到对应的读取器，返回 (columns, rows)"""
+        reader = self._readers.get(Path(file_path).suffix.lower())
+        if reader is None:
+            raise ValueError(f"不支持的文件格式: {file_path}")
+        
+        # 不预先检查文件是否存在，打开失败时再确认原因（省去一次stat）
+        try:
+            return reader(file_path, sheet_name, warnings)
+        except OSError:
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"文件不存在: {file_path}")
+            raise
+    
+    def _table_to_records(self, columns: List, rows: List[tuple], 
+                          expected_columns: List[str], warnings: List[str]) -> List[Dict]:
+        """
+        标准化列名并将数据行直接构建为字典列表（只保留期望的列）
+        
+        Args:
+            columns: 原始列名
+            rows: 数据行
+            expected_columns: 期望的列名
+            warnings: 警告信息列表（原地追加）
+            
+        Returns:
+            字典列表，缺失值为None
+        """
+        # 尝试匹配列名
+        column_mapping = _match_columns(columns, expected_columns, warnings)
+        
+        # 重命名列（同名列以最后一列为准）
+        renamed = [column_mapping.get(col, col) for col in columns]
+        column_index = {name: idx for idx, name in enumerate(renamed)}
+        
+        # 检查必需列
+        missing_columns = set(expected_columns) - set(renamed)
+        if missing_columns:
+            raise ValueError(f"缺少必需列: {missing_columns}")
+        
+        # 删除空行
+        non_empty_rows = [row for row in rows if any(cell is not None for cell in row)]
+        if len(non_empty_rows) < len(rows):
+            warnings.append(f"删除了 {len(rows) - len(non_empty_rows)} 个空行")
+        
+        # 转换为字典列表
+        indices = [column_index[col] for col in expected_columns]
+        if indices == list(range(len(indices))):
+            # 期望列恰好按顺序位于最前面（标准模板）时直接按位置zip，多余的列被zip截断
+            return [dict(zip(expected_columns, row)) for row in non_empty_rows]
+        return [
+            {col: row[idx] for col, idx in zip(expected_columns, indices)}
+            for row in non_empty_rows
+        ]
     
     def read_ranking_from_excel(self, file_path: str, sheet_name: str = '偏好') -> Tuple[List[Dict], List[str]]:
         """
@@ -33,105 +513,29 @@ class DataIO:
         warnings = []
         
         try:
-            # 检查文件存在性
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"文件不存在: {file_path}")
-            
-            # 读取Excel文件
-            if file_path.lower().endswith(('.xlsx', '.xls')):
-                try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name)
-                except ValueError as e:
-                    if 'sheet' in str(e).lower():
-                        warnings.append(f"Sheet '{sheet_name}' 不存在，尝试读取第一个sheet")
-                        df = pd.read_excel(file_path, sheet_name=0)
-                    else:
-                        raise e
-                        
-            elif file_path.lower().endswith('.csv'):
-                # CSV文件处理
-                try:
-                    df = pd.read_csv(file_path, encoding='utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        df = pd.read_csv(file_path, encoding='gb2312')
-                        warnings.append("使用GB2312编码读取CSV文件")
-                    except UnicodeDecodeError:
-                        df = pd.read_csv(file_path, encoding='gbk')
-                        warnings.append("使用GBK编码读取CSV文件")
-            else:
-                raise ValueError(f"不支持的文件格式: {file_path}")
-            
-            # 检查和标准化列名 - ranking格式
+            # 读取文件并标准化列名 - ranking格式
             expected_columns = ['嘉宾类型', '编号', '对象1ID', '对象2ID']
-            actual_columns = df.columns.tolist()
-            
-            # 尝试匹配列名
-            column_mapping = {}
-            for expected in expected_columns:
-                found = False
-                for actual in actual_columns:
-                    if expected in str(actual) or str(actual) in expected:
-                        column_mapping[actual] = expected
-                        found = True
-                        break
-                
-                if not found:
-                    # 尝试按位置匹配
-                    if len(actual_columns) >= len(expected_columns):
-                        idx = expected_columns.index(expected)
-                        if idx < len(actual_columns):
-                            column_mapping[actual_columns[idx]] = expected
-                            warnings.append(f"按位置匹配列: {actual_columns[idx]} -> {expected}")
-            
-            # 重命名列
-            if column_mapping:
-                df = df.rename(columns=column_mapping)
-            
-            # 检查必需列
-            missing_columns = set(expected_columns) - set(df.columns)
-            if missing_columns:
-                raise ValueError(f"缺少必需列: {missing_columns}")
-            
-            # 删除空行
-            original_len = len(df)
-            df = df.dropna(how='all')
-            if len(df) < original_len:
-                warnings.append(f"删除了 {original_len - len(df)} 个空行")
-            
-            # 转换为字典列表
-            data = df[expected_columns].to_dict('records')
+            columns, rows = self._read_table(file_path, sheet_name, warnings)
+            data = self._table_to_records(columns, rows, expected_columns, warnings)
             
             # 清理数据
             cleaned_data = []
             for i, row in enumerate(data):
-                # 检查数据完整性
-                if pd.isna(row['嘉宾类型']) or pd.isna(row['编号']):
+                # 检查数据完整性（缺失值已在读取时统一为None，直接做身份比较）
+                guest_type = row['嘉宾类型']
+                guest_number = row['编号']
+                if guest_type is None or guest_number is None:
                     warnings.append(f"第{i+2}行基本信息不完整，已跳过")
                     continue
                 
                 # 类型转换
                 try:
-                    row['嘉宾类型'] = str(row['嘉宾类型']).strip()
-                    row['编号'] = int(float(row['编号']))  # 支持Excel中的浮点数格式
+                    row['嘉宾类型'] = str(guest_type).strip()
+                    row['编号'] = _to_int(guest_number)
                     
                     # 对象ID可以为空，如果不为空则保持原始格式（数字或参与者ID如M11、F3）
-                    for col in ['对象1ID', '对象2ID']:
-                        if pd.isna(row[col]) or str(row[col]).strip() == '':
-                            row[col] = ''
-                        else:
-                            col_str = str(row[col]).strip()
-                            # 检查是否是参与者ID格式（如M11, F3）或纯数字
-                            if col_str.startswith(('M', 'F')) and col_str[1:].isdigit():
-                                # 参与者ID格式，直接保留
-                                row[col] = col_str
-                            else:
-                                # 尝试作为数字处理
-                                try:
-                                    row[col] = int(float(col_str))
-                                except (ValueError, TypeError):
-                                    # 如果不能转换为数字，保留原始字符串给解析器处理
-                                    row[col] = col_str
+                    row['对象1ID'] = _normalize_target_id(row['对象1ID'])
+                    row['对象2ID'] = _normalize_target_id(row['对象2ID'])
                     
                     cleaned_data.append(row)
                 except (ValueError, TypeError) as e:
@@ -160,88 +564,27 @@ class DataIO:
         warnings = []
         
         try:
-            # 检查文件存在性
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"文件不存在: {file_path}")
-            
-            # 读取Excel文件
-            if file_path.lower().endswith(('.xlsx', '.xls')):
-                try:
-                    df = pd.read_excel(file_path, sheet_name=sheet_name)
-                except ValueError as e:
-                    if 'sheet' in str(e).lower():
-                        warnings.append(f"Sheet '{sheet_name}' 不存在，尝试读取第一个sheet")
-                        df = pd.read_excel(file_path, sheet_name=0)
-                    else:
-                        raise e
-                        
-            elif file_path.lower().endswith('.csv'):
-                # CSV文件处理
-                try:
-                    df = pd.read_csv(file_path, encoding='utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        df = pd.read_csv(file_path, encoding='gb2312')
-                        warnings.append("使用GB2312编码读取CSV文件")
-                    except UnicodeDecodeError:
-                        df = pd.read_csv(file_path, encoding='gbk')
-                        warnings.append("使用GBK编码读取CSV文件")
-            else:
-                raise ValueError(f"不支持的文件格式: {file_path}")
-            
-            # 检查和标准化列名
+            # 读取文件并标准化列名
             expected_columns = ['嘉宾类型', '编号', '偏好描述']
-            actual_columns = df.columns.tolist()
-            
-            # 尝试匹配列名
-            column_mapping = {}
-            for expected in expected_columns:
-                found = False
-                for actual in actual_columns:
-                    if expected in str(actual) or str(actual) in expected:
-                        column_mapping[actual] = expected
-                        found = True
-                        break
-                
-                if not found:
-                    # 尝试按位置匹配
-                    if len(actual_columns) >= len(expected_columns):
-                        idx = expected_columns.index(expected)
-                        if idx < len(actual_columns):
-                            column_mapping[actual_columns[idx]] = expected
-                            warnings.append(f"按位置匹配列: {actual_columns[idx]} -> {expected}")
-            
-            # 重命名列
-            if column_mapping:
-                df = df.rename(columns=column_mapping)
-            
-            # 检查必需列
-            missing_columns = set(expected_columns) - set(df.columns)
-            if missing_columns:
-                raise ValueError(f"缺少必需列: {missing_columns}")
-            
-            # 删除空行
-            original_len = len(df)
-            df = df.dropna(how='all')
-            if len(df) < original_len:
-                warnings.append(f"删除了 {original_len - len(df)} 个空行")
-            
-            # 转换为字典列表
-            data = df[expected_columns].to_dict('records')
+            columns, rows = self._read_table(file_path, sheet_name, warnings)
+            data = self._table_to_records(columns, rows, expected_columns, warnings)
             
             # 清理数据
             cleaned_data = []
             for i, row in enumerate(data):
-                # 检查数据完整性
-                if pd.isna(row['嘉宾类型']) or pd.isna(row['编号']) or pd.isna(row['偏好描述']):
+                # 检查数据完整性（缺失值已在读取时统一为None，直接做身份比较）
+                guest_type = row['嘉宾类型']
+                guest_number = row['编号']
+                description = row['偏好描述']
+                if guest_type is None or guest_number is None or description is None:
                     warnings.append(f"第{i+2}行数据不完整，已跳过")
                     continue
                 
                 # 类型转换
                 try:
-                    row['嘉宾类型'] = str(row['嘉宾类型']).strip()
-                    row['编号'] = int(float(row['编号']))  # 支持Excel中的浮点数格式
-                    row['偏好描述'] = str(row['偏好描述']).strip()
+                    row['嘉宾类型'] = str(guest_type).strip()
+                    row['编号'] = _to_int(guest_number)
+                    row['偏好描述'] = str(description).strip()
                     cleaned_data.append(row)
                 except (ValueError, TypeError) as e:
                     warnings.append(f"第{i+2}行数据格式错误: {str(e)}")
@@ -288,31 +631,27 @@ class DataIO:
             if privileged_info:
                 result_data["privileged_guests"] = privileged_info
             
-            for group_score in stats.group_scores:
-                group_data = {
+            # 每组数据用一个推导式构建（元组直接序列化为JSON数组，无需逐对复制成列表）
+            result_data["groups"] = [
+                {
                     "group_id": group_score.group_id,
                     "members": group_score.members,
                     "total_score": group_score.total_score,
                     "single_preferences_count": group_score.single_count,
-                    "mutual_preferences_count": group_score.mutual_count
+                    "mutual_preferences_count": group_score.mutual_count,
+                    **({
+                        "single_preferences": [{"from": src, "to": dst} for src, dst in group_score.single_preferences],
+                        "mutual_preferences": [{"members": pair} for pair in group_score.mutual_preferences]
+                    } if include_detailed_stats else {})
                 }
-                
-                if include_detailed_stats:
-                    group_data["single_preferences"] = [
-                        {"from": src, "to": dst} for src, dst in group_score.single_preferences
-                    ]
-                    group_data["mutual_preferences"] = [
-                        {"members": list(pair)} for pair in group_score.mutual_preferences
-                    ]
-                
-                result_data["groups"].append(group_data)
+                for group_score in stats.group_scores
+            ]
             
             # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            _ensure_dir(os.path.dirname(output_file))
             
             # 写入JSON文件
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result_data, f, ensure_ascii=False, indent=2)
+            dump_json(result_data, output_file)
             
         except Exception as e:
             raise Exception(f"导出JSON失败: {str(e)}")
@@ -326,45 +665,27 @@ class DataIO:
             output_file: 输出文件路径
         """
         try:
-            # 构建CSV数据
-            csv_data = []
+            # 确保输出目录存在
+            _ensure_dir(os.path.dirname(output_file))
             
-            for group_score in stats.group_scores:
-                # 构建成员字符串
-                members_str = ', '.join(group_score.members)
+            # 使用BOM确保中文正确显示；1MB写缓冲减少大文件的系统调用次数
+            with open(output_file, 'w', encoding='utf-8-sig', newline='', buffering=CSV_WRITE_BUFFER_SIZE) as f:
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(('组号', '成员', '总得分', '单向喜欢数', '互相喜欢数', '单向喜欢详情', '互相喜欢详情'))
                 
-                # 构建偏好关系字符串
-                single_prefs_str = '; '.join([f"{src}→{dst}" for src, dst in group_score.single_preferences])
-                mutual_prefs_str = '; '.join([f"{pair[0]}↔{pair[1]}" for pair in group_score.mutual_preferences])
+                # 逐组生成行并由writerows在C层迭代写出，不在内存中保留整张表
+                writer.writerows(map(_csv_group_row, stats.group_scores))
                 
-                csv_data.append({
-                    '组号': group_score.group_id,
-                    '成员': members_str,
-                    '总得分': group_score.total_score,
-                    '单向喜欢数': group_score.single_count,
-                    '互相喜欢数': group_score.mutual_count,
-                    '单向喜欢详情': single_prefs_str if single_prefs_str else '无',
-                    '互相喜欢详情': mutual_prefs_str if mutual_prefs_str else '无'
-                })
-            
-            # 添加汇总行
-            csv_data.append({
-                '组号': '汇总',
-                '成员': f'总计 {len(stats.group_scores)} 组',
-                '总得分': stats.total_score,
-                '单向喜欢数': stats.total_single_prefs,
-                '互相喜欢数': stats.total_mutual_prefs,
-                '单向喜欢详情': f'命中率: {stats.hit_rate_single:.1%}',
-                '互相喜欢详情': f'命中率: {stats.hit_rate_mutual:.1%}'
-            })
-            
-            # 创建DataFrame并导出
-            df = pd.DataFrame(csv_data)
-            
-            # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            
-            df.to_csv(output_file, index=False, encoding='utf-8-sig')  # 使用BOM确保中文正确显示
+                # 添加汇总行
+                writer.writerow((
+                    '汇总',
+                    f'总计 {len(stats.group_scores)} 组',
+                    float(stats.total_score),
+                    stats.total_single_prefs,
+                    stats.total_mutual_prefs,
+                    f'命中率: {stats.hit_rate_single:.1%}',
+                    f'命中率: {stats.hit_rate_mutual:.1%}'
+                ))
             
         except Exception as e:
             raise Exception(f"导出CSV失败: {str(e)}")
@@ -378,63 +699,45 @@ class DataIO:
             output_file: 输出文件路径
         """
         try:
-            # 创建Excel writer
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                # Sheet 1: 分组结果汇总
-                summary_data = []
-                for group_score in stats.group_scores:
-                    summary_data.append({
-                        '组号': group_score.group_id,
-                        '成员': ', '.join(group_score.members),
-                        '总得分': group_score.total_score,
-                        '单向喜欢数': group_score.single_count,
-                        '互相喜欢数': group_score.mutual_count
-                    })
-                
-                df_summary = pd.DataFrame(summary_data)
-                df_summary.to_excel(writer, sheet_name='分组汇总', index=False)
-                
-                # Sheet 2: 详细偏好关系
-                details_data = []
-                for group_score in stats.group_scores:
-                    # 单向喜欢
-                    for src, dst in group_score.single_preferences:
-                        details_data.append({
-                            '组号': group_score.group_id,
-                            '关系类型': '单向喜欢',
-                            '源': src,
-                            '目标': dst,
-                            '得分': 1.0
-                        })
-                    
-                    # 互相喜欢
-                    for pair in group_score.mutual_preferences:
-                        details_data.append({
-                            '组号': group_score.group_id,
-                            '关系类型': '互相喜欢',
-                            '源': pair[0],
-                            '目标': pair[1],
-                            '得分': stats.group_scores[0].total_score / max(1, len(stats.group_scores[0].single_preferences + stats.group_scores[0].mutual_preferences))  # 这里简化处理
-                        })
-                
-                if details_data:
-                    df_details = pd.DataFrame(details_data)
-                    df_details.to_excel(writer, sheet_name='偏好详情', index=False)
+            # 创建输出目录
+            _ensure_dir(os.path.dirname(output_file))
+            
+            # Sheet 1: 分组结果汇总 / Sheet 2: 详细偏好关系（一次遍历同时构建）
+            summary_rows = []
+            details_rows = []
+            if stats.group_scores:
+                # 互相喜欢的得分对所有行相同，只计算一次（这里简化处理）
+                first_group = stats.group_scores[0]
+                mutual_row_score = first_group.total_score / max(1, len(first_group.single_preferences + first_group.mutual_preferences))
+            
+            for group_score in stats.group_scores:
+                group_id = group_score.group_id
+                summary_rows.append((group_id, ', '.join(group_score.members), group_score.total_score,
+                                     group_score.single_count, group_score.mutual_count))
                 
-                # Sheet 3: 整体统计
-                stats_data = [
-                    {'指标': '总得分', '数值': stats.total_score},
-                    {'指标': '平均每组得分', '数值': stats.avg_group_score},
-                    {'指标': '单向喜欢命中数', '数值': stats.total_single_prefs},
-                    {'指标': '互相喜欢命中数', '数值': stats.total_mutual_prefs},
-                    {'指标': '单向喜欢命中率', '数值': f"{stats.hit_rate_single:.1%}"},
-                    {'指标': '互相喜欢命中率', '数值': f"{stats.hit_rate_mutual:.1%}"},
-                ]
+                # 单向喜欢
+                details_rows.extend((group_id, '单向喜欢', src, dst, 1.0) for src, dst in group_score.single_preferences)
                 
-                df_stats = pd.DataFrame(stats_data)
-                df_stats.to_excel(writer, sheet_name='整体统计', index=False)
+                # 互相喜欢
+                details_rows.extend((group_id, '互相喜欢', src, dst, mutual_row_score) for src, dst in group_score.mutual_preferences)
+            
+            sheets = [('分组汇总', ('组号', '成员', '总得分', '单向喜欢数', '互相喜欢数'), summary_rows)]
+            if details_rows:
+                sheets.append(('偏好详情', ('组号', '关系类型', '源', '目标', '得分'), details_rows))
+            
+            # Sheet 3: 整体统计
+            stats_rows = [
+                ('总得分', stats.total_score),
+                ('平均每组得分', stats.avg_group_score),
+                ('单向喜欢命中数', stats.total_single_prefs),
+                ('互相喜欢命中数', stats.total_mutual_prefs),
+                ('单向喜欢命中率', f"{stats.hit_rate_single:.1%}"),
+                ('互相喜欢命中率', f"{stats.hit_rate_mutual:.1%}"),
+            ]
+            sheets.append(('整体统计', ('指标', '数值'), stats_rows))
+            
+            # 逐行流式写入，不在内存中构建单元格网格
+            _write_workbook(output_file, sheets)
             
         except Exception as e:
             raise Exception(f"导出Excel失败: {str(e)}")
@@ -448,73 +751,64 @@ class DataIO:
         """
         try:
             # 示例数据
-            sample_data = [
-                {'嘉宾类型': '男', '编号': 1, '偏好描述': '1号男嘉宾喜欢3号、6号和9号女嘉宾。'},
-                {'嘉宾类型': '男', '编号': 2, '偏好描述': '2号男嘉宾偏好1号、5号和8号女嘉宾。'},
-                {'嘉宾类型': '男', '编号': 3, '偏好描述': '3号男嘉宾对2号和4号女嘉宾有好感。'},
-                {'嘉宾类型': '女', '编号': 1, '偏好描述': '1号女嘉宾喜欢4号和2号男嘉宾。'},
-                {'嘉宾类型': '女', '编号': 2, '偏好描述': '2号女嘉宾偏好6号、10号、3号男嘉宾。'},
-                {'嘉宾类型': '女', '编号': 3, '偏好描述': '3号女嘉宾对1号和10号男嘉宾有好感。'}
+            sample_rows = [
+                ('男', 1, '1号男嘉宾喜欢3号、6号和9号女嘉宾。'),
+                ('男', 2, '2号男嘉宾偏好1号、5号和8号女嘉宾。'),
+                ('男', 3, '3号男嘉宾对2号和4号女嘉宾有好感。'),
+                ('女', 1, '1号女嘉宾喜欢4号和2号男嘉宾。'),
+                ('女', 2, '2号女嘉宾偏好6号、10号、3号男嘉宾。'),
+                ('女', 3, '3号女嘉宾对1号和10号男嘉宾有好感。')
             ]
             
-            df = pd.DataFrame(sample_data)
-            
             # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='偏好', index=False)
-                
-                # 添加说明sheet
-                instructions = pd.DataFrame([
-                    {'说明': '本文件为相亲活动偏好数据示例'},
-                    {'说明': ''},
-                    {'说明': '列说明:'},
-                    {'说明': '嘉宾类型: 男 或 女'},
-                    {'说明': '编号: 1-12 的数字'},
-                    {'说明': '偏好描述: 中文自然语言描述偏好'},
-                    {'说明': ''},
-                    {'说明': '支持的表达方式:'},
-                    {'说明': '喜欢、偏好、中意、最想认识、希望同组、对...有好感、想和...同组'},
-                    {'说明': ''},
-                    {'说明': '支持的连接词:'},
-                    {'说明': '和、或、、（顿号）、，（逗号）、以及、还有、与'}
-                ])
-                
-                instructions.to_excel(writer, sheet_name='使用说明', index=False)
+            _ensure_dir(os.path.dirname(output_file))
+            
+            # 添加说明sheet
+            instructions = [
+                '本文件为相亲活动偏好数据示例',
+                '',
+                '列说明:',
+                '嘉宾类型: 男 或 女',
+                '编号: 1-12 的数字',
+                '偏好描述: 中文自然语言描述偏好',
+                '',
+                '支持的表达方式:',
+                '喜欢、偏好、中意、最想认识、希望同组、对...有好感、想和...同组',
+                '',
+                '支持的连接词:',
+                '和、或、、（顿号）、，（逗号）、以及、还有、与'
+            ]
+            _write_workbook(output_file, [
+                ('偏好', ('嘉宾类型', '编号', '偏好描述'), sample_rows),
+                ('使用说明', ('说明',), [(line,) for line in instructions])
+            ])
             
         except Exception as e:
             raise Exception(f"创建示例文件失败: {str(e)}")
     
-    def parse_first_round_results(self, file_path: str) -> Tuple[Set[Tuple[str, str]], List[str]]:
+    def parse_first_round_results(self, file_path: str) -> Tuple[FrozenSet[Tuple[str, str]], List[str]]:
         """
         解析第一轮结果文件，提取单向喜欢关系
         
+        解析结果按 (路径, 修改时间, 文件大小) 缓存，文件未变化时重复调用直接复用。
+        
         Args:
             file_path: 第一轮结果JSON文件路径
             
         Returns:
-            Tuple[Set[Tuple[str, str]], List[str]]: (单向喜欢关系集合, 警告信息)
+            Tuple[FrozenSet[Tuple[str, str]], List[str]]: (单向喜欢关系集合, 警告信息)
         """
         warnings = []
-        single_preferences = set()
+        single_preferences = frozenset()
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if 'groups' not in data:
-                warnings.append(f"文件 {file_path} 中未找到 'groups' 字段")
+            st = os.stat(file_path)
+            parsed, cached_warnings = _parse_first_round_cached(file_path, st.st_mtime_ns, st.st_size)
+            warnings.extend(cached_warnings)
+            if parsed is None:
                 return single_preferences, warnings
+            single_preferences = parsed
             
-            for group in data['groups']:
-                if 'single_preferences' in group:
-                    for pref in group['single_preferences']:
-                        if 'from' in pref and 'to' in pref:
-                            single_preferences.add((pref['from'], pref['to']))
-                        else:
-                            warnings.append(f"无效的单向喜欢格式: {pref}")
-                            
             print(f"✅ 从第一轮结果中解析出 {len(single_preferences)} 条单向喜欢关系")
             if warnings:
                 print(f"⚠️  解析警告: {len(warnings)} 条")
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+并行工具
+解析器与求解器共用的进程数换算
+"""
+
+import os
+from typing import Optional
+
+
+def resolve_n_jobs(n_jobs: Optional[int], num_tasks: int) -> int:
+    """
+    将 n_jobs 参数换算为实际进程数（与joblib约定一致）
+    
+    Args:
+        n_jobs: None表示使用一半CPU核心；负数表示 cpu_count + 1 + n_jobs（-1即全部核心）
+        num_tasks: 任务数量，进程数不会超过该值
+        
+    Returns:
+        实际进程数（至少为1）
+    """
+    cpu_count = os.cpu_count() or 1
+    if n_jobs is None:
+        n_jobs = cpu_count // 2
+    elif n_jobs < 0:
+        n_jobs = cpu_count + 1 + n_jobs
+    return max(1, min(n_jobs, num_tasks))
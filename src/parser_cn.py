@@ -6,18 +6,174 @@
 
 import re
 import warnings
-from typing import List, Tuple, Dict, Set, Optional
+from typing import List, Tuple, Dict, Set, Optional, Sequence, Iterable, Iterator
 from dataclasses import dataclass
 
+# 偏好文本解析结果缓存的最大条目数
+PARSE_CACHE_SIZE = 4096
+
+# 行数不少于该值时才并行解析（进程启动和数据序列化的开销需要足够的行数摊薄）
+PARALLEL_PARSE_MIN_ROWS = 2000
+
+# 不超过该长度的文本直接用正则检查通配偏好动词（回溯开销可忽略），更长的文本改用线性查找
+WILDCARD_REGEX_MAX_TEXT_LEN = 256
+
+# 嘉宾类型 -> 本人ID前缀 / 异性目标ID前缀（调用前嘉宾类型已校验为 '男' 或 '女'）
+_SUBJECT_PREFIX = {'男': 'M', '女': 'F'}
+_TARGET_PREFIX = {'男': 'F', '女': 'M'}
+
+
+class ParseWarnings(Sequence):
+    """
+    按行收集的解析警告（延迟格式化）
+    
+    每条警告记录为 (行下标, 消息模板, 参数)，只有在读取时才渲染为 "第N行: 消息"，
+    只统计数量或只显示前几条时不必格式化全部警告。读取结果与字符串列表一致。
+    """
+    
+    __slots__ = ('_records',)
+    
+    def __init__(self):
+        self._records: List[Tuple[int, str, tuple]] = []
+    
+    def add(self, row_idx: int, template: str, *args):
+        """添加一条警告：template 使用 {} 占位，按 str.format 渲染"""
+        self._records.append((row_idx, template, args))
+    
+    def merge(self, other: 'ParseWarnings', row_offset: int):
+        """追加另一批警告（如并行解析的分块结果），行下标整体偏移row_offset"""
+        self._records.extend((row_idx + row_offset, template, args) for row_idx, template, args in other._records)
+    
+    @staticmethod
+    def _render(record: Tuple[int, str, tuple]) -> str:
+        row_idx, template, args = record
+        return f"第{row_idx+1}行: {template.format(*args)}"
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._render(record) for record in self._records[index]]
+        return self._render(self._records[index])
+    
+    def __iter__(self):
+        return map(self._render, self._records)
+    
+    def __eq__(self, other):
+        if isinstance(other, (ParseWarnings, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return repr(list(self))
+
 
 @dataclass
 class ParseResult:
     """解析结果"""
     edges: List[Tuple[str, str]]  # 有向边列表 [(src, dst), ...]
-    warnings: List[str]  # 解析警告
+    warnings: Sequence[str]  # 解析警告（ParseWarnings，按需格式化）
     raw_data: List[Dict]  # 原始数据记录
 
 
+def build_participant_ids(max_male_id: int, max_female_id: int) -> Dict[Tuple[str, int], str]:
+    """
+    构建参与者ID查找表
+    
+    解析器输出的参与者ID都从该表取出，不再逐行拼接字符串；同一ID在所有边中共享一个字符串对象，
+    下游按ID建索引时哈希值只计算一次。
+    
+    Args:
+        max_male_id: 最大男性ID编号
+        max_female_id: 最大女性ID编号
+        
+    Returns:
+        (性别前缀 'M'/'F', 编号) -> 参与者ID（如 'M3'）
+    """
+    participant_ids = {('M', i): f"M{i}" for i in range(1, max_male_id + 1)}
+    participant_ids.update({('F', i): f"F{i}" for i in range(1, max_female_id + 1)})
+    return participant_ids
+
+
+# 工作进程中的解析器实例（由进程池initializer设置，避免每个分块重复序列化）
+_worker_parser = None
+
+
+def _init_parse_worker(parser):
+    """进程池initializer：保存解析器实例"""
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _parse_chunk_worker(chunk: List[Dict]):
+    """在工作进程中解析一块数据行；原始数据不回传，由主进程填充"""
+    result = _worker_parser.parse_all_preferences(chunk)
+    result.raw_data = None
+    return result
+
+
+def parse_in_chunks(parser, data: List[Dict], n_jobs: Optional[int]) -> Optional[List[Tuple[int, object]]]:
+    """
+    将数据行切成连续分块，用进程池并行调用 parser.parse_all_preferences
+    
+    Args:
+        parser: 解析器实例（需可pickle）
+        data: 数据行
+        n_jobs: 并行进程数（1为串行，None为一半CPU核心，负数同joblib约定）
+        
+    Returns:
+        [(分块起始行下标, 分块解析结果), ...]，按行顺序排列；
+        行数不足 PARALLEL_PARSE_MIN_ROWS 或只有一个进程时返回None，由调用方串行解析
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from .parallel import resolve_n_jobs
+    
+    if len(data) < PARALLEL_PARSE_MIN_ROWS:
+        return None
+    n_jobs = resolve_n_jobs(n_jobs, len(data))
+    if n_jobs <= 1:
+        return None
+    
+    chunk_size = -(-len(data) // n_jobs)
+    offsets = list(range(0, len(data), chunk_size))
+    with ProcessPoolExecutor(max_workers=n_jobs,
+                             initializer=_init_parse_worker,
+                             initargs=(parser,)) as executor:
+        results = list(executor.map(_parse_chunk_worker, [data[start:start + chunk_size] for start in offsets]))
+    return list(zip(offsets, results))
+
+
+def _contains_in_order(text: str, parts: List[str]) -> bool:
+    """
+    检查同一行内是否依次出现parts中的所有片段
+    
+    等价于正则 "p0.*p1.*..." 的search（"."不匹配换行），但每行只从第一个p0开始贪心查找，
+    文本中大量出现p0时也是线性时间。
+    """
+    head = parts[0]
+    start = text.find(head)
+    while start >= 0:
+        line_end = text.find('\n', start)
+        if line_end < 0:
+            line_end = len(text)
+        
+        pos = start + len(head)
+        for part in parts[1:]:
+            pos = text.find(part, pos, line_end)
+            if pos < 0:
+                break
+            pos += len(part)
+        else:
+            return True
+        
+        # 本行不匹配，跳到下一行的第一个p0
+        start = text.find(head, line_end + 1)
+    return False
+
+
 class ChinesePreferenceParser:
     """中文偏好解析器"""
     
@@ -43,6 +199,11 @@ class ChinesePreferenceParser:
         # 连接词模式
         self.connectors = ['和', '或', '、', '，', ',', '以及', '还有', '与']
         
+        # 偏好文本解析缓存：(文本, 主体性别) -> (目标ID元组, 警告元组)
+        self._parse_cache: Dict[Tuple[str, str], Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+        # 参与者ID查找表 self._participant_ids、有效ID集合 self._valid_ids（validate_edges使用）
+        # 和 ID前缀 -> 最大编号 表 self._max_id_by_prefix 随缓存一起在 clear_parse_cache 中按当前最大编号构建
+        
         # 编译正则表达式
         self._compile_patterns()
     
@@ -51,24 +212,51 @@ class ChinesePreferenceParser:
         # 主体匹配：如"1号男嘉宾"
         self.subject_pattern = re.compile(r'(\d+)号([男女])嘉宾')
         
-        # 目标编号匹配：如"3号、6号和9号女嘉宾"
-        self.target_pattern = re.compile(r'(\d+)号')
-        
-        # 性别识别
-        self.gender_pattern = re.compile(r'([男女])嘉宾')
+        # 目标编号与性别一次扫描：如"3号、6号和9号女嘉宾"
+        # 每个匹配为 (编号, '') 或 ('', 性别)；两种片段不会重叠，结果与分别findall一致
+        self.target_gender_pattern = re.compile(r'(\d+)号|([男女])嘉宾')
         
         # 偏好动词模式
         preference_pattern = '|'.join(self.preference_verbs)
         self.preference_pattern = re.compile(f'({preference_pattern})')
         
+        # 偏好动词检测拆成两级：
+        # 1. 不含正则元字符的动词合并为一个纯字面量正则，绝大多数描述在这一步命中
+        # 2. 其余动词（如"对.*有好感"）只在第1步未命中时检查；短文本直接用正则，
+        #    长文本改为按字面量片段顺序查找，避免 ".*" 回溯导致的 O(N²)
+        literal_verbs = [verb for verb in self.preference_verbs if re.escape(verb) == verb]
+        wildcard_verbs = [verb for verb in self.preference_verbs if re.escape(verb) != verb]
+        self._literal_verb_pattern = re.compile('|'.join(literal_verbs)) if literal_verbs else None
+        self._wildcard_verb_pattern = re.compile('|'.join(wildcard_verbs)) if wildcard_verbs else None
+        
+        # 能拆成纯字面量片段的通配动词才能走线性查找，否则长文本也只能用正则
+        parts_list = [verb.split('.*') for verb in wildcard_verbs]
+        if all(part and re.escape(part) == part for parts in parts_list for part in parts):
+            self._wildcard_verb_parts = parts_list
+        else:
+            self._wildcard_verb_parts = None
+        
         # 连接词模式
         connector_pattern = '|'.join(re.escape(c) for c in self.connectors)
         self.connector_pattern = re.compile(f'({connector_pattern})')
+        
+        # 模式变化后旧的解析结果失效
+        self.clear_parse_cache()
+    
+    def clear_parse_cache(self):
+        """清空偏好文本解析缓存并按当前最大编号重建参与者ID表（修改最大编号等设置后需要调用）"""
+        self._parse_cache.clear()
+        self._participant_ids = build_participant_ids(self.max_male_id, self.max_female_id)
+        self._valid_ids = frozenset(self._participant_ids.values())
+        self._max_id_by_prefix = {'M': self.max_male_id, 'F': self.max_female_id}
     
     def parse_preference_text(self, text: str, subject_id: int, subject_gender: str) -> Tuple[List[str], List[str]]:
         """
         解析偏好文本
         
+        结果只取决于文本和主体性别（自我指向由调用方过滤），按 (text, subject_gender) 缓存，
+        套用同一模板的重复描述不再重复解析。
+        
         Args:
             text: 偏好描述文本
             subject_id: 主体编号
@@ -77,46 +265,57 @@ class ChinesePreferenceParser:
         Returns:
             (target_ids, warnings): 目标ID列表和警告信息
         """
+        if type(text) is not str:
+            return self._parse_preference_text(text, subject_gender)
+        
+        key = (text, subject_gender)
+        cached = self._parse_cache.get(key)
+        if cached is None:
+            target_ids, warnings_list = self._parse_preference_text(text, subject_gender)
+            cached = (tuple(target_ids), tuple(warnings_list))
+            # 超过上限时FIFO淘汰最早加入的条目
+            if len(self._parse_cache) >= PARSE_CACHE_SIZE:
+                del self._parse_cache[next(iter(self._parse_cache))]
+            self._parse_cache[key] = cached
+        
+        return list(cached[0]), list(cached[1])
+    
+    def _parse_preference_text(self, text: str, subject_gender: str) -> Tuple[List[str], List[str]]:
+        """解析偏好文本（不经过缓存），返回 (target_ids, warnings)"""
         warnings_list = []
         target_ids = []
         
         try:
             # 1. 检查是否包含偏好动词
-            if not self.preference_pattern.search(text):
+            if not self._has_preference_verb(text):
                 warnings_list.append(f"未找到偏好动词: {text}")
                 return target_ids, warnings_list
             
-            # 2. 提取所有数字编号
-            number_matches = self.target_pattern.findall(text)
+            # 2. 一次扫描同时提取数字编号和性别指示
+            matches = self.target_gender_pattern.findall(text)
+            number_matches = [num for num, _ in matches if num]
             if not number_matches:
                 warnings_list.append(f"未找到目标编号: {text}")
                 return target_ids, warnings_list
             
             # 3. 推断目标性别
-            target_gender = self._infer_target_gender(text, subject_gender)
+            target_gender = self._infer_target_gender([gender for _, gender in matches if gender], subject_gender)
             if not target_gender:
                 warnings_list.append(f"无法推断目标性别: {text}")
                 return target_ids, warnings_list
             
-            # 4. 构建目标ID列表
-            gender_prefix = 'M' if target_gender == '男' else 'F'
+            # 4. 构建目标ID列表并验证编号范围（所有目标同一性别，最大编号只取一次）
+            gender_prefix = _SUBJECT_PREFIX[target_gender]
+            max_id = self._max_id_by_prefix[gender_prefix]
             for num in number_matches:
                 target_id = f"{gender_prefix}{num}"
-                target_ids.append(target_id)
-            
-            # 5. 验证编号范围
-            valid_targets = []
-            for target_id in target_ids:
-                num = int(target_id[1:])
-                gender_prefix = target_id[0]
-                max_id = self.max_male_id if gender_prefix == 'M' else self.max_female_id
-                
-                if 1 <= num <= max_id:
-                    valid_targets.append(target_id)
+                target_num = int(num)
+                if 1 <= target_num <= max_id:
+                    # 规范写法的编号改用查找表中的共享ID（'03'等非规范写法保持原样）
+                    canonical_id = self._participant_ids[gender_prefix, target_num]
+                    target_ids.append(canonical_id if canonical_id == target_id else target_id)
                 else:
-                    warnings_list.append(f"编号超出范围: {target_id} (最大{gender_prefix}{'男' if gender_prefix == 'M' else '女'}ID: {max_id})")
-            
-            target_ids = valid_targets
+                    warnings_list.append(f"编号超出范围: {target_id} (最大{gender_prefix}{target_gender}ID: {max_id})")
             
         except Exception as e:
             warnings_list.append(f"解析异常: {text}, 错误: {str(e)}")
@@ -124,27 +323,35 @@ class ChinesePreferenceParser:
         
         return target_ids, warnings_list
     
-    def _infer_target_gender(self, text: str, subject_gender: str) -> Optional[str]:
-        """推断目标性别"""
-        # 直接从文本中查找性别指示
-        gender_matches = self.gender_pattern.findall(text)
+    def _has_preference_verb(self, text: str) -> bool:
+        """检查文本中是否包含偏好动词（与 preference_pattern.search 等价）"""
+        if self._literal_verb_pattern is not None and self._literal_verb_pattern.search(text):
+            return True
+        if self._wildcard_verb_pattern is None:
+            return False
+        
+        if self._wildcard_verb_parts is None or len(text) <= WILDCARD_REGEX_MAX_TEXT_LEN:
+            return self._wildcard_verb_pattern.search(text) is not None
+        return any(_contains_in_order(text, parts) for parts in self._wildcard_verb_parts)
+    
+    def _infer_target_gender(self, gender_matches: List[str], subject_gender: str) -> Optional[str]:
+        """
+        推断目标性别
+        
+        Args:
+            gender_matches: 文本中按出现顺序提取的性别指示（"男嘉宾"/"女嘉宾"中的性别）
+            subject_gender: 主体性别 ('男' 或 '女')
+        """
+        # 直接使用文本中的性别指示（按首次出现顺序去重；性别只有两种，次数不影响结果）
         if gender_matches:
-            # 计算每种性别出现的次数
-            gender_counts = {}
-            for gender in gender_matches:
-                gender_counts[gender] = gender_counts.get(gender, 0) + 1
+            genders = dict.fromkeys(gender_matches)
             
             # 如果只有一种性别，直接返回
-            if len(gender_counts) == 1:
-                return list(gender_counts.keys())[0]
+            if len(genders) == 1:
+                return gender_matches[0]
             
             # 如果有多种性别，优先选择非主体性别（目标更可能是异性）
-            for gender in gender_counts:
-                if gender != subject_gender:
-                    return gender
-            
-            # 如果都是同性，返回出现次数最多的
-            return max(gender_counts.items(), key=lambda x: x[1])[0]
+            return next(gender for gender in genders if gender != subject_gender)
         
         # 如果没有明确指示，根据常理推断（异性恋假设）
         if subject_gender == '男':
@@ -154,51 +361,38 @@ class ChinesePreferenceParser:
         
         return None
     
-    def parse_all_preferences(self, data: List[Dict]) -> ParseResult:
-        """
-        解析所有偏好数据
-        
-        Args:
-            data: 包含偏好数据的字典列表，每个字典包含：
-                  - '嘉宾类型': '男' 或 '女'
-                  - '编号': 数字ID
-                  - '偏好描述': 中文偏好文本
-        
-        Returns:
-            ParseResult: 解析结果
-        """
-        all_edges = []
-        all_warnings = []
-        
-        for i, row in enumerate(data):
+    def _iter_row_edges(self, rows: Iterable[Tuple], all_warnings: ParseWarnings) -> Iterator[Tuple[str, str]]:
+        """按 (嘉宾类型, 编号, 偏好描述) 逐行解析并产出有向边，警告写入 all_warnings"""
+        participant_ids = self._participant_ids
+        max_id_by_prefix = self._max_id_by_prefix
+        for i, (guest_type, guest_id, preference_text) in enumerate(rows):
             try:
                 # 获取基本信息
-                guest_type = row.get('嘉宾类型', '').strip()
-                guest_id = row.get('编号', '')
-                preference_text = row.get('偏好描述', '').strip()
+                guest_type = guest_type.strip()
+                preference_text = preference_text.strip()
                 
                 # 验证数据完整性
                 if not guest_type or guest_type not in ['男', '女']:
-                    all_warnings.append(f"第{i+1}行: 嘉宾类型无效: {guest_type}")
+                    all_warnings.add(i, "嘉宾类型无效: {}", guest_type)
                     continue
                 
                 if not isinstance(guest_id, (int, str)) or not str(guest_id).isdigit():
-                    all_warnings.append(f"第{i+1}行: 编号无效: {guest_id}")
+                    all_warnings.add(i, "编号无效: {}", guest_id)
                     continue
                 
                 if not preference_text:
-                    all_warnings.append(f"第{i+1}行: 偏好描述为空")
+                    all_warnings.add(i, "偏好描述为空")
                     continue
                 
                 guest_id = int(guest_id)
-                max_id = self.max_male_id if guest_type == '男' else self.max_female_id
+                subject_prefix = _SUBJECT_PREFIX[guest_type]
+                max_id = max_id_by_prefix[subject_prefix]
                 if not (1 <= guest_id <= max_id):
-                    all_warnings.append(f"第{i+1}行: 编号超出范围: {guest_id} (最大{guest_type}ID: {max_id})")
+                    all_warnings.add(i, "编号超出范围: {} (最大{}ID: {})", guest_id, guest_type, max_id)
                     continue
                 
                 # 构建主体ID
-                subject_prefix = 'M' if guest_type == '男' else 'F'
-                subject_id = f"{subject_prefix}{guest_id}"
+                subject_id = participant_ids[subject_prefix, guest_id]
                 
                 # 解析偏好
                 target_ids, parse_warnings = self.parse_preference_text(
@@ -207,19 +401,68 @@ class ChinesePreferenceParser:
                 
                 # 添加警告信息
                 for warning in parse_warnings:
-                    all_warnings.append(f"第{i+1}行: {warning}")
+                    all_warnings.add(i, "{}", warning)
                 
                 # 构建有向边
                 for target_id in target_ids:
                     # 避免自我指向
                     if subject_id != target_id:
-                        all_edges.append((subject_id, target_id))
+                        yield subject_id, target_id
                     else:
-                        all_warnings.append(f"第{i+1}行: 忽略自我指向: {subject_id}")
+                        all_warnings.add(i, "忽略自我指向: {}", subject_id)
                         
             except Exception as e:
-                all_warnings.append(f"第{i+1}行: 处理异常: {str(e)}")
+                all_warnings.add(i, "处理异常: {}", str(e))
                 continue
+    
+    def parse_all_preferences(self, data: List[Dict]) -> ParseResult:
+        """
+        解析所有偏好数据
+        
+        Args:
+            data: 包含偏好数据的字典列表，每个字典包含：
+                  - '嘉宾类型': '男' 或 '女'
+                  - '编号': 数字ID
+                  - '偏好描述': 中文偏好文本
+        
+        Returns:
+            ParseResult: 解析结果
+        """
+        all_warnings = ParseWarnings()
+        
+        # 先把各列取成平行列表，循环内按位置直接取值
+        guest_types = [row.get('嘉宾类型', '') for row in data]
+        guest_ids = [row.get('编号', '') for row in data]
+        preference_texts = [row.get('偏好描述', '') for row in data]
+        all_edges = list(self._iter_row_edges(zip(guest_types, guest_ids, preference_texts), all_warnings))
+        
+        return ParseResult(
+            edges=all_edges,
+            warnings=all_warnings,
+            raw_data=data
+        )
+    
+    def parse_all_preferences_parallel(self, data: List[Dict], n_jobs: Optional[int] = None) -> ParseResult:
+        """
+        多进程解析所有偏好数据，结果（边的顺序、警告及其行号）与 parse_all_preferences 一致
+        
+        Args:
+            data: 同 parse_all_preferences
+            n_jobs: 并行进程数（1为串行，None为一半CPU核心，负数同joblib约定）；
+                    行数较少时自动串行
+        
+        Returns:
+            ParseResult: 解析结果
+        """
+        chunks = parse_in_chunks(self, data, n_jobs)
+        if chunks is None:
+            return self.parse_all_preferences(data)
+        
+        all_edges = []
+        all_warnings = ParseWarnings()
+        for offset, result in chunks:
+            all_edges.extend(result.edges)
+            all_warnings.merge(result.warnings, offset)
         
         return ParseResult(
             edges=all_edges,
@@ -240,10 +483,7 @@ class ChinesePreferenceParser:
         valid_edges = []
         warnings_list = []
         
-        # 定义有效ID集合
-        valid_male_ids = {f"M{i}" for i in range(1, self.max_male_id + 1)}
-        valid_female_ids = {f"F{i}" for i in range(1, self.max_female_id + 1)}
-        valid_ids = valid_male_ids | valid_female_ids
+        valid_ids = self._valid_ids
         
         for src, dst in edges:
             # 检查ID有效性
@@ -255,8 +495,8 @@ class ChinesePreferenceParser:
                 continue
             
             # 检查是否为异性（如果需要的话）
-            src_gender = 'M' if src.startswith('M') else 'F'
-            dst_gender = 'M' if dst.startswith('M') else 'F'
+            src_gender = src[0]
+            dst_gender = dst[0]
             
             # 这里不强制异性恋假设，允许同性偏好
             valid_edges.append((src, dst))
@@ -4,17 +4,33 @@ Ranking格式偏好解析器
 用于解析新的ranking格式输入数据（对象1ID, 对象2ID）
 """
 
-from typing import List, Tuple, Dict, Set, Optional
+from typing import List, Tuple, Dict, Optional, Sequence, Iterable, Iterator
 from dataclasses import dataclass
+import re
 import warnings
 
+from .parser_cn import ParseWarnings, build_participant_ids, parse_in_chunks
+
+# int() 可以解析的十进制整数文本（可带正负号和数字间下划线），用于免异常地判断对象ID格式
+_INT_MATCH = re.compile(r'[+-]?\d+(?:_\d+)*').fullmatch
+
+# 对象ID解析缓存的最大条目数
+TARGET_CACHE_SIZE = 4096
+
+# 主体（嘉宾类型, 编号）解析缓存的最大条目数
+SUBJECT_CACHE_SIZE = 1024
+
+# 嘉宾类型 -> 本人ID前缀 / 异性目标ID前缀（调用前嘉宾类型已校验为 '男' 或 '女'）
+_SUBJECT_PREFIX = {'男': 'M', '女': 'F'}
+_TARGET_PREFIX = {'男': 'F', '女': 'M'}
+
 
 @dataclass
 class RankingParseResult:
     """Ranking解析结果"""
     weighted_edges: List[Tuple[str, str, float]]  # (src, dst, weight) 加权边列表
     edges: List[Tuple[str, str]]  # 传统的无权边列表（兼容性）
-    warnings: List[str]  # 解析警告
+    warnings: Sequence[str]  # 解析警告（ParseWarnings，按需格式化）
     raw_data: List[Dict]  # 原始数据记录
 
 
@@ -36,145 +52,234 @@ class RankingPreferenceParser:
         self.second_preference_weight = second_preference_weight
         self.max_male_id = max_male_id
         self.max_female_id = max_female_id
+        
+        # 对象ID解析缓存：(单元格文本, 列名, 嘉宾类型) -> (target_id, warning)
+        self._target_cache: Dict[Tuple[str, str, str], Tuple[Optional[str], Optional[str]]] = {}
+        # 主体解析缓存：(嘉宾类型, 编号) -> (去空白的嘉宾类型, subject_id, 警告模板, 警告参数)
+        self._subject_cache: Dict[Tuple[str, object], Tuple[str, Optional[str], Optional[str], tuple]] = {}
+        
+        # 参与者ID查找表：输出的ID取自该表，同一ID共享一个字符串对象
+        self._participant_ids = build_participant_ids(max_male_id, max_female_id)
+        # ID前缀 -> 最大编号
+        self._max_id_by_prefix = {'M': max_male_id, 'F': max_female_id}
     
-    def parse_all_preferences(self, data: List[Dict]) -> RankingParseResult:
+    def clear_parse_cache(self):
+        """清空对象ID和主体解析缓存并重建参与者ID表（修改最大编号设置后需要调用）"""
+        self._target_cache.clear()
+        self._subject_cache.clear()
+        self._participant_ids = build_participant_ids(self.max_male_id, self.max_female_id)
+        self._max_id_by_prefix = {'M': self.max_male_id, 'F': self.max_female_id}
+    
+    def _resolve_subject(self, guest_type, guest_id) -> Tuple[str, Optional[str], Optional[str], tuple]:
         """
-        解析所有ranking偏好数据
+        校验嘉宾类型和编号并构建主体ID（str/int单元格带缓存）
+        
+        嘉宾类型和编号的组合只有少量不同取值，按 (嘉宾类型, 编号) 缓存校验结果，
+        循环内不再逐行重复 strip/isdigit/int 和拼接主体ID。异常不缓存，由调用方按行记录。
+        
+        Returns:
+            (guest_type, subject_id, template, args): 校验通过时template为None，
+            失败时subject_id为None，template/args为警告模板及参数
+        """
+        if type(guest_type) is not str or type(guest_id) not in (int, str):
+            return self._resolve_subject_uncached(guest_type, guest_id)
+        key = (guest_type, guest_id)
+        cached = self._subject_cache.get(key)
+        if cached is None:
+            cached = self._resolve_subject_uncached(guest_type, guest_id)
+            # 超过上限时FIFO淘汰最早加入的条目
+            if len(self._subject_cache) >= SUBJECT_CACHE_SIZE:
+                del self._subject_cache[next(iter(self._subject_cache))]
+            self._subject_cache[key] = cached
+        return cached
+    
+    def _resolve_subject_uncached(self, guest_type, guest_id) -> Tuple[str, Optional[str], Optional[str], tuple]:
+        """校验嘉宾类型和编号（不经过缓存），返回值同 _resolve_subject"""
+        guest_type = guest_type.strip()
+        
+        # 验证嘉宾类型
+        if not guest_type or guest_type not in ['男', '女']:
+            return guest_type, None, "嘉宾类型无效: {}", (guest_type,)
+        
+        # 验证嘉宾编号
+        if not isinstance(guest_id, (int, str)) or not str(guest_id).isdigit():
+            return guest_type, None, "编号无效: {}", (guest_id,)
+        
+        guest_id = int(guest_id)
+        subject_prefix = _SUBJECT_PREFIX[guest_type]
+        max_id = self._max_id_by_prefix[subject_prefix]
+        if not (1 <= guest_id <= max_id):
+            return guest_type, None, "编号超出范围: {} (最大{}ID: {})", (guest_id, guest_type, max_id)
+        
+        # 构建主体ID
+        return guest_type, self._participant_ids[subject_prefix, guest_id], None, ()
+    
+    def _resolve_target(self, obj_str, label: str, guest_type: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        将对象ID单元格解析为目标参与者ID（带缓存）
+        
+        对象ID只有少量不同取值，按 (单元格值, 列名, 嘉宾类型) 缓存解析结果。
         
         Args:
-            data: 包含ranking偏好数据的字典列表，每个字典包含：
-                  - '嘉宾类型': '男' 或 '女'
-                  - '编号': 数字ID
-                  - '对象1ID': 第一偏好的异性ID
-                  - '对象2ID': 第二偏好的异性ID
+            obj_str: 去掉首尾空白后的对象ID文本（纯数字或M11、F3形式），
+                     或int单元格本身（命中缓存时不必先转成字符串）
+            label: 列名（'对象1ID' 或 '对象2ID'），用于警告信息
+            guest_type: 主体嘉宾类型 ('男' 或 '女')
+            
+        Returns:
+            (target_id, warning): 解析成功时warning为None，失败时target_id为None
+        """
+        key = (obj_str, label, guest_type)
+        cached = self._target_cache.get(key)
+        if cached is None:
+            cached = self._resolve_target_uncached(str(obj_str), label, guest_type)
+            # 超过上限时FIFO淘汰最早加入的条目
+            if len(self._target_cache) >= TARGET_CACHE_SIZE:
+                del self._target_cache[next(iter(self._target_cache))]
+            self._target_cache[key] = cached
+        return cached
+    
+    def _resolve_cell(self, obj_id, label: str, guest_type: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        解析一个对象ID单元格（对象1ID和对象2ID共用）
+        
+        int单元格（CSV/Excel中最常见）直接作为缓存键，其余单元格转为去空白的文本；
+        空单元格（含0）视为未填写。
         
         Returns:
-            RankingParseResult: 解析结果
+            (target_id, warning): 同 _resolve_target；未填写时均为None
         """
-        all_weighted_edges = []
-        all_edges = []
-        all_warnings = []
+        obj_key = obj_id if type(obj_id) is int else (obj_id and str(obj_id).strip())
+        if not obj_key:
+            return None, None
+        return self._resolve_target(obj_key, label, guest_type)
+    
+    def _resolve_target_uncached(self, obj_str: str, label: str, guest_type: str) -> Tuple[Optional[str], Optional[str]]:
+        """解析对象ID（不经过缓存），返回 (target_id, warning)"""
+        # 检查是否已经是完整的参与者ID格式（如M11, F3等）
+        if obj_str.startswith(('M', 'F')) and obj_str[1:].isdigit():
+            target_num = int(obj_str[1:])
+            target_gender = obj_str[0]
+            max_target_id = self._max_id_by_prefix[target_gender]
+            
+            if not (1 <= target_num <= max_target_id):
+                return None, f"{label}编号超出范围: {obj_str} (最大{target_gender}ID: {max_target_id})"
+            
+            # 检查性别是否正确（男嘉宾只能选女嘉宾）
+            if (guest_type == '男' and target_gender == 'F') or (guest_type == '女' and target_gender == 'M'):
+                # 规范写法改用查找表中的共享ID（M03等非规范写法保持原样）
+                canonical_id = self._participant_ids[target_gender, target_num]
+                return (canonical_id if canonical_id == obj_str else obj_str), None
+            return None, f"{label}性别不匹配: {guest_type}嘉宾不能选择{obj_str}"
+        
+        # 尝试作为纯数字ID处理，目标性别按异性推断；先用正则判断格式，避免异常驱动的控制流
+        target_prefix = _TARGET_PREFIX[guest_type]
+        if not _INT_MATCH(obj_str):
+            return None, f"{label}格式错误: {obj_str}"
+        try:
+            obj_num = int(obj_str)
+        except ValueError:  # 位数超过整数字符串转换上限（sys.get_int_max_str_digits）
+            return None, f"{label}格式错误: {obj_str}"
         
-        for i, row in enumerate(data):
+        max_target_id = self._max_id_by_prefix[target_prefix]
+        if 1 <= obj_num <= max_target_id:
+            return self._participant_ids[target_prefix, obj_num], None
+        return None, f"{label}超出范围: {obj_num} (最大{target_prefix}ID: {max_target_id})"
+    
+    def _iter_row_edges(self, rows: Iterable[Tuple], all_warnings: ParseWarnings) -> Iterator[Tuple[str, str, float]]:
+        """按 (嘉宾类型, 编号, 对象1ID, 对象2ID) 逐行解析并产出加权边，警告写入 all_warnings"""
+        resolve_subject = self._resolve_subject
+        resolve_cell = self._resolve_cell
+        first_weight = self.first_preference_weight
+        second_weight = self.second_preference_weight
+        for i, (guest_type, guest_id, obj1_id, obj2_id) in enumerate(rows):
             try:
-                # 获取基本信息
-                guest_type = row.get('嘉宾类型', '').strip()
-                guest_id = row.get('编号', '')
-                obj1_id = row.get('对象1ID', '')  # 第一偏好
-                obj2_id = row.get('对象2ID', '')  # 第二偏好
-                
-                # 验证嘉宾类型
-                if not guest_type or guest_type not in ['男', '女']:
-                    all_warnings.append(f"第{i+1}行: 嘉宾类型无效: {guest_type}")
+                # 验证嘉宾类型和编号，构建主体ID
+                guest_type, subject_id, template, args = resolve_subject(guest_type, guest_id)
+                if template is not None:
+                    all_warnings.add(i, template, *args)
                     continue
                 
-                # 验证嘉宾编号
-                if not isinstance(guest_id, (int, str)) or not str(guest_id).isdigit():
-                    all_warnings.append(f"第{i+1}行: 编号无效: {guest_id}")
-                    continue
-                
-                guest_id = int(guest_id)
-                max_id = self.max_male_id if guest_type == '男' else self.max_female_id
-                if not (1 <= guest_id <= max_id):
-                    all_warnings.append(f"第{i+1}行: 编号超出范围: {guest_id} (最大{guest_type}ID: {max_id})")
-                    continue
-                
-                # 构建主体ID
-                subject_prefix = 'M' if guest_type == '男' else 'F'
-                subject_id = f"{subject_prefix}{guest_id}"
-                
-                # 推断目标性别前缀
-                target_prefix = 'F' if guest_type == '男' else 'M'
-                
                 # 处理第一偏好
-                target1_id = None
-                if obj1_id and str(obj1_id).strip():
-                    obj1_str = str(obj1_id).strip()
-                    
-                    # 检查是否已经是完整的参与者ID格式（如M11, F3等）
-                    if obj1_str.startswith(('M', 'F')) and obj1_str[1:].isdigit():
-                        target_num = int(obj1_str[1:])
-                        target_gender = 'M' if obj1_str.startswith('M') else 'F'
-                        max_target_id = self.max_male_id if target_gender == 'M' else self.max_female_id
-                        
-                        if 1 <= target_num <= max_target_id:
-                            # 检查性别是否正确（男嘉宾只能选女嘉宾）
-                            if guest_type == '男' and obj1_str.startswith('F'):
-                                target1_id = obj1_str
-                            elif guest_type == '女' and obj1_str.startswith('M'):
-                                target1_id = obj1_str
-                            else:
-                                all_warnings.append(f"第{i+1}行: 对象1ID性别不匹配: {guest_type}嘉宾不能选择{obj1_str}")
-                        else:
-                            all_warnings.append(f"第{i+1}行: 对象1ID编号超出范围: {obj1_str} (最大{target_gender}ID: {max_target_id})")
+                target1_id, warning = resolve_cell(obj1_id, '对象1ID', guest_type)
+                if warning:
+                    all_warnings.add(i, "{}", warning)
+                if target1_id:
+                    if subject_id != target1_id:  # 避免自我指向
+                        yield subject_id, target1_id, first_weight
                     else:
-                        # 尝试作为纯数字ID处理
-                        try:
-                            obj1_num = int(obj1_str)
-                            max_target_id = self.max_female_id if target_prefix == 'F' else self.max_male_id
-                            if 1 <= obj1_num <= max_target_id:
-                                target1_id = f"{target_prefix}{obj1_num}"
-                            else:
-                                all_warnings.append(f"第{i+1}行: 对象1ID超出范围: {obj1_num} (最大{target_prefix}ID: {max_target_id})")
-                        except (ValueError, TypeError):
-                            all_warnings.append(f"第{i+1}行: 对象1ID格式错误: {obj1_str}")
-                    
-                    # 如果解析成功，添加边
-                    if target1_id:
-                        if subject_id != target1_id:  # 避免自我指向
-                            all_weighted_edges.append((subject_id, target1_id, self.first_preference_weight))
-                            all_edges.append((subject_id, target1_id))
-                        else:
-                            all_warnings.append(f"第{i+1}行: 忽略自我指向: {subject_id} -> {target1_id}")
+                        all_warnings.add(i, "忽略自我指向: {} -> {}", subject_id, target1_id)
                 
                 # 处理第二偏好
-                if obj2_id and str(obj2_id).strip():
-                    obj2_str = str(obj2_id).strip()
-                    target2_id = None
-                    
-                    # 检查是否已经是完整的参与者ID格式（如M11, F3等）
-                    if obj2_str.startswith(('M', 'F')) and obj2_str[1:].isdigit():
-                        target_num = int(obj2_str[1:])
-                        target_gender = 'M' if obj2_str.startswith('M') else 'F'
-                        max_target_id = self.max_male_id if target_gender == 'M' else self.max_female_id
-                        
-                        if 1 <= target_num <= max_target_id:
-                            # 检查性别是否正确（男嘉宾只能选女嘉宾）
-                            if guest_type == '男' and obj2_str.startswith('F'):
-                                target2_id = obj2_str
-                            elif guest_type == '女' and obj2_str.startswith('M'):
-                                target2_id = obj2_str
-                            else:
-                                all_warnings.append(f"第{i+1}行: 对象2ID性别不匹配: {guest_type}嘉宾不能选择{obj2_str}")
-                        else:
-                            all_warnings.append(f"第{i+1}行: 对象2ID编号超出范围: {obj2_str} (最大{target_gender}ID: {max_target_id})")
+                target2_id, warning = resolve_cell(obj2_id, '对象2ID', guest_type)
+                if warning:
+                    all_warnings.add(i, "{}", warning)
+                if target2_id:
+                    if subject_id == target2_id:  # 避免自我指向
+                        all_warnings.add(i, "忽略自我指向: {} -> {}", subject_id, target2_id)
+                    elif target1_id == target2_id:  # 避免重复边（如果对象1和对象2相同）
+                        all_warnings.add(i, "对象1和对象2相同，忽略重复: {}", target2_id)
                     else:
-                        # 尝试作为纯数字ID处理
-                        try:
-                            obj2_num = int(obj2_str)
-                            max_target_id = self.max_female_id if target_prefix == 'F' else self.max_male_id
-                            if 1 <= obj2_num <= max_target_id:
-                                target2_id = f"{target_prefix}{obj2_num}"
-                            else:
-                                all_warnings.append(f"第{i+1}行: 对象2ID超出范围: {obj2_num} (最大{target_prefix}ID: {max_target_id})")
-                        except (ValueError, TypeError):
-                            all_warnings.append(f"第{i+1}行: 对象2ID格式错误: {obj2_str}")
-                    
-                    # 如果解析成功，添加边
-                    if target2_id:
-                        if subject_id != target2_id:  # 避免自我指向
-                            # 避免重复边（如果对象1和对象2相同）
-                            if target1_id != target2_id:
-                                all_weighted_edges.append((subject_id, target2_id, self.second_preference_weight))
-                                all_edges.append((subject_id, target2_id))
-                            else:
-                                all_warnings.append(f"第{i+1}行: 对象1和对象2相同，忽略重复: {target2_id}")
-                        else:
-                            all_warnings.append(f"第{i+1}行: 忽略自我指向: {subject_id} -> {target2_id}")
+                        yield subject_id, target2_id, second_weight
                 
             except Exception as e:
-                all_warnings.append(f"第{i+1}行: 处理异常: {str(e)}")
+                all_warnings.add(i, "处理异常: {}", str(e))
                 continue
+    
+    def parse_all_preferences(self, data: List[Dict]) -> RankingParseResult:
+        """
+        解析所有ranking偏好数据
+        
+        Args:
+            data: 包含ranking偏好数据的字典列表，每个字典包含：
+                  - '嘉宾类型': '男' 或 '女'
+                  - '编号': 数字ID
+                  - '对象1ID': 第一偏好的异性ID
+                  - '对象2ID': 第二偏好的异性ID
+        
+        Returns:
+            RankingParseResult: 解析结果
+        """
+        all_warnings = ParseWarnings()
+        
+        # 先把各列取成平行列表，循环内按位置直接取值
+        guest_types = [row.get('嘉宾类型', '') for row in data]
+        guest_ids = [row.get('编号', '') for row in data]
+        obj1_ids = [row.get('对象1ID', '') for row in data]  # 第一偏好
+        obj2_ids = [row.get('对象2ID', '') for row in data]  # 第二偏好
+        all_weighted_edges = list(self._iter_row_edges(zip(guest_types, guest_ids, obj1_ids, obj2_ids), all_warnings))
+        all_edges = [(src, dst) for src, dst, _ in all_weighted_edges]
+        
+        return RankingParseResult(
+            weighted_edges=all_weighted_edges,
+            edges=all_edges,
+            warnings=all_warnings,
+            raw_data=data
+        )
+    
+    def parse_all_preferences_parallel(self, data: List[Dict], n_jobs: Optional[int] = None) -> RankingParseResult:
+        """
+        多进程解析所有ranking偏好数据，结果（边的顺序、警告及其行号）与 parse_all_preferences 一致
+        
+        Args:
+            data: 同 parse_all_preferences
+            n_jobs: 并行进程数（1为串行，None为一半CPU核心，负数同joblib约定）；
+                    行数较少时自动串行
+        
+        Returns:
+            RankingParseResult: 解析结果
+        """
+        chunks = parse_in_chunks(self, data, n_jobs)
+        if chunks is None:
+            return self.parse_all_preferences(data)
+        
+        all_weighted_edges = []
+        all_edges = []
+        all_warnings = ParseWarnings()
+        for offset, result in chunks:
+            all_weighted_edges.extend(result.weighted_edges)
+            all_edges.extend(result.edges)
+            all_warnings.merge(result.warnings, offset)
         
         return RankingParseResult(
             weighted_edges=all_weighted_edges,
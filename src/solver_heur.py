@@ -7,9 +7,55 @@
 import random
 import math
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple, Dict, Optional, Callable
-from copy import deepcopy
-from .graph import PreferenceGraph, validate_grouping, OverallStats
+import numpy as np
+from .graph import PreferenceGraph, validate_grouping, is_valid_grouping, OverallStats
+from .parallel import resolve_n_jobs
+
+# 局部搜索中单组得分缓存的最大条目数（键为组成员集合）
+SEARCH_GROUP_SCORE_CACHE_SIZE = 16384
+
+# 邻域移动块约束表缓存的最大条目数（键为两组的人数和男女人数）
+MOVE_BLOCK_CACHE_SIZE = 4096
+
+# 整个邻域移动块列表缓存的最大条目数（键为各组的人数和男女人数）
+MOVE_BLOCK_LIST_CACHE_SIZE = 1024
+
+# Lam自适应降温：目标接受率与统计接受率的滑动窗口长度
+LAM_TARGET_ACCEPT_RATE = 0.44
+LAM_WINDOW_SIZE = 100
+
+# 性别类别（0=男 M前缀，1=女 F前缀，2=其他）对应的 (男性人数, 女性人数) 增量
+_CLASS_DELTA = ((1, 0), (0, 1), (0, 0))
+
+
+def _gender_class(person: str) -> int:
+    """人员的性别类别（见_CLASS_DELTA）"""
+    return 0 if person.startswith('M') else (1 if person.startswith('F') else 2)
+
+
+class _GenderClassMap(dict):
+    """人员 -> 性别类别的预计算表，表外人员按前缀现算"""
+    
+    def __missing__(self, person: str) -> int:
+        return _gender_class(person)
+
+
+# 工作进程中的求解器实例（由进程池initializer设置，避免每个任务重复序列化）
+_worker_solver = None
+
+
+def _init_restart_worker(solver: 'HeuristicSolver'):
+    """进程池初始化：缓存求解器实例"""
+    global _worker_solver
+    _worker_solver = solver
+
+
+def _run_restart_worker(algorithm: str, initial_strategy: str, restart_seed: Optional[int]):
+    """在工作进程中执行一次重启"""
+    return _worker_solver._run_single_restart(algorithm, initial_strategy, restart_seed)
 
 
 class HeuristicSolver:
@@ -27,7 +73,9 @@ class HeuristicSolver:
                  num_males: int = 12,
                  num_females: int = 12,
                  group_size: int = 4,
-                 privileged_guests: Optional[set] = None):
+                 privileged_guests: Optional[set] = None,
+                 cooling_schedule: str = "geometric",
+                 improvement_strategy: str = "best"):
         """
         初始化启发式求解器
         
@@ -44,18 +92,30 @@ class HeuristicSolver:
             num_females: 女性人数
             group_size: 每组人数
             privileged_guests: 特权嘉宾集合，这些嘉宾必须与至少一个喜欢的人同组
+            cooling_schedule: 模拟退火降温方式（"geometric"为每步乘以降温率；
+                "lam"为Lam自适应降温，按最近的接受率升降温度，使接受率趋近44%）
+            improvement_strategy: 爬山算法的改进方式（"best"为评估全部邻居后取最优；
+                "first"为从随机位置开始依次评估，遇到第一个更好的邻居即接受）
         """
+        if cooling_schedule not in ("geometric", "lam"):
+            raise ValueError(f"不支持的降温方式: {cooling_schedule}")
+        if improvement_strategy not in ("best", "first"):
+            raise ValueError(f"不支持的爬山改进方式: {improvement_strategy}")
+        
         self.graph = graph
         self.require_2by2 = require_2by2
         self.max_iterations = max_iterations
         self.temperature_start = temperature_start
         self.temperature_end = temperature_end
         self.cooling_rate = cooling_rate
+        self.cooling_schedule = cooling_schedule
+        self.improvement_strategy = improvement_strategy
         self.pairing_mode = pairing_mode
         self.num_males = num_males
         self.num_females = num_females
         self.group_size = group_size
         self.privileged_guests = privileged_guests or set()
+        self.seed = seed
         
         # 设置随机种子
         if seed is not None:
@@ -65,6 +125,8 @@ class HeuristicSolver:
         self.males = [f"M{i}" for i in range(1, num_males + 1)]
         self.females = [f"F{i}" for i in range(1, num_females + 1)]
         self.all_persons = self.males + self.females
+        # 性别类别预计算表，邻域构建时按表查询而不是逐人做前缀判断
+        self._person_class = _GenderClassMap((person, _gender_class(person)) for person in self.all_persons)
         
         # 计算分组数量
         if pairing_mode:
@@ -73,6 +135,43 @@ class HeuristicSolver:
             total_people = num_males + num_females
             self.num_groups = (total_people + group_size - 1) // group_size  # 向上取整
         
+        # 偏好邻接表（src -> 喜欢的人，按边的顺序）与每人的入度/出度，只扫描一遍边列表
+        self._preferences: Dict[str, List[str]] = {}
+        for src, dst in graph.edges:
+            self._preferences.setdefault(src, []).append(dst)
+        in_counts = np.bincount(graph.dst_ids, minlength=graph.num_nodes).tolist()
+        out_counts = np.bincount(graph.src_ids, minlength=graph.num_nodes).tolist()
+        self.in_degree = {person: in_counts[graph.node_index[person]] if person in graph.node_index else 0
+                          for person in self.all_persons}
+        self.out_degree = {person: out_counts[graph.node_index[person]] if person in graph.node_index else 0
+                           for person in self.all_persons}
+        
+        # 男女配对得分矩阵：pair_scores[i, j] = 男i对女j的偏好权重 + 女j对男i的偏好权重
+        male_row = np.full(graph.num_nodes, -1)
+        female_col = np.full(graph.num_nodes, -1)
+        for i, male in enumerate(self.males):
+            if male in graph.node_index:
+                male_row[graph.node_index[male]] = i
+        for j, female in enumerate(self.females):
+            if female in graph.node_index:
+                female_col[graph.node_index[female]] = j
+        male_to_female = np.zeros((num_males, num_females))
+        female_to_male = np.zeros((num_males, num_females))
+        src_row, dst_col = male_row[graph.src_ids], female_col[graph.dst_ids]
+        mask = (src_row >= 0) & (dst_col >= 0)
+        male_to_female[src_row[mask], dst_col[mask]] = graph.edge_w[mask]
+        src_col, dst_row = female_col[graph.src_ids], male_row[graph.dst_ids]
+        mask = (src_col >= 0) & (dst_row >= 0)
+        female_to_male[dst_row[mask], src_col[mask]] = graph.edge_w[mask]
+        self._pair_scores = male_to_female + female_to_male
+        
+        # 单组得分缓存：组成员集合 -> 该组得分（邻域评估时只重算变动的两组）
+        self._group_score_cache: Dict[frozenset, float] = {}
+        # 邻域移动块约束表缓存：(是否互换, 组1状态, 组2状态) -> (约束表, 可行移动数)
+        self._block_table_cache: Dict[Tuple[bool, tuple, tuple], Tuple[tuple, int]] = {}
+        # 邻域移动块列表缓存：各组状态元组 -> 移动块列表
+        self._move_block_list_cache: Dict[tuple, tuple] = {}
+        
     def generate_random_solution(self) -> List[List[str]]:
         """生成随机分组方案"""
         if self.pairing_mode:
@@ -137,13 +236,9 @@ class HeuristicSolver:
         solution = [[] for _ in range(self.num_groups)]
         
         if self.require_2by2:
-            # 按性别分别处理
-            male_preferences = self._get_person_preferences(self.males)
-            female_preferences = self._get_person_preferences(self.females)
-            
-            # 按偏好数量排序（偏好多的优先分配）
-            sorted_males = sorted(self.males, key=lambda p: len(male_preferences[p]), reverse=True)
-            sorted_females = sorted(self.females, key=lambda p: len(female_preferences[p]), reverse=True)
+            # 按偏好数量（出度）排序（偏好多的优先分配）
+            sorted_males = self._sort_by_score(self.males, [self.out_degree[p] for p in self.males])
+            sorted_females = self._sort_by_score(self.females, [self.out_degree[p] for p in self.females])
             
             # 贪心分配
             for i in range(self.num_groups):
@@ -158,14 +253,10 @@ class HeuristicSolver:
                     solution[i].extend(sorted_females[i * gender_count:(i + 1) * gender_count])
         else:
             # 不限制性别比例的贪心
-            person_scores = {}
-            for person in self.all_persons:
-                # 计算每个人的"受欢迎程度" + "偏好广度"
-                in_degree = len([edge for edge in self.graph.edges if edge[1] == person])
-                out_degree = len([edge for edge in self.graph.edges if edge[0] == person])
-                person_scores[person] = in_degree + out_degree * 0.5
-            
-            sorted_persons = sorted(self.all_persons, key=lambda p: person_scores[p], reverse=True)
+            # 每个人的"受欢迎程度" + "偏好广度"
+            in_degree = np.array([self.in_degree[p] for p in self.all_persons], dtype=np.float64)
+            out_degree = np.array([self.out_degree[p] for p in self.all_persons], dtype=np.float64)
+            sorted_persons = self._sort_by_score(self.all_persons, in_degree + out_degree * 0.5)
             
             for i in range(self.num_groups):
                 if i == self.num_groups - 1:  # 最后一组
@@ -186,11 +277,12 @@ class HeuristicSolver:
                 continue
             
             # 找到该特权嘉宾喜欢的人
-            liked_persons = [dst for src, dst in self.graph.edges if src == privileged_guest and dst not in placed_persons]
+            liked_persons = [dst for dst in self._preferences.get(privileged_guest, []) if dst not in placed_persons]
             
             if not liked_persons:
                 # 如果特权嘉宾没有喜欢的人或者喜欢的人都已被分配，直接分配到最有空余的组
-                min_group = min(range(self.num_groups), key=lambda g: len(solution[g]))
+                group_sizes = [len(group) for group in solution]
+                min_group = group_sizes.index(min(group_sizes))
                 solution[min_group].append(privileged_guest)
                 placed_persons.add(privileged_guest)
                 continue
@@ -292,13 +384,13 @@ class HeuristicSolver:
             # 计算该组的"吸引力"分数（基于现有成员与新成员的偏好匹配）
             score = 0
             for existing_person in group:
-                if (person1, existing_person) in self.graph.edges:
+                if (person1, existing_person) in self.graph.edge_weights:
                     score += 1
-                if (person2, existing_person) in self.graph.edges:
+                if (person2, existing_person) in self.graph.edge_weights:
                     score += 1
-                if (existing_person, person1) in self.graph.edges:
+                if (existing_person, person1) in self.graph.edge_weights:
                     score += 1
-                if (existing_person, person2) in self.graph.edges:
+                if (existing_person, person2) in self.graph.edge_weights:
                     score += 1
             
             # 偏好组容量较小的组（负荷均衡）
@@ -312,43 +404,30 @@ class HeuristicSolver:
 
     def generate_greedy_pairing(self) -> List[List[str]]:
         """生成贪心一男一女配对方案"""
-        # 构建男性和女性的偏好权重
-        male_female_scores = {}  # (male, female) -> score
-        
-        for male in self.males:
-            for female in self.females:
-                score = 0.0
-                # 计算男性对女性的偏好权重
-                if (male, female) in self.graph.edge_weights:
-                    score += self.graph.edge_weights[(male, female)]
-                # 计算女性对男性的偏好权重
-                if (female, male) in self.graph.edge_weights:
-                    score += self.graph.edge_weights[(female, male)]
-                    
-                if score > 0:
-                    male_female_scores[(male, female)] = score
+        # 按得分从高到低排列所有得分为正的配对（得分相同时按男、女编号顺序）
+        flat_scores = self._pair_scores.ravel()
+        positive = np.flatnonzero(flat_scores > 0)
+        ranked = positive[np.argsort(-flat_scores[positive], kind='stable')].tolist()
+        num_females = len(self.females)
         
-        # 按得分排序所有可能的配对
-        sorted_pairs = sorted(male_female_scores.items(), 
-                            key=lambda x: x[1], reverse=True)
-        
-        # 贪心选择配对
-        used_males = set()
-        used_females = set()
+        # 贪心选择配对（按男女编号记录是否已配对）
+        used_males = [False] * len(self.males)
+        used_females = [False] * num_females
         selected_pairs = []
         
-        for (male, female), score in sorted_pairs:
-            if male not in used_males and female not in used_females:
-                selected_pairs.append([male, female])
-                used_males.add(male)
-                used_females.add(female)
+        for k in ranked:
+            male_idx, female_idx = divmod(k, num_females)
+            if not used_males[male_idx] and not used_females[female_idx]:
+                selected_pairs.append([self.males[male_idx], self.females[female_idx]])
+                used_males[male_idx] = True
+                used_females[female_idx] = True
                 
                 if len(selected_pairs) == self.num_groups:
                     break
         
         # 如果还有未配对的人员，随机配对
-        remaining_males = [m for m in self.males if m not in used_males]
-        remaining_females = [f for f in self.females if f not in used_females]
+        remaining_males = [m for m, used in zip(self.males, used_males) if not used]
+        remaining_females = [f for f, used in zip(self.females, used_females) if not used]
         
         for i in range(len(remaining_males)):
             if i < len(remaining_females):
@@ -356,20 +435,15 @@ class HeuristicSolver:
         
         return selected_pairs
     
-    def _get_person_preferences(self, persons: List[str]) -> Dict[str, List[str]]:
-        """获取每个人的偏好列表"""
-        preferences = {person: [] for person in persons}
-        
-        for src, dst in self.graph.edges:
-            if src in persons:
-                preferences[src].append(dst)
-        
-        return preferences
+    @staticmethod
+    def _sort_by_score(persons: List[str], scores) -> List[str]:
+        """按得分从高到低排序（稳定排序，得分相同时保持原顺序，与 sorted(reverse=True) 一致）"""
+        order = np.argsort(-np.asarray(scores, dtype=np.float64), kind='stable')
+        return [persons[i] for i in order.tolist()]
     
     def calculate_solution_score(self, solution: List[List[str]]) -> float:
-        """计算解的总得分"""
-        stats = self.graph.calculate_overall_score(solution)
-        return stats.total_score
+        """计算解的总得分（只计算数值，不构建得分明细）"""
+        return self.graph.calculate_total_score(solution)
     
     def check_privileged_constraints(self, solution: List[List[str]]) -> Tuple[bool, List[str]]:
         """
@@ -404,7 +478,7 @@ class HeuristicSolver:
             for other_person in guest_group:
                 if other_person != privileged_guest:
                     # 检查特权嘉宾是否喜欢这个人
-                    if (privileged_guest, other_person) in self.graph.edges:
+                    if (privileged_guest, other_person) in self.graph.edge_weights:
                         has_liked_person = True
                         break
             
@@ -415,154 +489,406 @@ class HeuristicSolver:
     
     def get_neighbors(self, solution: List[List[str]]) -> List[List[List[str]]]:
         """生成邻域解（通过人员交换）"""
-        if self.pairing_mode:
-            return self.get_pairing_neighbors(solution)
+        return [self._apply_move(solution, move) for move in self._neighbor_moves(solution)]
+
+    def get_pairing_neighbors(self, solution: List[List[str]]) -> List[List[List[str]]]:
+        """生成配对模式的邻域解（交换配对中的男性或女性）"""
+        return [self._apply_move(solution, move) for move in self._pairing_neighbor_moves(solution)]
+    
+    def _neighbor_moves(self, solution: List[List[str]]) -> List[Tuple[int, int, int, Optional[int]]]:
+        """
+        枚举邻域移动（顺序与邻域解列表一致），不复制解
+        
+        每个移动为 (组1, 位置1, 组2, 位置2)：位置2为None表示把组1第位置1个人移到组2末尾（单点移动），
+        否则交换两个位置上的人（两点互换）。
+        
+        Args:
+            solution: 当前分组方案
             
-        neighbors = []
+        Returns:
+            满足约束的移动列表
+        """
+        if self.pairing_mode:
+            return self._pairing_neighbor_moves(solution)
+        
+        classes, blocks = self._move_blocks(solution)
+        moves = []
+        for block in blocks:
+            moves.extend(self._expand_block(classes, block))
+        return moves
+    
+    def _neighbor_sampler(self, solution: List[List[str]]) -> Tuple[Optional[List[List[int]]], list, int]:
+        """
+        邻域抽样表（只取决于当前解，解不变时可反复用于 _draw_move）
+        
+        Returns:
+            (classes, blocks, total)：见 _move_blocks，total 为可行移动总数；
+            配对模式下 classes 为None，blocks 为全部移动列表
+        """
+        if self.pairing_mode:
+            moves = self._pairing_neighbor_moves(solution)
+            return None, moves, len(moves)
+        
+        classes, blocks = self._move_blocks(solution)
+        return classes, blocks, sum(block[4] for block in blocks)
+    
+    def _draw_move(self, sampler: Tuple[Optional[List[List[int]]], list, int]) -> Optional[Tuple[int, int, int, Optional[int]]]:
+        """
+        从邻域抽样表中随机抽取一个移动，与 random.choice(self._neighbor_moves(solution)) 的结果和随机数消耗完全相同
+        
+        先按移动块统计满足约束的移动数，抽中序号后只展开所在的块，不必枚举整个邻域。
+        
+        Returns:
+            选中的移动；没有可行移动时返回None（不消耗随机数）
+        """
+        classes, blocks, total = sampler
+        if not total:
+            return None
+        if classes is None:
+            return random.choice(blocks)
+        
+        # random.choice(seq) 即 seq[randrange(len(seq))]，两者消耗的随机数相同
+        k = random.randrange(total)
+        for block in blocks:
+            if k < block[4]:
+                for move in self._expand_block(classes, block):
+                    if not k:
+                        return move
+                    k -= 1
+            k -= block[4]
+        return None
+    
+    def _move_blocks(self, solution: List[List[str]]) -> Tuple[List[List[int]], Tuple[Tuple[int, int, bool, tuple, int], ...]]:
+        """
+        按邻域顺序列出移动块：先是各 (源组, 目标组) 的单点移动，再是各 (组1, 组2) 的两点互换
+        
+        约束只取决于两组的人数和男女人数，块内按被移动成员的性别类别查表即可判断；
+        其余组不变，当前有不满足约束的其余组时整块跳过。
+        
+        Returns:
+            (classes, blocks): classes[g] 为第g组各成员的性别类别；
+            blocks 为 ((组1, 组2, 是否互换, ok, 可行移动数), ...)，单点移动时 ok[c] 表示移动类别c的成员后是否满足约束，
+            互换时 ok[c1][c2] 表示组1的类别c1成员与组2的类别c2成员互换后是否满足约束
+        """
+        person_class = self._person_class
+        classes = [[person_class[p] for p in group] for group in solution]
+        
+        # 移动块只取决于各组状态 (组序号, 人数, 男性人数, 女性人数)，按整数状态元组缓存
+        states = tuple((g, len(c), c.count(0), c.count(1)) for g, c in enumerate(classes))
+        blocks = self._move_block_list_cache.get(states)
+        if blocks is None:
+            blocks = self._build_move_blocks(states)
+            # 超过上限时FIFO淘汰最早加入的条目
+            if len(self._move_block_list_cache) >= MOVE_BLOCK_LIST_CACHE_SIZE:
+                del self._move_block_list_cache[next(iter(self._move_block_list_cache))]
+            self._move_block_list_cache[states] = blocks
+        return classes, blocks
+    
+    def _build_move_blocks(self, states: Tuple[Tuple[int, int, int, int], ...]) -> Tuple[Tuple[int, int, bool, tuple, int], ...]:
+        """根据各组状态构建移动块列表（格式见_move_blocks）"""
+        num_groups = self.num_groups
+        last_group = num_groups - 1
+        sizes = [state[1] for state in states]
+        blocks = []
+        
+        if not self.require_2by2:
+            all_ok = (True, True, True)
+            for from_group in range(num_groups):
+                for to_group in range(num_groups):
+                    if from_group == to_group:
+                        continue
+                    max_group_size = self.group_size if to_group != last_group else len(self.all_persons)
+                    if sizes[to_group] < max_group_size:
+                        blocks.append((from_group, to_group, False, all_ok, sizes[from_group]))
+            all_ok = (all_ok, all_ok, all_ok)
+            for group1 in range(num_groups):
+                for group2 in range(group1 + 1, num_groups):
+                    blocks.append((group1, group2, True, all_ok, sizes[group1] * sizes[group2]))
+            return tuple(blocks)
+        
+        # 各组当前约束满足情况
+        valid = [self._is_valid_group(*state) for state in states]
+        num_invalid = valid.count(False)
         
         # 单点移动：将一个人从一组移到另一组
-        for from_group in range(self.num_groups):
-            for to_group in range(self.num_groups):
-                if from_group != to_group:
-                    for person_idx in range(len(solution[from_group])):
-                        # 创建新解
-                        new_solution = deepcopy(solution)
-                        person = new_solution[from_group].pop(person_idx)
-                        
-                        # 检查目标组是否已满
-                        max_group_size = self.group_size if to_group != self.num_groups - 1 else len(self.all_persons)
-                        if len(new_solution[to_group]) < max_group_size:
-                            new_solution[to_group].append(person)
-                            
-                            # 检查约束
-                            if self._is_valid_partial_solution(new_solution):
-                                neighbors.append(new_solution)
+        for from_group in range(num_groups):
+            for to_group in range(num_groups):
+                if from_group == to_group:
+                    continue
+                # 检查目标组是否已满
+                max_group_size = self.group_size if to_group != last_group else len(self.all_persons)
+                if sizes[to_group] >= max_group_size:
+                    continue
+                if num_invalid - (not valid[from_group]) - (not valid[to_group]):
+                    continue
+                blocks.append((from_group, to_group, False) + self._block_table(False, states[from_group], states[to_group]))
         
         # 两点互换：交换不同组的两个人
-        for group1 in range(self.num_groups):
-            for group2 in range(group1 + 1, self.num_groups):
-                for person1_idx in range(len(solution[group1])):
-                    for person2_idx in range(len(solution[group2])):
-                        new_solution = deepcopy(solution)
-                        
-                        # 交换两个人
-                        person1 = new_solution[group1][person1_idx]
-                        person2 = new_solution[group2][person2_idx]
-                        
-                        new_solution[group1][person1_idx] = person2
-                        new_solution[group2][person2_idx] = person1
-                        
-                        # 检查约束
-                        if self._is_valid_partial_solution(new_solution):
-                            neighbors.append(new_solution)
-        
-        return neighbors
-
-    def get_pairing_neighbors(self, solution: List[List[str]]) -> List[List[List[str]]]:
-        """生成配对模式的邻域解（交换配对中的男性或女性）"""
-        neighbors = []
-        
-        # 交换两对配对中的男性
-        for i in range(self.num_groups):
-            for j in range(i + 1, self.num_groups):
-                if len(solution) > max(i, j) and len(solution[i]) >= 1 and len(solution[j]) >= 1:
-                    # 找到每对中的男性
-                    male_i = next((p for p in solution[i] if p.startswith('M')), None)
-                    male_j = next((p for p in solution[j] if p.startswith('M')), None)
-                    
-                    if male_i and male_j:
-                        new_solution = deepcopy(solution)
-                        # 交换男性
-                        for k, person in enumerate(new_solution[i]):
-                            if person == male_i:
-                                new_solution[i][k] = male_j
-                                break
-                        for k, person in enumerate(new_solution[j]):
-                            if person == male_j:
-                                new_solution[j][k] = male_i
-                                break
-                        neighbors.append(new_solution)
-        
-        # 交换两对配对中的女性
-        for i in range(self.num_groups):
-            for j in range(i + 1, self.num_groups):
-                if len(solution) > max(i, j) and len(solution[i]) >= 1 and len(solution[j]) >= 1:
-                    # 找到每对中的女性
-                    female_i = next((p for p in solution[i] if p.startswith('F')), None)
-                    female_j = next((p for p in solution[j] if p.startswith('F')), None)
-                    
-                    if female_i and female_j:
-                        new_solution = deepcopy(solution)
-                        # 交换女性
-                        for k, person in enumerate(new_solution[i]):
-                            if person == female_i:
-                                new_solution[i][k] = female_j
-                                break
-                        for k, person in enumerate(new_solution[j]):
-                            if person == female_j:
-                                new_solution[j][k] = female_i
-                                break
-                        neighbors.append(new_solution)
-        
-        return neighbors
+        for group1 in range(num_groups):
+            for group2 in range(group1 + 1, num_groups):
+                if num_invalid - (not valid[group1]) - (not valid[group2]):
+                    continue
+                blocks.append((group1, group2, True) + self._block_table(True, states[group1], states[group2]))
+        
+        return tuple(blocks)
     
-    def _is_valid_partial_solution(self, solution: List[List[str]]) -> bool:
-        """检查部分解是否满足约束"""
-        if not self.require_2by2:
-            return True
+    def _block_table(self, is_swap: bool, state1: Tuple[int, int, int, int], state2: Tuple[int, int, int, int]) -> Tuple[tuple, int]:
+        """
+        移动块的约束表与可行移动数（只取决于两组状态，带缓存）
         
-        for i, group in enumerate(solution):
-            max_size = self.group_size if i != self.num_groups - 1 else len(self.all_persons)
-            if len(group) > max_size:  # 超出组大小限制
+        Args:
+            is_swap: 是否为两点互换（否则为组1到组2的单点移动）
+            state1: 组1状态 (组序号, 人数, 男性人数, 女性人数)
+            state2: 组2状态
+            
+        Returns:
+            (ok, count): 约束表（格式见_move_blocks）与块内满足约束的移动数
+        """
+        key = (is_swap, state1, state2)
+        cached = self._block_table_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        g1, size1, m1, f1 = state1
+        g2, size2, m2, f2 = state2
+        n1 = (m1, f1, size1 - m1 - f1)
+        n2 = (m2, f2, size2 - m2 - f2)
+        if is_swap:
+            # 同类别互换人数不变，约束满足情况与当前相同
+            unchanged_ok = self._is_valid_group(*state1) and self._is_valid_group(*state2)
+            ok = tuple(tuple(unchanged_ok if c1 == c2 else (
+                self._is_valid_group(g1, size1, m1 - _CLASS_DELTA[c1][0] + _CLASS_DELTA[c2][0], f1 - _CLASS_DELTA[c1][1] + _CLASS_DELTA[c2][1]) and
+                self._is_valid_group(g2, size2, m2 - _CLASS_DELTA[c2][0] + _CLASS_DELTA[c1][0], f2 - _CLASS_DELTA[c2][1] + _CLASS_DELTA[c1][1]))
+                for c2 in range(3)) for c1 in range(3))
+            count = sum(n1[c1] * n2[c2] for c1 in range(3) for c2 in range(3) if ok[c1][c2])
+        else:
+            ok = tuple(self._is_valid_group(g1, size1 - 1, m1 - dm, f1 - df) and
+                       self._is_valid_group(g2, size2 + 1, m2 + dm, f2 + df) for dm, df in _CLASS_DELTA)
+            count = sum(n1[c] for c in range(3) if ok[c])
+        
+        # 超过上限时FIFO淘汰最早加入的条目
+        if len(self._block_table_cache) >= MOVE_BLOCK_CACHE_SIZE:
+            del self._block_table_cache[next(iter(self._block_table_cache))]
+        cached = self._block_table_cache[key] = (ok, count)
+        return cached
+    
+    @staticmethod
+    def _expand_block(classes: List[List[int]], block: Tuple[int, int, bool, tuple, int]):
+        """按邻域顺序逐个产出移动块中满足约束的移动"""
+        group1, group2, is_swap, ok, _ = block
+        if not is_swap:
+            for person_idx, c in enumerate(classes[group1]):
+                if ok[c]:
+                    yield group1, person_idx, group2, None
+            return
+        for person1_idx, c1 in enumerate(classes[group1]):
+            row = ok[c1]
+            for person2_idx, c2 in enumerate(classes[group2]):
+                if row[c2]:
+                    yield group1, person1_idx, group2, person2_idx
+    
+    def _pairing_neighbor_moves(self, solution: List[List[str]]) -> List[Tuple[int, int, int, Optional[int]]]:
+        """枚举配对模式的邻域移动：先交换两对中的男性，再交换两对中的女性（格式同_neighbor_moves）"""
+        person_class = self._person_class
+        classes = [[person_class[p] for p in group] for group in solution]
+        moves = []
+        for gender in (0, 1):
+            # 每对中第一个该性别成员的位置（按预计算的性别类别查找）
+            first_idx = [c.index(gender) if gender in c else None for c in classes]
+            for i in range(self.num_groups):
+                for j in range(i + 1, self.num_groups):
+                    if len(solution) > max(i, j) and first_idx[i] is not None and first_idx[j] is not None:
+                        moves.append((i, first_idx[i], j, first_idx[j]))
+        return moves
+    
+    @staticmethod
+    def _moved_groups(solution: List[List[str]], move: Tuple[int, int, int, Optional[int]]) -> Tuple[List[str], List[str]]:
+        """移动后变动的两组成员 (组1, 组2)"""
+        group1, idx1, group2, idx2 = move
+        members1, members2 = solution[group1], solution[group2]
+        if idx2 is None:
+            return members1[:idx1] + members1[idx1 + 1:], members2 + [members1[idx1]]
+        new_members1, new_members2 = members1.copy(), members2.copy()
+        new_members1[idx1], new_members2[idx2] = members2[idx2], members1[idx1]
+        return new_members1, new_members2
+    
+    def _apply_move(self, solution: List[List[str]], move: Tuple[int, int, int, Optional[int]]) -> List[List[str]]:
+        """返回执行移动后的新解（各组均为新列表，原解不变）"""
+        new_solution = [group.copy() for group in solution]
+        new_solution[move[0]], new_solution[move[2]] = self._moved_groups(solution, move)
+        return new_solution
+    
+    def _step(self, solution: List[List[str]], move: Tuple[int, int, int, Optional[int]]) -> List[List[str]]:
+        """
+        局部搜索中执行移动：只新建变动的两组，其余组与原解共用同一列表
+        
+        搜索过程中的解从不原地修改（初始解在入口处已复制），共用未变动的组是安全的。
+        """
+        new_solution = solution.copy()
+        new_solution[move[0]], new_solution[move[2]] = self._moved_groups(solution, move)
+        return new_solution
+    
+    def _count_genders(self, group: List[str]) -> Tuple[int, int]:
+        """组内男女人数（按M/F前缀）"""
+        classes = [self._person_class[p] for p in group]
+        return classes.count(0), classes.count(1)
+    
+    def _is_valid_group(self, group_idx: int, size: int, males_in_group: int, females_in_group: int) -> bool:
+        """检查单个组是否满足约束（_is_valid_partial_solution 的逐组条件）"""
+        max_size = self.group_size if group_idx != self.num_groups - 1 else len(self.all_persons)
+        if size > max_size:  # 超出组大小限制
+            return False
+        
+        # 如果组已满，检查性别比例
+        expected_size = self.group_size if group_idx != self.num_groups - 1 else (len(self.all_persons) - (self.num_groups - 1) * self.group_size)
+        if size == expected_size:
+            if males_in_group != females_in_group:
                 return False
+        # 如果组未满，检查是否可能达到1:1比例
+        elif size > 0:
+            max_possible_males = males_in_group + (expected_size - size)
+            max_possible_females = females_in_group + (expected_size - size)
+            expected_gender_count = expected_size // 2
             
-            males_in_group = sum(1 for p in group if p.startswith('M'))
-            females_in_group = sum(1 for p in group if p.startswith('F'))
-            
-            # 如果组已满，检查性别比例
-            expected_size = self.group_size if i != self.num_groups - 1 else (len(self.all_persons) - (self.num_groups - 1) * self.group_size)
-            if len(group) == expected_size:
-                if males_in_group != females_in_group:
-                    return False
-            # 如果组未满，检查是否可能达到1:1比例
-            elif len(group) > 0:
-                max_possible_males = males_in_group + (expected_size - len(group))
-                max_possible_females = females_in_group + (expected_size - len(group))
-                expected_gender_count = expected_size // 2
-                
-                if max_possible_males < expected_gender_count or max_possible_females < expected_gender_count:
-                    return False
+            if max_possible_males < expected_gender_count or max_possible_females < expected_gender_count:
+                return False
         
         return True
     
+    def _group_score(self, group: List[str]) -> float:
+        """单组得分（带缓存），与该组在完整方案中由 calculate_solution_score 计入的数值相同"""
+        key = frozenset(group)
+        score = self._group_score_cache.get(key)
+        if score is None:
+            score = self.graph.group_total_score(group)
+            # 超过上限时FIFO淘汰最早加入的条目
+            if len(self._group_score_cache) >= SEARCH_GROUP_SCORE_CACHE_SIZE:
+                del self._group_score_cache[next(iter(self._group_score_cache))]
+            self._group_score_cache[key] = score
+        return score
+    
+    def clear_score_cache(self):
+        """清空单组得分缓存（修改偏好图后需要调用）"""
+        self._group_score_cache.clear()
+    
+    def __getstate__(self):
+        """序列化时不携带搜索缓存（并行重启时各子进程自行重建）"""
+        state = self.__dict__.copy()
+        state['_group_score_cache'] = {}
+        state['_block_table_cache'] = {}
+        state['_move_block_list_cache'] = {}
+        return state
+    
+    def _solution_search_state(self, solution: List[List[str]]) -> Tuple[Optional[List[float]], Optional[List[int]]]:
+        """
+        局部搜索的增量评分状态：各组得分列表（总分 = 按组顺序求和）与 节点 -> 组序号 列表
+        
+        Returns:
+            (group_scores, group_of)；有成员重复出现时均为None（此时总分不能按组拆分，邻域解需要整体评分）
+        """
+        group_of = self.graph.encode_groups(solution)
+        if group_of is None:
+            return None, None
+        return [self._group_score(group) for group in solution], group_of.tolist()
+    
+    def _move_score(self, solution: List[List[str]], group_scores: Optional[List[float]],
+                    move: Tuple[int, int, int, Optional[int]],
+                    current_score: float = 0.0, group_of: Optional[List[int]] = None) -> float:
+        """
+        执行移动后的总分
+        
+        交换移动用 delta_swap 只遍历两个节点的关联边，在当前总分上加增量；
+        其余移动只重算变动的两组，其余组沿用当前得分，按组顺序求和。
+        
+        Args:
+            solution: 当前解
+            group_scores: 当前解各组得分（None表示需要整体评分）
+            move: 移动 (组1, 下标1, 组2, 下标2)
+            current_score: 当前解总分（交换移动的增量基准）
+            group_of: 当前解的 节点 -> 组序号 列表（None表示不使用增量评分）
+        """
+        if group_scores is None:
+            return self.calculate_solution_score(self._step(solution, move))
+        if move[3] is not None and group_of is not None:
+            u = self.graph.node_index.get(solution[move[0]][move[1]])
+            v = self.graph.node_index.get(solution[move[2]][move[3]])
+            if u is not None and v is not None:
+                return current_score + self.graph.delta_swap(group_of, u, v)
+        members1, members2 = self._moved_groups(solution, move)
+        scores = group_scores.copy()
+        scores[move[0]] = self._group_score(members1)
+        scores[move[2]] = self._group_score(members2)
+        return float(sum(scores))
+    
+    def _accept_move(self, solution: List[List[str]], group_scores: Optional[List[float]],
+                     group_of: Optional[List[int]], move: Tuple[int, int, int, Optional[int]]) -> Tuple[List[List[str]], float]:
+        """
+        执行移动并原地更新增量评分状态
+        
+        Returns:
+            (新解, 新解总分)；总分按组顺序重新求和，交换增量的舍入误差不会逐步累积
+        """
+        group1, idx1, group2, idx2 = move
+        if group_of is not None:
+            moved = [(solution[group1][idx1], group2)]
+            if idx2 is not None:
+                moved.append((solution[group2][idx2], group1))
+            for person, group_idx in moved:
+                node = self.graph.node_index.get(person)
+                if node is not None:
+                    group_of[node] = group_idx
+        
+        new_solution = self._step(solution, move)
+        if group_scores is None:
+            return new_solution, self.calculate_solution_score(new_solution)
+        group_scores[group1] = self._group_score(new_solution[group1])
+        group_scores[group2] = self._group_score(new_solution[group2])
+        return new_solution, float(sum(group_scores))
+    
+    def _is_valid_partial_solution(self, solution: List[List[str]]) -> bool:
+        """检查部分解是否满足约束"""
+        if not self.require_2by2:
+            return True
+        
+        return all(self._is_valid_group(i, len(group), *self._count_genders(group)) for i, group in enumerate(solution))
+    
     def hill_climbing(self, initial_solution: List[List[str]], callback: Optional[Callable] = None) -> Tuple[List[List[str]], float, int]:
         """爬山算法"""
-        current_solution = deepcopy(initial_solution)
+        current_solution = [group.copy() for group in initial_solution]
         current_score = self.calculate_solution_score(current_solution)
+        group_scores, group_of = self._solution_search_state(current_solution)
         iterations = 0
         
         while iterations < self.max_iterations:
-            neighbors = self.get_neighbors(current_solution)
+            # 邻域以移动表示，只对变动的两组重新评分，不复制整个解
+            moves = self._neighbor_moves(current_solution)
             
-            if not neighbors:
+            if not moves:
                 break
             
-            # 找到最好的邻居
-            best_neighbor = None
+            first_improvement = self.improvement_strategy == "first"
+            if first_improvement:
+                # 从随机位置开始循环遍历邻域，避免总是偏向前面的组
+                start = random.randrange(len(moves))
+                moves = moves[start:] + moves[:start]
+            
+            # 找到最好的邻居（first模式下找到第一个更好的邻居即停止）
+            best_move = None
             best_score = current_score
             
-            for neighbor in neighbors:
-                score = self.calculate_solution_score(neighbor)
+            for move in moves:
+                score = self._move_score(current_solution, group_scores, move, current_score, group_of)
                 if score > best_score:
-                    best_neighbor = neighbor
+                    best_move = move
                     best_score = score
+                    if first_improvement:
+                        break
             
-            if best_neighbor is None:
+            if best_move is None:
                 # 没有更好的邻居，到达局部最优
                 break
             
-            current_solution = best_neighbor
-            current_score = best_score
+            current_solution, current_score = self._accept_move(current_solution, group_scores, group_of, best_move)
             iterations += 1
             
             if callback and iterations % 100 == 0:
@@ -572,22 +898,29 @@ class HeuristicSolver:
     
     def simulated_annealing(self, initial_solution: List[List[str]], callback: Optional[Callable] = None) -> Tuple[List[List[str]], float, int]:
         """模拟退火算法"""
-        current_solution = deepcopy(initial_solution)
+        current_solution = [group.copy() for group in initial_solution]
         current_score = self.calculate_solution_score(current_solution)
+        group_scores, group_of = self._solution_search_state(current_solution)
         
-        best_solution = deepcopy(current_solution)
+        # 解只通过_step生成新解、从不原地修改，最优解可以直接引用当前解
+        best_solution = current_solution
         best_score = current_score
         
         temperature = self.temperature_start
         iterations = 0
+        # 邻域抽样表只在接受移动后重建，被拒绝的迭代直接复用
+        sampler = None
+        # Lam自适应降温：最近 LAM_WINDOW_SIZE 次接受/拒绝决策
+        recent_accepts = deque(maxlen=LAM_WINDOW_SIZE) if self.cooling_schedule == "lam" else None
         
         while temperature > self.temperature_end and iterations < self.max_iterations:
-            neighbors = self.get_neighbors(current_solution)
+            # 随机选择一个邻居（按块计数抽样，不枚举整个邻域；被选中的邻居才生成和评分）
+            if sampler is None:
+                sampler = self._neighbor_sampler(current_solution)
+            move = self._draw_move(sampler)
             
-            if neighbors:
-                # 随机选择一个邻居
-                neighbor = random.choice(neighbors)
-                neighbor_score = self.calculate_solution_score(neighbor)
+            if move is not None:
+                neighbor_score = self._move_score(current_solution, group_scores, move, current_score, group_of)
                 
                 # 计算接受概率
                 if neighbor_score > current_score:
@@ -596,20 +929,31 @@ class HeuristicSolver:
                 else:
                     # 较差的解，以一定概率接受
                     delta = current_score - neighbor_score
-                    probability = math.exp(-delta / temperature)
+                    # 得分相同时 exp(0)=1 必定接受，省去指数运算（仍抽取随机数，保持随机序列不变）
+                    probability = math.exp(-delta / temperature) if delta else 1.0
                     accept = random.random() < probability
                 
+                if recent_accepts is not None:
+                    recent_accepts.append(accept)
+                
                 if accept:
-                    current_solution = neighbor
-                    current_score = neighbor_score
+                    current_solution, current_score = self._accept_move(current_solution, group_scores, group_of, move)
+                    sampler = None
                     
                     # 更新最优解
                     if current_score > best_score:
-                        best_solution = deepcopy(current_solution)
+                        best_solution = current_solution
                         best_score = current_score
             
             # 降温
-            temperature *= self.cooling_rate
+            if recent_accepts:
+                # 接受率高于目标时降温，否则升温（温度不再单调下降，由最大迭代次数终止）
+                if sum(recent_accepts) > LAM_TARGET_ACCEPT_RATE * len(recent_accepts):
+                    temperature *= self.cooling_rate
+                else:
+                    temperature /= self.cooling_rate
+            else:
+                temperature *= self.cooling_rate
             iterations += 1
             
             if callback and iterations % 100 == 0:
@@ -617,11 +961,57 @@ class HeuristicSolver:
         
         return best_solution, best_score, iterations
     
+    def _run_single_restart(self, algorithm: str, initial_strategy: str, 
+                            restart_seed: Optional[int] = None,
+                            callback: Optional[Callable] = None) -> Optional[Tuple[List[List[str]], float, int]]:
+        """
+        执行一次重启：生成初始解并运行局部搜索
+        
+        Args:
+            algorithm: 算法选择 ("hill_climbing" 或 "simulated_annealing")
+            initial_strategy: 初始解策略 ("random" 或 "greedy")
+            restart_seed: 本次重启的随机种子（None表示沿用当前随机状态）
+            callback: 进度回调函数
+            
+        Returns:
+            (solution, score, iterations)，初始解无效时返回None
+        """
+        if restart_seed is not None:
+            random.seed(restart_seed)
+        
+        # 生成初始解
+        if initial_strategy == "random":
+            initial_solution = self.generate_random_solution()
+        else:  # greedy
+            initial_solution = self.generate_greedy_solution()
+        
+        # 验证初始解
+        if not is_valid_grouping(initial_solution, self.require_2by2, self.pairing_mode,
+                                 self.num_males, self.num_females, self.group_size):
+            return None
+        
+        # 选择算法
+        if algorithm == "hill_climbing":
+            return self.hill_climbing(initial_solution, callback)
+        else:  # simulated_annealing
+            return self.simulated_annealing(initial_solution, callback)
+    
+    def _run_restarts_parallel(self, algorithm: str, initial_strategy: str, 
+                               restart_seeds: List[Optional[int]], n_jobs: int) -> List[Optional[Tuple[List[List[str]], float, int]]]:
+        """使用进程池并行执行各次重启，结果按重启顺序返回"""
+        with ProcessPoolExecutor(max_workers=n_jobs, 
+                                 initializer=_init_restart_worker, 
+                                 initargs=(self,)) as executor:
+            futures = [executor.submit(_run_restart_worker, algorithm, initial_strategy, restart_seed)
+                       for restart_seed in restart_seeds]
+            return [future.result() for future in futures]
+    
     def solve(self, 
               algorithm: str = "simulated_annealing", 
               initial_strategy: str = "greedy", 
               num_restarts: int = 5,
-              callback: Optional[Callable] = None) -> Tuple[Optional[List[List[str]]], Dict]:
+              callback: Optional[Callable] = None,
+              n_jobs: Optional[int] = 1) -> Tuple[Optional[List[List[str]]], Dict]:
         """
         求解分组问题
         
@@ -629,41 +1019,51 @@ class HeuristicSolver:
             algorithm: 算法选择 ("hill_climbing" 或 "simulated_annealing")
             initial_strategy: 初始解策略 ("random" 或 "greedy")
             num_restarts: 重启次数
-            callback: 进度回调函数
+            callback: 进度回调函数，以格式化好的消息字符串调用 callback(message)
+            n_jobs: 并行进程数（1为串行，None为一半CPU核心，负数同joblib约定）
             
         Returns:
             (solution, info): 解决方案和求解信息
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         best_solution = None
         best_score = -1
         total_iterations = 0
         
         try:
-            for restart in range(num_restarts):
+            # 各次重启的种子由 random.Random(seed) 依次生成：结果与并行进程数无关，
+            # 相邻的seed（如42与43）也不会共用重启种子
+            if self.seed is not None:
+                seed_rng = random.Random(self.seed)
+                restart_seeds = [seed_rng.randrange(2 ** 32) for _ in range(num_restarts)]
+            else:
+                restart_seeds = [None] * num_restarts
+            
+            n_jobs = resolve_n_jobs(n_jobs, num_restarts)
+            if n_jobs > 1:
                 if callback:
-                    callback(f"第 {restart + 1}/{num_restarts} 次重启")
-                
-                # 生成初始解
-                if initial_strategy == "random":
-                    initial_solution = self.generate_random_solution()
-                else:  # greedy
-                    initial_solution = self.generate_greedy_solution()
+                    callback(f"使用 {n_jobs} 个进程并行执行 {num_restarts} 次重启")
+                if self.seed is None:
+                    # 子进程会继承父进程的随机状态，需要为每次重启分配不同种子
+                    restart_seeds = [random.randrange(2 ** 32) for _ in range(num_restarts)]
+                results = self._run_restarts_parallel(algorithm, initial_strategy, restart_seeds, n_jobs)
+            else:
+                results = None
+            
+            for restart in range(num_restarts):
+                if results is not None:
+                    result = results[restart]
+                else:
+                    if callback:
+                        callback(f"第 {restart + 1}/{num_restarts} 次重启")
+                    result = self._run_single_restart(algorithm, initial_strategy, restart_seeds[restart], callback)
                 
-                # 验证初始解
-                is_valid, errors = validate_grouping(initial_solution, self.require_2by2, self.pairing_mode,
-                                                   self.num_males, self.num_females, self.group_size)
-                if not is_valid:
+                if result is None:
                     if callback:
                         callback(f"第 {restart + 1} 次重启: 初始解无效，跳过")
                     continue
                 
-                # 选择算法
-                if algorithm == "hill_climbing":
-                    solution, score, iterations = self.hill_climbing(initial_solution, callback)
-                else:  # simulated_annealing
-                    solution, score, iterations = self.simulated_annealing(initial_solution, callback)
-                
+                solution, score, iterations = result
                 total_iterations += iterations
                 
                 if score > best_score:
@@ -673,7 +1073,7 @@ class HeuristicSolver:
                     if callback:
                         callback(f"第 {restart + 1} 次重启找到更好解: {best_score:.1f}")
             
-            solve_time = time.time() - start_time
+            solve_time = (time.perf_counter_ns() - start_ns) / 1e9
             
             if best_solution is not None:
                 # 最终验证
@@ -693,6 +1093,7 @@ class HeuristicSolver:
                     "best_score": best_score,
                     "total_iterations": total_iterations,
                     "num_restarts": num_restarts,
+                    "n_jobs": n_jobs,
                     "solve_time": solve_time
                 }
             else:
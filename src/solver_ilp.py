@@ -4,17 +4,116 @@ ILP/MIP 求解器
 使用整数线性规划求解分组优化问题
 """
 
+from functools import lru_cache
 from typing import List, Tuple, Dict, Optional
+import importlib.util
+import os
+import shutil
+import subprocess
+import tempfile
+import time
 import warnings
+import numpy as np
 from .graph import PreferenceGraph, validate_grouping
 
+# MIP求解器优先顺序（PuLP中的求解器类名）：HiGHS（highspy接口）、HiGHS命令行，最后回退到PuLP自带的CBC
+MIP_SOLVER_PREFERENCE = ("HiGHS", "HiGHS_CMD", "PULP_CBC_CMD")
+
+# HiGHS（highspy）在同一进程内首次求解后不能再更改线程数，之后的求解固定沿用首次的线程数
+_highs_threads: Optional[int] = None
+
+# 支持 warmStart 参数（读取变量初始值作为初始可行解）的PuLP求解器
+WARM_START_SOLVERS = ("HiGHS_CMD", "PULP_CBC_CMD")
+
+# 传给CBC命令行的额外参数：绝对间隙为0，证明最优后才停止
+CBC_OPTIONS = ["allowableGap 0.0"]
+
+# 建模后端："pulp" 用PuLP建模并调用求解器；"cbc_lp" 直接生成LP文件交给CBC命令行，跳过PuLP的建模开销
+ILP_BACKENDS = ("pulp", "cbc_lp")
+
+# 生成LP文件时每行写入的项数（表达式可以跨行，避免单行过长）
+LP_TERMS_PER_LINE = 8
+
+# CBC解文件首行中"提前停止但带有整数可行解"的停止原因（"Stopped on time - objective value ..."）
+CBC_STOPPED_WITH_SOLUTION = ("time", "iterations")
+
+# 提前停止时解文件中x变量与0/1的最大允许偏差（超出说明是连续松弛解而非整数解）
+CBC_INTEGRALITY_TOLERANCE = 1e-6
+
+# 模型骨架缓存的最大条目数（按 男性人数、女性人数、组大小、是否等量男女 缓存）
+MODEL_SKELETON_CACHE_SIZE = 8
+
+
+@lru_cache(maxsize=MODEL_SKELETON_CACHE_SIZE)
+def _build_model_skeleton(num_males: int, num_females: int, group_size: int, require_2by2: bool):
+    """
+    构建与偏好无关的模型骨架：分配变量x及约束1（每人一组）、约束2（组人数）、约束2b（对称性）、约束3（性别比例）
+    
+    骨架按人数和组大小缓存，solve 中用 LpProblem.copy() 浅拷贝后再加入y变量、目标与特权约束；
+    拷贝之间共享x变量对象（初始值与求解结果写在x上），因此同一骨架不能被并发求解。
+    
+    Args:
+        num_males: 男性人数
+        num_females: 女性人数
+        group_size: 每组人数
+        require_2by2: 是否要求每组等量男女
+        
+    Returns:
+        (prob, x): 只含约束的模型和 {(人员, 组号): 变量}
+    """
+    import pulp
+    
+    males = [f"M{i}" for i in range(1, num_males + 1)]
+    females = [f"F{i}" for i in range(1, num_females + 1)]
+    all_persons = males + females
+    num_groups = (len(all_persons) + group_size - 1) // group_size
+    groups = range(num_groups)
+    
+    prob = pulp.LpProblem("DatingGrouping", pulp.LpMaximize)
+    
+    # 决策变量: x[person][group] = 1 if person in group, 0 otherwise
+    x = {}
+    for person in all_persons:
+        for group in groups:
+            x[(person, group)] = pulp.LpVariable(f"x_{person}_{group}", cat='Binary')
+    
+    # 最后一组的人数 = 总人数 - 前面组的人数，其余组恰好group_size人
+    remaining_people = len(all_persons) - (num_groups - 1) * group_size
+    capacities = {group: remaining_people if group == num_groups - 1 else group_size for group in groups}
+    
+    # 约束1：每个人只能在一个组
+    for person in all_persons:
+        prob += pulp.lpSum(x[(person, group)] for group in groups) == 1
+    
+    # 约束2：每组人数限制
+    for group in groups:
+        prob += pulp.lpSum(x[(person, group)] for person in all_persons) == capacities[group]
+    
+    # 约束2b：打破组间对称性。人数相同的组可以互换编号，将这些组按最小成员序号排序后，
+    # all_persons 中第k个人所在组的编号不超过k，因此可以固定 x[第k个人, 组g] = 0 (g > k)
+    num_symmetric_groups = num_groups if remaining_people == group_size else num_groups - 1
+    for k, person in enumerate(all_persons):
+        for group in range(k + 1, num_symmetric_groups):
+            x[(person, group)].setInitialValue(0)
+            x[(person, group)].fixValue()
+    
+    # 约束3：性别比例（如果需要），每组（含最后一组）等量男女
+    if require_2by2:
+        for group in groups:
+            expected_gender_count = capacities[group] // 2
+            prob += pulp.lpSum(x[(male, group)] for male in males) == expected_gender_count
+            prob += pulp.lpSum(x[(female, group)] for female in females) == expected_gender_count
+    
+    return prob, x
+
 
 class ILPSolver:
     """ILP求解器"""
     
     def __init__(self, graph: PreferenceGraph, require_2by2: bool = True, time_limit: int = 300, 
                  num_males: int = 12, num_females: int = 12, group_size: int = 4,
-                 privileged_guests: Optional[set] = None):
+                 privileged_guests: Optional[set] = None, threads: Optional[int] = None,
+                 backend: str = "pulp", mip_solver: Optional[str] = None):
         """
         初始化ILP求解器
         
@@ -26,7 +125,14 @@ class ILPSolver:
             num_females: 女性人数
             group_size: 每组人数
             privileged_guests: 特权嘉宾集合，这些嘉宾必须与至少一个喜欢的人同组
+            threads: MIP求解器并行分支定界的线程数，None表示使用全部CPU核
+            backend: 建模后端（见 ILP_BACKENDS）
+            mip_solver: pulp后端使用的求解器（MIP_SOLVER_PREFERENCE 中的类名），None表示按优先顺序选择
         """
+        if backend not in ILP_BACKENDS:
+            raise ValueError(f"不支持的ILP后端: {backend}")
+        if mip_solver is not None and mip_solver not in MIP_SOLVER_PREFERENCE:
+            raise ValueError(f"不支持的MIP求解器: {mip_solver}")
         self.graph = graph
         self.require_2by2 = require_2by2
         self.time_limit = time_limit
@@ -34,6 +140,9 @@ class ILPSolver:
         self.num_females = num_females
         self.group_size = group_size
         self.privileged_guests = privileged_guests or set()
+        self.threads = threads or os.cpu_count() or 4
+        self.backend = backend
+        self.mip_solver = mip_solver
         
         # 定义人员和组别
         self.males = [f"M{i}" for i in range(1, num_males + 1)]
@@ -45,160 +154,496 @@ class ILPSolver:
         self.num_groups = (total_people + group_size - 1) // group_size  # 向上取整
         self.groups = list(range(self.num_groups))
         
+        # 边的集合（graph.edges 可能是列表，成员判断为O(|E|)），只转换一次
+        self._edge_set = self.graph.edges if isinstance(self.graph.edges, (set, frozenset)) else frozenset(self.graph.edges)
+        
+        # 有得分的无序人员对 (person1, person2, 得分)，按人员顺序排列，只由边列表构建一次
+        self._scored_pairs = self._build_scored_pairs()
+        
+        # 组人数与性别比例约束在人数层面即无解时的原因（None表示可能有解）
+        self._infeasible_reason = self._check_gender_quota()
+        
         # 检查pulp可用性
         self.pulp_available = self._check_pulp()
         
     def _check_pulp(self) -> bool:
-        """检查pulp库是否可用"""
-        try:
-            import pulp
+        """检查pulp库是否可用（只查找模块，不导入；真正的导入推迟到solve中）"""
+        if importlib.util.find_spec("pulp") is not None:
             return True
-        except ImportError:
-            warnings.warn("pulp库不可用，将自动回退到启发式算法")
-            return False
+        warnings.warn("pulp库不可用，将自动回退到启发式算法")
+        return False
+    
+    def _check_gender_quota(self) -> Optional[str]:
+        """
+        检查每组的男女名额之和能否与男女总人数一致（只看人数，不需要建模）
+        
+        Returns:
+            无解原因；可能有解时返回None
+        """
+        if not self.require_2by2:
+            return None
+        if self.group_size % 2:
+            return f"每组等量男女要求组大小为偶数，当前组大小为{self.group_size}"
+        
+        remaining_people = len(self.all_persons) - (self.num_groups - 1) * self.group_size
+        if remaining_people % 2:
+            return f"最后一组人数为{remaining_people}，无法等分男女"
+        
+        expected_gender_count = (self.num_groups - 1) * (self.group_size // 2) + remaining_people // 2
+        if self.num_males != expected_gender_count or self.num_females != expected_gender_count:
+            return (f"每组等量男女需要男女各{expected_gender_count}人，"
+                    f"实际男性{self.num_males}人、女性{self.num_females}人")
+        return None
+    
+    def _build_scored_pairs(self) -> List[Tuple[str, str, float]]:
+        """
+        从边列表汇总每对人员同组时的边得分（单向1分，互相喜欢总共mutual_weight分）
+        
+        Returns:
+            [(person1, person2, 得分)]，person1 在 all_persons 中排在 person2 之前，
+            按 (person1, person2) 的人员顺序排列，只包含得分为正的人员对
+        """
+        num_persons = len(self.all_persons)
+        position = {person: i for i, person in enumerate(self.all_persons)}
+        edge_index = [(position[src], position[dst]) for src, dst in self._edge_set
+                      if src in position and dst in position]
+        
+        # 邻接矩阵 E[i, j] = 1 表示 i 喜欢 j；S = E + Eᵀ 为每对人员之间的边方向数
+        edge_matrix = np.zeros((num_persons, num_persons), dtype=np.int8)
+        if edge_index:
+            src_idx, dst_idx = np.array(edge_index, dtype=np.intp).T
+            edge_matrix[src_idx, dst_idx] = 1
+        directions = edge_matrix + edge_matrix.T
+        
+        # 双向都有边时使用互相喜欢的总权重
+        scores = np.where(directions == 2, float(self.graph.mutual_weight), directions.astype(np.float64))
+        
+        # 只取上三角（i < j，不含自环），triu_indices 按 (i, j) 的行优先顺序排列
+        rows, cols = np.triu_indices(num_persons, 1)
+        pair_scores = scores[rows, cols]
+        keep = pair_scores > 0
+        return [(self.all_persons[i], self.all_persons[j], score)
+                for i, j, score in zip(rows[keep].tolist(), cols[keep].tolist(), pair_scores[keep].tolist())]
+    
+    def _create_mip_solver(self, pulp, warm_start: bool = False) -> Tuple[object, str]:
+        """
+        按 MIP_SOLVER_PREFERENCE 选择第一个可用的求解器（指定了 mip_solver 时只尝试该求解器）
+        
+        Args:
+            pulp: 已导入的pulp模块
+            warm_start: 是否使用变量初始值热启动（仅 WARM_START_SOLVERS 中的求解器支持）
+            
+        Returns:
+            (solver, solver_name)
+        """
+        global _highs_threads
+        for solver_name in (MIP_SOLVER_PREFERENCE if self.mip_solver is None else (self.mip_solver,)):
+            solver_class = getattr(pulp, solver_name, None)
+            if solver_class is None:
+                continue  # 旧版PuLP没有该求解器
+            threads = self.threads
+            if solver_name == "HiGHS":
+                # 线程数按进程固定：首次使用HiGHS时记录，此后不同的threads设置不再生效
+                if _highs_threads is None:
+                    _highs_threads = self.threads
+                threads = _highs_threads
+            options = {"threads": threads}
+            if warm_start and solver_name in WARM_START_SOLVERS:
+                options["warmStart"] = True
+            if solver_name == "PULP_CBC_CMD":
+                options["options"] = list(CBC_OPTIONS)
+            try:
+                solver = solver_class(timeLimit=self.time_limit, msg=False, **options)
+                if solver.available():
+                    return solver, solver_name
+            except Exception:
+                continue
+        # PuLP自带CBC，兜底直接使用
+        return pulp.PULP_CBC_CMD(timeLimit=self.time_limit, msg=False, warmStart=warm_start,
+                                 threads=self.threads, options=list(CBC_OPTIONS)), "PULP_CBC_CMD"
+    
+    def _greedy_initial_solution(self) -> List[List[str]]:
+        """
+        贪心构造初始可行解：依次填满各组，每个名额选入与组内已有成员边得分之和最大的人
+        （得分相同时取人员顺序靠前者；每组等量男女时同时满足男女名额）
+        
+        Returns:
+            分组方案
+        """
+        pair_score: Dict[Tuple[str, str], float] = {}
+        for person1, person2, edge_score in self._scored_pairs:
+            pair_score[(person1, person2)] = edge_score
+            pair_score[(person2, person1)] = edge_score
+        male_set = set(self.males)
+        
+        remaining_people = len(self.all_persons) - (self.num_groups - 1) * self.group_size
+        unassigned = list(self.all_persons)
+        solution = []
+        for group in self.groups:
+            size = remaining_people if group == self.num_groups - 1 else self.group_size
+            gender_quota = {True: size // 2, False: size // 2} if self.require_2by2 else None
+            members = []
+            for _ in range(size):
+                candidates = [person for person in unassigned
+                              if gender_quota is None or gender_quota[person in male_set] > 0]
+                best = max(candidates, key=lambda person: sum(pair_score.get((person, member), 0.0)
+                                                              for member in members))
+                members.append(best)
+                unassigned.remove(best)
+                if gender_quota is not None:
+                    gender_quota[best in male_set] -= 1
+            solution.append(members)
+        return solution
+    
+    def _canonical_group_order(self, solution: List[List[str]]) -> Optional[List[List[str]]]:
+        """
+        将分组方案的组编号调整为满足对称性约束（约束2b）的顺序：
+        人数与 group_size 相同的组按最小成员序号排序，人数不足的最后一组放在最后
+        
+        Args:
+            solution: 分组方案
+            
+        Returns:
+            调整顺序后的分组方案；方案无效时返回None
+        """
+        is_valid, _ = validate_grouping(solution, self.require_2by2, False,
+                                        self.num_males, self.num_females, self.group_size)
+        if not is_valid or len(solution) != self.num_groups:
+            return None
+        
+        position = {person: i for i, person in enumerate(self.all_persons)}
+        if any(member not in position for group in solution for member in group):
+            return None
+        full_groups = [group for group in solution if len(group) == self.group_size]
+        short_groups = [group for group in solution if len(group) != self.group_size]
+        if len(short_groups) > 1:
+            return None
+        full_groups.sort(key=lambda group: min(position[member] for member in group))
+        return full_groups + short_groups
+    
+    def _warm_start_groups(self, initial_solution: Optional[List[List[str]]]) -> Dict[str, int]:
+        """
+        热启动用的初始解（每人所在的组号）
+        
+        Args:
+            initial_solution: 调用方给出的初始分组方案；未提供或无效时使用贪心构造的初始解
+            
+        Returns:
+            {人员: 组号}，组号顺序满足对称性约束
+        """
+        warm_start = self._canonical_group_order(initial_solution) if initial_solution is not None else None
+        if warm_start is None:
+            if initial_solution is not None:
+                warnings.warn("ILP初始解无效，改用贪心构造的初始解")
+            warm_start = self._greedy_initial_solution()
+        return {person: group for group, members in enumerate(warm_start) for person in members}
+    
+    def _find_cbc_executable(self) -> Optional[str]:
+        """查找CBC可执行文件：优先使用PATH中的cbc，其次使用PuLP自带的CBC"""
+        cbc_path = shutil.which("cbc")
+        if cbc_path is None and self.pulp_available:
+            import pulp
+            bundled_cbc = pulp.PULP_CBC_CMD()
+            if bundled_cbc.available():
+                cbc_path = bundled_cbc.path
+        return cbc_path
     
-    def _calculate_edge_score(self, person1: str, person2: str, group: int) -> float:
+    def _emit_lp_file(self, path: str) -> Dict[str, str]:
         """
-        计算两个人在同一组时的边得分
+        直接用字符串生成CPLEX LP格式的模型文件（与PuLP建模的变量、约束一致）
         
         Args:
-            person1: 人员1
-            person2: 人员2  
-            group: 组别ID
+            path: LP文件路径
             
         Returns:
-            得分（单向1分，互相喜欢总共mutual_weight分）
+            {变量名: 类型}，类型为 "x"、"y" 或 "z"，用于写入初始解和读取结果
+        """
+        remaining_people = len(self.all_persons) - (self.num_groups - 1) * self.group_size
+        capacities = {group: remaining_people if group == self.num_groups - 1 else self.group_size
+                      for group in self.groups}
+        num_symmetric_groups = self.num_groups if remaining_people == self.group_size else self.num_groups - 1
+        position = {person: k for k, person in enumerate(self.all_persons)}
+        
+        def x_name(person, group):
+            return f"x_{person}_{group}"
+        
+        def expr(terms):
+            """[(系数, 变量名)] -> 跨行书写的线性表达式"""
+            parts = [f"{'-' if coef < 0 else '+'} {abs(coef):.12g} {name}" for coef, name in terms]
+            return "\n ".join(" ".join(parts[i:i + LP_TERMS_PER_LINE]) for i in range(0, len(parts), LP_TERMS_PER_LINE))
+        
+        variables: Dict[str, str] = {x_name(person, group): "x" for person in self.all_persons for group in self.groups}
+        objective, constraints = [], []
+        
+        # 两人同组的辅助变量（与 solve 相同：跳过被对称性约束固定为0的组）
+        for group in self.groups:
+            for person1, person2, edge_score in self._scored_pairs:
+                if position[person1] < group < num_symmetric_groups:
+                    continue
+                y_name = f"y_{person1}_{person2}_{group}"
+                variables[y_name] = "y"
+                objective.append((edge_score, y_name))
+                constraints.append(f"{expr([(1, y_name), (-1, x_name(person1, group))])} <= 0")
+                constraints.append(f"{expr([(1, y_name), (-1, x_name(person2, group))])} <= 0")
+        
+        # 约束1：每个人只能在一个组；约束2：每组人数；约束3：每组等量男女
+        for person in self.all_persons:
+            constraints.append(f"{expr([(1, x_name(person, group)) for group in self.groups])} = 1")
+        for group in self.groups:
+            constraints.append(f"{expr([(1, x_name(person, group)) for person in self.all_persons])} = {capacities[group]}")
+        if self.require_2by2:
+            for group in self.groups:
+                for members in (self.males, self.females):
+                    constraints.append(f"{expr([(1, x_name(person, group)) for person in members])} = {capacities[group] // 2}")
+        
+        # 约束4：特权嘉宾至少在一个组中与喜欢的人同组
+        for privileged_guest in self.privileged_guests:
+            liked_persons = [person for person in self.graph.out_neighbors(privileged_guest) if person in position]
+            if not liked_persons or privileged_guest not in position:
+                continue
+            z_names = []
+            for group in self.groups:
+                z_name = f"z_{privileged_guest}_{group}"
+                variables[z_name] = "z"
+                z_names.append(z_name)
+                liked_terms = [(-1, x_name(person, group)) for person in liked_persons]
+                guest_term = (-1, x_name(privileged_guest, group))
+                # z <= x[特权嘉宾, 组]；z <= sum(x[喜欢的人, 组])；z >= x[特权嘉宾, 组] + sum(x[喜欢的人, 组]) - len(liked_persons)
+                constraints.append(f"{expr([(1, z_name), guest_term])} <= 0")
+                constraints.append(f"{expr([(1, z_name)] + liked_terms)} <= 0")
+                constraints.append(f"{expr([(1, z_name), guest_term] + liked_terms)} >= {-len(liked_persons)}")
+            constraints.append(f"{expr([(1, z_name) for z_name in z_names])} >= 1")
+        
+        lines = ["\\* DatingGrouping *\\", "Maximize"]
+        # 没有任何得分时目标为常数0，写一个系数为0的项保持格式合法
+        lines.append(f"obj: {expr(objective or [(0, x_name(self.all_persons[0], 0))])}")
+        lines.append("Subject To")
+        lines.extend(f"c{i}: {constraint}" for i, constraint in enumerate(constraints, 1))
+        lines.append("Bounds")
+        # 约束2b：对称性约束固定为0的分配变量
+        lines.extend(f" {x_name(person, group)} = 0" for k, person in enumerate(self.all_persons)
+                     for group in range(k + 1, num_symmetric_groups))
+        lines.extend(f" 0 <= {name} <= 1" for name, kind in variables.items() if kind == "y")
+        lines.append("Binaries")
+        lines.extend(f" {name}" for name, kind in variables.items() if kind != "y")
+        lines.append("End")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return variables
+    
+    def _solve_with_cbc_lp(self, initial_solution: Optional[List[List[str]]]) -> Tuple[Optional[List[List[str]]], Dict]:
         """
-        score = 0.0
+        生成LP文件并通过子进程调用CBC求解（不经过PuLP建模）
         
-        # 检查person1 -> person2
-        if (person1, person2) in self.graph.edges:
-            score += 1.0
+        Args:
+            initial_solution: 热启动用的初始分组方案
             
-        # 检查person2 -> person1
-        if (person2, person1) in self.graph.edges:
-            score += 1.0
+        Returns:
+            (solution, info): 解决方案和求解信息
+        """
+        cbc_path = self._find_cbc_executable()
+        if cbc_path is None:
+            return None, {"status": "failed", "message": "找不到CBC可执行文件"}
+        
+        try:
+            start_time = time.time()
+            with tempfile.TemporaryDirectory(prefix="dating_ilp_") as tmp_dir:
+                lp_path = os.path.join(tmp_dir, "model.lp")
+                mst_path = os.path.join(tmp_dir, "warm.mst")
+                sol_path = os.path.join(tmp_dir, "model.sol")
+                variables = self._emit_lp_file(lp_path)
+                
+                # 热启动初始解文件（CBC solution格式，按变量名读取）
+                group_of = self._warm_start_groups(initial_solution)
+                with open(mst_path, "w", encoding="utf-8") as f:
+                    f.write("Stopped on time - objective value 0\n")
+                    for i, (name, kind) in enumerate(variables.items()):
+                        if kind == "z":
+                            continue
+                        parts = name.split("_")
+                        members, group = parts[1:-1], int(parts[-1])
+                        value = int(all(group_of[person] == group for person in members))
+                        f.write(f"{i:>7} {name} {value:>15} {0:>23}\n")
+                
+                cmd = [cbc_path, lp_path, "-mips", mst_path, "-sec", str(self.time_limit),
+                       "-threads", str(self.threads), "-timeMode", "elapsed"]
+                for option in CBC_OPTIONS:
+                    cmd.extend(f"-{option}".split())
+                cmd.extend(["-branch", "-printingOptions", "all", "-solution", sol_path])
+                subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               stdin=subprocess.DEVNULL, check=True)
+                if not os.path.exists(sol_path):
+                    return None, {"status": "error", "message": "求解异常: CBC未生成解文件"}
+                
+                with open(sol_path, encoding="utf-8") as f:
+                    status_words = f.readline().split()
+                    values = {}
+                    for line in f:
+                        fields = line.split()
+                        if fields and fields[0] == "**":  # 不可行解中违反约束的行带 ** 标记
+                            fields = fields[1:]
+                        if len(fields) >= 3 and variables.get(fields[1]) == "x":
+                            values[fields[1]] = float(fields[2])
+            solve_time = time.time() - start_time
             
-        # 如果是互相喜欢，调整权重
-        if score == 2.0:  # 双向都有边
-            # mutual_weight是互相喜欢的总权重，所以直接使用
-            score = self.graph.mutual_weight
+            status = status_words[0] if status_words else "Undefined"
+            if not self._cbc_found_solution(status_words, values):
+                if status in ("Infeasible", "Integer", "Unbounded"):
+                    return None, {"status": "infeasible", "message": f"问题无解: {status}"}
+                return None, {"status": "not_solved", "message": f"求解未完成: {' '.join(status_words) or status}"}
             
-        return score
+            solution = [[] for _ in range(self.num_groups)]
+            for person in self.all_persons:
+                for group in self.groups:
+                    if values.get(f"x_{person}_{group}", 0.0) > 0.5:
+                        solution[group].append(person)
+                        break
+            
+            is_valid, errors = validate_grouping(solution, self.require_2by2, False,
+                                                 self.num_males, self.num_females, self.group_size)
+            if not is_valid:
+                return None, {
+                    "status": "invalid_solution",
+                    "message": "求解结果无效",
+                    "errors": errors
+                }
+            
+            return solution, {
+                "status": "optimal",
+                "objective_value": float(status_words[-1]),
+                "solve_time": solve_time,
+                "solver": "CBC_LP"
+            }
+        except Exception as e:
+            return None, {
+                "status": "error",
+                "message": f"求解异常: {str(e)}"
+            }
     
-    def solve(self) -> Tuple[Optional[List[List[str]]], Dict]:
+    @staticmethod
+    def _cbc_found_solution(status_words: List[str], values: Dict[str, float]) -> bool:
+        """
+        CBC解文件是否给出了整数可行解
+        
+        只接受 "Optimal - objective value ..."，以及超时/达到迭代上限时的
+        "Stopped on time - objective value ..." / "Stopped on iterations - objective value ..."；
+        后两种还要求x变量均为0/1（"Stopped on time (no integer solution - continuous used)"等为连续松弛解）。
+        
+        Args:
+            status_words: 解文件首行按空白切分的词
+            values: x变量名 -> 取值
+            
+        Returns:
+            是否可以从values中提取分组方案
+        """
+        if status_words[:1] == ["Optimal"]:
+            return True
+        if (len(status_words) < 6 or status_words[:2] != ["Stopped", "on"]
+                or status_words[2] not in CBC_STOPPED_WITH_SOLUTION
+                or status_words[3:6] != ["-", "objective", "value"]):
+            return False
+        return all(min(abs(value), abs(1.0 - value)) <= CBC_INTEGRALITY_TOLERANCE for value in values.values())
+    
+    def solve(self, initial_solution: Optional[List[List[str]]] = None) -> Tuple[Optional[List[List[str]]], Dict]:
         """
         求解分组问题
         
+        Args:
+            initial_solution: 热启动用的初始分组方案（如启发式的解）；
+                             未提供或无效时使用贪心构造的初始解
+        
         Returns:
             (solution, info): 解决方案和求解信息
         """
+        if self._infeasible_reason is not None:
+            # 人数层面已无解，不必构建模型交给求解器判断
+            return None, {"status": "infeasible", "message": f"问题无解: {self._infeasible_reason}"}
+        
+        if self.backend == "cbc_lp":
+            return self._solve_with_cbc_lp(initial_solution)
+        
         if not self.pulp_available:
             return None, {"status": "failed", "message": "pulp不可用"}
         
         try:
             import pulp
             
-            # 创建问题
-            prob = pulp.LpProblem("DatingGrouping", pulp.LpMaximize)
+            # 变量x与约束1~3只取决于人数和组大小，从缓存的模型骨架浅拷贝，只有y、目标与特权约束按偏好构建
+            skeleton, x = _build_model_skeleton(self.num_males, self.num_females, self.group_size, self.require_2by2)
+            prob = skeleton.copy()
             
-            # 决策变量: x[person][group] = 1 if person in group, 0 otherwise
-            x = {}
-            for person in self.all_persons:
-                for group in self.groups:
-                    x[(person, group)] = pulp.LpVariable(f"x_{person}_{group}", cat='Binary')
+            remaining_people = len(self.all_persons) - (self.num_groups - 1) * self.group_size
+            num_symmetric_groups = self.num_groups if remaining_people == self.group_size else self.num_groups - 1
+            position = {person: k for k, person in enumerate(self.all_persons)}
             
             # 引入辅助变量来处理"两人同组"的逻辑
             # y[(person1, person2, group)] = 1 当且仅当 person1 和 person2 都在 group
+            # 目标中y的系数均为正，最大化时 y 会取到上界 min(x1, x2)；x为0/1时y自然为0/1，
+            # 因此y只需声明为[0, 1]连续变量并保留两条上界约束
             y = {}
             objective = 0
             
+            # 只遍历有得分的人员对（无边的人员对不需要辅助变量）
             for group in self.groups:
-                for i, person1 in enumerate(self.all_persons):
-                    for j, person2 in enumerate(self.all_persons):
-                        if i < j:  # 避免重复计算
-                            edge_score = self._calculate_edge_score(person1, person2, group)
-                            if edge_score > 0:
-                                # 创建辅助变量
-                                y[(person1, person2, group)] = pulp.LpVariable(f"y_{person1}_{person2}_{group}", cat='Binary')
-                                
-                                # 约束：y = 1 当且仅当两人都在同组
-                                # y <= x1 and y <= x2 and y >= x1 + x2 - 1
-                                prob += y[(person1, person2, group)] <= x[(person1, group)]
-                                prob += y[(person1, person2, group)] <= x[(person2, group)]
-                                prob += y[(person1, person2, group)] >= x[(person1, group)] + x[(person2, group)] - 1
-                                
-                                # 目标函数
-                                objective += edge_score * y[(person1, person2, group)]
+                for person1, person2, edge_score in self._scored_pairs:
+                    # person1 排在 person2 之前：person1 已被约束2b固定不在该组时，y恒为0，不需要创建
+                    if position[person1] < group < num_symmetric_groups:
+                        continue
+                    # 创建辅助变量
+                    y[(person1, person2, group)] = pulp.LpVariable(f"y_{person1}_{person2}_{group}",
+                                                                   lowBound=0, upBound=1, cat='Continuous')
+                    
+                    # 约束：y <= x1 and y <= x2（两人都在同组时y才能为1）
+                    prob += y[(person1, person2, group)] <= x[(person1, group)]
+                    prob += y[(person1, person2, group)] <= x[(person2, group)]
+                    
+                    # 目标函数
+                    objective += edge_score * y[(person1, person2, group)]
             
             prob += objective
             
-            # 约束1：每个人只能在一个组
-            for person in self.all_persons:
-                prob += pulp.lpSum([x[(person, group)] for group in self.groups]) == 1
-            
-            # 约束2：每组人数限制
-            for group in self.groups:
-                if group == self.num_groups - 1:  # 最后一组
-                    # 最后一组的人数 = 总人数 - 前面组的人数
-                    remaining_people = len(self.all_persons) - (self.num_groups - 1) * self.group_size
-                    prob += pulp.lpSum([x[(person, group)] for person in self.all_persons]) == remaining_people
-                else:
-                    # 非最后一组，恰好group_size人
-                    prob += pulp.lpSum([x[(person, group)] for person in self.all_persons]) == self.group_size
-            
-            # 约束3：性别比例（如果需要）
-            if self.require_2by2:
-                for group in self.groups:
-                    if group == self.num_groups - 1:  # 最后一组
-                        # 最后一组保持1:1比例
-                        remaining_people = len(self.all_persons) - (self.num_groups - 1) * self.group_size
-                        males_in_last_group = remaining_people // 2
-                        females_in_last_group = remaining_people // 2
-                        
-                        prob += pulp.lpSum([x[(male, group)] for male in self.males]) == males_in_last_group
-                        prob += pulp.lpSum([x[(female, group)] for female in self.females]) == females_in_last_group
-                    else:
-                        # 非最后一组，每组等量男女
-                        expected_gender_count = self.group_size // 2
-                        prob += pulp.lpSum([x[(male, group)] for male in self.males]) == expected_gender_count
-                        prob += pulp.lpSum([x[(female, group)] for female in self.females]) == expected_gender_count
-            
             # 约束4：特权嘉宾约束
             if self.privileged_guests:
                 for privileged_guest in self.privileged_guests:
                     # 获取该特权嘉宾喜欢的人列表
-                    liked_persons = [dst for src, dst in self.graph.edges if src == privileged_guest]
+                    liked_persons = self.graph.out_neighbors(privileged_guest)
                     
                     if liked_persons:
                         # 对于每个组，如果特权嘉宾在该组，则至少有一个喜欢的人也在该组
+                        z_vars = []
                         for group in self.groups:
                             # 创建辅助变量 z[privileged_guest, group] 
                             # = 1 if 特权嘉宾在组group且至少有一个喜欢的人在同组
                             z_var_name = f"z_{privileged_guest}_{group}"
                             z = pulp.LpVariable(z_var_name, cat='Binary')
+                            z_vars.append(z)
+                            
+                            # 该组中喜欢的人数表达式，下面两条约束共用
+                            liked_in_group = pulp.lpSum(x[(liked_person, group)] for liked_person in liked_persons)
                             
                             # z <= x[特权嘉宾, 组] （如果特权嘉宾不在组，z必须为0）
                             prob += z <= x[(privileged_guest, group)]
                             
                             # z <= sum(x[喜欢的人, 组]) （如果没有喜欢的人在组，z必须为0）
-                            prob += z <= pulp.lpSum([x[(liked_person, group)] for liked_person in liked_persons])
+                            prob += z <= liked_in_group
                             
                             # z >= x[特权嘉宾, 组] + sum(x[喜欢的人, 组]) - len(liked_persons)
                             # 这确保如果特权嘉宾在组且至少有一个喜欢的人在组，z就是1
-                            prob += z >= x[(privileged_guest, group)] + pulp.lpSum([x[(liked_person, group)] for liked_person in liked_persons]) - len(liked_persons)
+                            prob += z >= x[(privileged_guest, group)] + liked_in_group - len(liked_persons)
                         
                         # 特权嘉宾必须满足约束：sum(z over all groups) >= 1
-                        # 即至少在一个组中同时有特权嘉宾和他喜欢的人
-                        z_vars = []
-                        for group in self.groups:
-                            z_var_name = f"z_{privileged_guest}_{group}"
-                            z_vars.append(pulp.LpVariable(z_var_name, cat='Binary'))
-                        
+                        # 即至少在一个组中同时有特权嘉宾和他喜欢的人（复用上面创建的z，不重复创建同名变量）
                         prob += pulp.lpSum(z_vars) >= 1
             
+            # 热启动：给出初始可行解作为分支定界的下界，剪掉大部分搜索节点
+            group_of = self._warm_start_groups(initial_solution)
+            for (person, group), var in x.items():
+                var.setInitialValue(1 if group_of[person] == group else 0)
+            for (person1, person2, group), var in y.items():
+                var.setInitialValue(1 if group_of[person1] == group_of[person2] == group else 0)
+            
             # 求解
-            solver = pulp.PULP_CBC_CMD(timeLimit=self.time_limit, msg=False)
+            solver, solver_name = self._create_mip_solver(pulp, warm_start=True)
             prob.solve(solver)
             
             # 处理结果
@@ -209,8 +654,11 @@ class ILPSolver:
                 solution = [[] for _ in range(self.num_groups)]
                 for person in self.all_persons:
                     for group in self.groups:
-                        if x[(person, group)].varValue == 1:
+                        # HiGHS/CBC返回的整数变量值可能带浮点误差（如0.9999999），按0.5取整判断；
+                        # 未赋值的变量 varValue 为None，视为0
+                        if (x[(person, group)].varValue or 0) > 0.5:
                             solution[group].append(person)
+                            break  # 约束1保证每人只在一个组
                 
                 # 验证解的有效性
                 is_valid, errors = validate_grouping(solution, self.require_2by2, False, 
@@ -226,7 +674,7 @@ class ILPSolver:
                     "status": "optimal",
                     "objective_value": pulp.value(prob.objective),
                     "solve_time": solver.actualSolve,
-                    "solver": "PULP_CBC"
+                    "solver": solver_name
                 }
             
             elif status in ['Infeasible', 'Unbounded']:
@@ -246,12 +694,14 @@ class ILPSolver:
                 "message": f"求解异常: {str(e)}"
             }
     
-    def solve_with_callback(self, callback=None) -> Tuple[Optional[List[List[str]]], Dict]:
+    def solve_with_callback(self, callback=None,
+                            initial_solution: Optional[List[List[str]]] = None) -> Tuple[Optional[List[List[str]]], Dict]:
         """
         带回调的求解方法
         
         Args:
             callback: 回调函数，用于报告进度
+            initial_solution: 热启动用的初始分组方案
             
         Returns:
             (solution, info): 解决方案和求解信息
@@ -259,7 +709,7 @@ class ILPSolver:
         if callback:
             callback("开始ILP求解...")
             
-        result = self.solve()
+        result = self.solve(initial_solution)
         
         if callback:
             if result[0] is not None:
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+匹配求解器
+将分组问题归约为带权二分图匹配（指派问题），用匈牙利算法求解
+"""
+
+import random
+from typing import List, Tuple, Dict, Optional
+import numpy as np
+from .graph import PreferenceGraph, validate_grouping
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy为可选依赖，不可用时使用内置的匈牙利算法
+    linear_sum_assignment = None
+
+# 交替指派的最大轮数（每轮依次重新指派男性和女性）
+MAX_ASSIGNMENT_ROUNDS = 50
+
+# 判断得分是否提升的容差（得分为浮点数累加）
+SCORE_TOLERANCE = 1e-9
+
+
+def _hungarian_min_cost(cost: np.ndarray) -> List[int]:
+    """
+    匈牙利算法（最短增广路，O(n²m)）：行数不超过列数，每行指派一个不同的列使总代价最小
+
+    Args:
+        cost: n×m 代价矩阵（n <= m）
+
+    Returns:
+        每行指派的列下标
+    """
+    n, m = cost.shape
+    c = cost.tolist()
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    row_of_col = [0] * (m + 1)  # 列j当前指派的行（1起始，0表示未指派）
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        row_of_col[0] = i
+        j0 = 0
+        min_v = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = row_of_col[j0]
+            delta = inf
+            j1 = 0
+            row = c[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < min_v[j]:
+                        min_v[j] = cur
+                        way[j] = j0
+                    if min_v[j] < delta:
+                        delta = min_v[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[row_of_col[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_v[j] -= delta
+            j0 = j1
+            if row_of_col[j0] == 0:
+                break
+        # 沿增广路翻转指派
+        while j0:
+            j1 = way[j0]
+            row_of_col[j0] = row_of_col[j1]
+            j0 = j1
+
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if row_of_col[j]:
+            assignment[row_of_col[j] - 1] = j - 1
+    return assignment
+
+
+def max_weight_assignment(weights: np.ndarray) -> List[int]:
+    """
+    最大权指派：行数不超过列数，每行指派一个不同的列使总权重最大
+
+    Args:
+        weights: n×m 权重矩阵（n <= m）
+
+    Returns:
+        每行指派的列下标
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape[0] == 0:
+        return []
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(weights, maximize=True)
+        assignment = [0] * weights.shape[0]
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            assignment[row] = col
+        return assignment
+    return _hungarian_min_cost(-weights)
+
+
+class MatchingSolver:
+    """匹配求解器（偏好只在男女之间时，组得分可拆分为组内每对男女的得分之和）"""
+
+    def __init__(self, graph: PreferenceGraph, require_2by2: bool = True,
+                 num_males: int = 12, num_females: int = 12, group_size: int = 4,
+                 pairing_mode: bool = False, privileged_guests: Optional[set] = None,
+                 num_restarts: int = 10, seed: Optional[int] = None):
+        """
+        初始化匹配求解器
+
+        Args:
+            graph: 偏好图
+            require_2by2: 是否要求每组等量男女（分组模式只支持等量男女）
+            num_males: 男性人数
+            num_females: 女性人数
+            group_size: 每组人数
+            pairing_mode: 是否为一男一女配对模式
+            privileged_guests: 特权嘉宾集合（匹配模型无法表达该约束，非空时不支持求解）
+            num_restarts: 分组模式下交替指派的随机重启次数
+            seed: 随机种子
+        """
+        self.graph = graph
+        self.require_2by2 = require_2by2
+        self.num_males = num_males
+        self.num_females = num_females
+        self.group_size = group_size
+        self.pairing_mode = pairing_mode
+        self.privileged_guests = privileged_guests or set()
+        self.num_restarts = num_restarts
+        self.seed = seed
+
+        # 定义人员
+        self.males = [f"M{i}" for i in range(1, num_males + 1)]
+        self.females = [f"F{i}" for i in range(1, num_females + 1)]
+
+        # 计算分组数量及每组的男女名额
+        if pairing_mode:
+            self.num_groups = min(num_males, num_females)
+        else:
+            total_people = num_males + num_females
+            self.num_groups = (total_people + group_size - 1) // group_size  # 向上取整
+        last_group_size = num_males + num_females - (self.num_groups - 1) * group_size
+        self.gender_quota = [group_size // 2] * (self.num_groups - 1) + [last_group_size // 2]
+
+        # 男女配对得分矩阵：pair_scores[i, j] = 男i与女j同组时两人之间的边得分
+        self.pair_scores = np.array([[graph.group_total_score([male, female]) for female in self.females]
+                                     for male in self.males], dtype=np.float64).reshape(num_males, num_females)
+
+    def unsupported_reason(self) -> Optional[str]:
+        """
+        当前配置不能用匹配模型求解的原因
+
+        Returns:
+            原因说明；支持时返回None
+        """
+        if self.privileged_guests:
+            return "匹配求解器不支持特权嘉宾约束"
+        if self._has_same_gender_edges():
+            # 同性之间的边不在男女配对得分矩阵中，求解时会被忽略，目标与实际得分不一致
+            return "匹配求解器要求偏好只在男女之间，偏好数据中存在同性之间的偏好"
+        if self.pairing_mode:
+            return None
+        if not self.require_2by2:
+            return "匹配求解器的分组模式要求每组等量男女"
+        if self.group_size % 2 or sum(self.gender_quota) != self.num_males or self.num_males != self.num_females:
+            return "匹配求解器要求男女人数相等且每组（含最后一组）可以等分男女"
+        return None
+
+    def _has_same_gender_edges(self) -> bool:
+        """偏好图中是否存在同性（都在男性或都在女性名单中）之间的边"""
+        males, females = set(self.males), set(self.females)
+        return any((src in males and dst in males) or (src in females and dst in females)
+                   for src, dst in self.graph.edges)
+    
+    def solve(self) -> Tuple[Optional[List[List[str]]], Dict]:
+        """
+        求解分组问题
+
+        配对模式为男女之间的最大权匹配，直接得到最优解；
+        分组模式固定一种性别的分组，另一种性别到各组名额的指派是最大权指派问题，
+        两种性别交替重新指派直到得分不再提升（局部最优，多次随机重启取最好）。
+
+        Returns:
+            (solution, info): 解决方案和求解信息
+        """
+        reason = self.unsupported_reason()
+        if reason is not None:
+            return None, {"status": "unsupported", "message": reason}
+
+        try:
+            if self.pairing_mode:
+                solution, status, rounds = self._solve_pairing(), "optimal", 1
+            else:
+                solution, rounds = self._solve_groups()
+                status = "local_optimum"
+
+            is_valid, errors = validate_grouping(solution, self.require_2by2, self.pairing_mode,
+                                                 self.num_males, self.num_females, self.group_size)
+            if not is_valid:
+                return None, {
+                    "status": "invalid_solution",
+                    "message": "求解结果无效",
+                    "errors": errors
+                }
+
+            score = self.graph.calculate_total_score(solution)
+            return solution, {
+                "status": status,
+                "objective_value": score,
+                "best_score": score,
+                "rounds": rounds,
+                "solver": "MATCHING"
+            }
+        except Exception as e:
+            return None, {
+                "status": "error",
+                "message": f"求解异常: {str(e)}"
+            }
+
+    def _solve_pairing(self) -> List[List[str]]:
+        """配对模式：男女最大权匹配，按男性编号输出 [男, 女]"""
+        if self.num_males <= self.num_females:
+            female_of = max_weight_assignment(self.pair_scores)
+            return [[male, self.females[j]] for male, j in zip(self.males, female_of)]
+        male_of = max_weight_assignment(self.pair_scores.T)
+        pairs = sorted((i, j) for j, i in enumerate(male_of))
+        return [[self.males[i], self.females[j]] for i, j in pairs]
+
+    def _solve_groups(self) -> Tuple[List[List[str]], int]:
+        """分组模式：交替指派男性和女性到各组名额，返回 (最好的分组方案, 总轮数)"""
+        # 名额序号 -> 组号（每组按 gender_quota 展开）
+        slot_group = np.repeat(np.arange(self.num_groups), self.gender_quota)
+        rng = random.Random(self.seed)
+        best_score, best_assignment = None, None
+        total_rounds = 0
+
+        for restart in range(self.num_restarts):
+            # 第一次按编号顺序依次填入各组，之后随机打乱
+            male_slots = list(range(self.num_males))
+            female_slots = list(range(self.num_females))
+            if restart:
+                rng.shuffle(male_slots)
+                rng.shuffle(female_slots)
+            male_group = slot_group[male_slots]
+            female_group = slot_group[female_slots]
+            score = self._assignment_score(male_group, female_group)
+
+            for _ in range(MAX_ASSIGNMENT_ROUNDS):
+                total_rounds += 1
+                # 固定女性分组，每个男性到各组的得分为其与该组女性的配对得分之和
+                male_gain = self.pair_scores @ self._group_indicator(female_group)
+                male_group = slot_group[max_weight_assignment(male_gain[:, slot_group])]
+                # 固定男性分组，重新指派女性
+                female_gain = self.pair_scores.T @ self._group_indicator(male_group)
+                female_group = slot_group[max_weight_assignment(female_gain[:, slot_group])]
+
+                new_score = self._assignment_score(male_group, female_group)
+                if new_score <= score + SCORE_TOLERANCE:
+                    break
+                score = new_score
+
+            if best_score is None or score > best_score + SCORE_TOLERANCE:
+                best_score, best_assignment = score, (male_group, female_group)
+
+        male_group, female_group = best_assignment
+        solution = [[] for _ in range(self.num_groups)]
+        for male, g in zip(self.males, male_group.tolist()):
+            solution[g].append(male)
+        for female, g in zip(self.females, female_group.tolist()):
+            solution[g].append(female)
+        return solution, total_rounds
+
+    def _group_indicator(self, group_of: np.ndarray) -> np.ndarray:
+        """组归属指示矩阵：indicator[k, g] = 1 当第k人在组g"""
+        indicator = np.zeros((len(group_of), self.num_groups))
+        indicator[np.arange(len(group_of)), group_of] = 1.0
+        return indicator
+
+    def _assignment_score(self, male_group: np.ndarray, female_group: np.ndarray) -> float:
+        """按配对得分矩阵计算的总分（同组男女的配对得分之和）"""
+        same_group = male_group[:, None] == female_group[None, :]
+        return float(self.pair_scores[same_group].sum())
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+pytest公共配置：将项目根目录加入导入路径，测试中可直接 from src... 导入
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
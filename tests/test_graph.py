@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+偏好图评分测试
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from src.graph import MAX_BITMASK_NODES, PreferenceGraph
+
+
+def _random_edges(rng: random.Random, num_people: int, weighted: bool, with_penalty: bool):
+    """随机偏好边（无重复边与自环）；权重取二进制小数，得分之差可以精确比较"""
+    people = [f"M{i}" for i in range(1, num_people // 2 + 1)] + [f"F{i}" for i in range(1, num_people // 2 + 1)]
+    edges = list({(rng.choice(people), rng.choice(people)) for _ in range(num_people * 3)})
+    edges = [(a, b) for a, b in edges if a != b]
+    weighted_edges = [(a, b, rng.choice([0.25, 0.5, 1.0, 2.0])) for a, b in edges] if weighted else None
+    penalties = set(rng.sample(edges, min(len(edges), 5))) if with_penalty else None
+    return people, edges, weighted_edges, penalties
+
+
+def _random_graph(rng: random.Random, num_people: int, weighted: bool, with_penalty: bool):
+    """随机偏好图"""
+    people, edges, weighted_edges, penalties = _random_edges(rng, num_people, weighted, with_penalty)
+    graph = PreferenceGraph(edges, weighted_edges=weighted_edges, first_round_penalties=penalties, penalty_weight=-0.5)
+    return graph, people
+
+
+def _reference_group_score(edges, weighted_edges, penalties, group, mutual_weight=2.0, penalty_weight=-0.5):
+    """
+    参考实现：逐条扫描边计算单组得分（向量化之前 calculate_group_score 的语义）
+    
+    Returns:
+        (总分, 单向喜欢关系列表, 互相喜欢对列表)
+    """
+    edge_set = set(edges)
+    weights = {(src, dst): weight for src, dst, weight in weighted_edges} if weighted_edges else {}
+    members = set(group)
+    single_prefs, mutual_prefs = [], []
+    for src, dst in edges:
+        if src in members and dst in members:
+            if (dst, src) not in edge_set:
+                single_prefs.append((src, dst))
+            elif tuple(sorted((src, dst))) not in mutual_prefs:
+                mutual_prefs.append(tuple(sorted((src, dst))))
+    
+    if weighted_edges:
+        single_score = sum(weights[edge] for edge in single_prefs)
+        mutual_score = sum(weights[(a, b)] + weights[(b, a)] for a, b in mutual_prefs)
+    else:
+        single_score = len(single_prefs) * 1.0
+        mutual_score = len(mutual_prefs) * mutual_weight
+    penalty_score = sum(penalty_weight for edge in single_prefs if edge in (penalties or ()))
+    return single_score + mutual_score + penalty_score, single_prefs, mutual_prefs
+
+
+@pytest.mark.parametrize("num_people", [24, 120])
+@pytest.mark.parametrize("weighted, with_penalty", [(False, False), (True, False), (False, True), (True, True)])
+def test_scoring_matches_reference(num_people, weighted, with_penalty):
+    """各得分接口与参考实现一致（覆盖 ≤64 节点的位掩码路径与 >64 节点的布尔掩码路径）"""
+    rng = random.Random(num_people)
+    for _ in range(5):
+        people, edges, weighted_edges, penalties = _random_edges(rng, num_people, weighted, with_penalty)
+        graph = PreferenceGraph(edges, weighted_edges=weighted_edges, first_round_penalties=penalties, penalty_weight=-0.5)
+        assert graph.use_bitmask == (graph.num_nodes <= MAX_BITMASK_NODES)
+        assert graph.use_bitmask == (num_people <= MAX_BITMASK_NODES)
+        
+        rng.shuffle(people)
+        groups = [people[i:i + 4] for i in range(0, len(people), 4)]
+        reference = [_reference_group_score(edges, weighted_edges, penalties, group) for group in groups]
+        for group, (total, single_prefs, mutual_prefs) in zip(groups, reference):
+            score = graph.calculate_group_score(group)
+            assert score.total_score == pytest.approx(total)
+            assert score.single_preferences == single_prefs
+            assert sorted(score.mutual_preferences) == sorted(mutual_prefs)
+            assert graph.group_total_score(group) == pytest.approx(total)
+        
+        expected_total = sum(total for total, _, _ in reference)
+        assert graph.calculate_total_score(groups) == pytest.approx(expected_total)
+        assert graph.calculate_overall_score(groups).total_score == pytest.approx(expected_total)
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+@pytest.mark.parametrize("with_penalty", [False, True])
+def test_delta_swap_matches_score_difference(weighted, with_penalty):
+    """delta_swap 等于交换后总分减交换前总分"""
+    rng = random.Random(7)
+    for _ in range(30):
+        graph, people = _random_graph(rng, rng.choice([8, 12, 20]), weighted, with_penalty)
+        rng.shuffle(people)
+        # 最后一组不分满：允许有未分组的节点（group_of为-1）
+        groups = [people[i:i + 4] for i in range(0, len(people) - 2, 4)]
+        group_of = graph.encode_groups(groups).tolist()
+        before = graph.calculate_total_score(groups)
+        
+        for _ in range(10):
+            g1, g2 = rng.sample(range(len(groups)), 2)
+            i1, i2 = rng.randrange(len(groups[g1])), rng.randrange(len(groups[g2]))
+            a, b = groups[g1][i1], groups[g2][i2]
+            if a not in graph.node_index or b not in graph.node_index:
+                continue
+            
+            swapped = [group.copy() for group in groups]
+            swapped[g1][i1], swapped[g2][i2] = b, a
+            after = graph.calculate_total_score(swapped)
+            assert graph.delta_swap(group_of, graph.node_index[a], graph.node_index[b]) == after - before
+
+
+@pytest.mark.parametrize("num_people", [24, 120])
+@pytest.mark.parametrize("weighted, with_penalty", [(False, False), (True, False), (False, True), (True, True)])
+def test_score_population_matches_total_score(num_people, weighted, with_penalty):
+    """score_population 逐个方案等于 calculate_total_score（分组列表与 group_of 数组两种输入）"""
+    rng = random.Random(num_people + 1)
+    people, edges, weighted_edges, penalties = _random_edges(rng, num_people, weighted, with_penalty)
+    graph = PreferenceGraph(edges, weighted_edges=weighted_edges, first_round_penalties=penalties, penalty_weight=-0.5)
+    # 前几个方案把一条扣分边的两端放进同一组，保证扣分项参与计算
+    seed_edges = sorted(penalties or ()) + [None] * 8
+    candidates = []
+    for seed_edge in seed_edges:
+        rng.shuffle(people)
+        if seed_edge is not None:
+            people.remove(seed_edge[0])
+            people.remove(seed_edge[1])
+            people[:0] = list(seed_edge)
+        # 最后六人不分组：覆盖两端 group_of 均为-1的边
+        candidates.append([people[i:i + 4] for i in range(0, len(people) - 6, 4)])
+    
+    expected = [graph.calculate_total_score(groups) for groups in candidates]
+    scores = graph.score_population(candidates)
+    assert scores.shape == (len(candidates),)
+    assert scores.tolist() == pytest.approx(expected)
+    
+    encoded = np.array([graph.encode_groups(groups) for groups in candidates])
+    assert graph.score_population(encoded).tolist() == pytest.approx(expected)
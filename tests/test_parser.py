@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+偏好解析器测试：固定语料的边与警告
+"""
+
+from src.parser_cn import ChinesePreferenceParser
+from src.parser_ranking import RankingPreferenceParser
+
+# 中文偏好描述语料（覆盖多目标、不同句式、超出范围、无效嘉宾类型与自我指向）
+TEXT_ROWS = [
+    {'嘉宾类型': '男', '编号': 1, '偏好描述': '喜欢3号、10号和2号女嘉宾。'},
+    {'嘉宾类型': '女', '编号': 2, '偏好描述': '我对5号男嘉宾有好感'},
+    {'嘉宾类型': '女', '编号': 3, '偏好描述': '希望能和M4同组，也喜欢F1'},
+    {'嘉宾类型': '男', '编号': 4, '偏好描述': '喜欢13号女嘉宾'},
+    {'嘉宾类型': '男', '编号': 5, '偏好描述': '没有特别的偏好'},
+    {'嘉宾类型': '未知', '编号': 6, '偏好描述': '喜欢1号'},
+    {'嘉宾类型': '男', '编号': 99, '偏好描述': '喜欢1号女嘉宾'},
+    {'嘉宾类型': '女', '编号': 4, '偏好描述': '4号女嘉宾喜欢4号女嘉宾'},
+]
+
+TEXT_EDGES = [('M1', 'F3'), ('M1', 'F10'), ('M1', 'F2'), ('F2', 'M5')]
+
+TEXT_WARNINGS = [
+    '第3行: 未找到目标编号: 希望能和M4同组，也喜欢F1',
+    '第4行: 编号超出范围: F13 (最大F女ID: 12)',
+    '第5行: 未找到目标编号: 没有特别的偏好',
+    '第6行: 嘉宾类型无效: 未知',
+    '第7行: 编号超出范围: 99 (最大男ID: 12)',
+    '第8行: 忽略自我指向: F4',
+    '第8行: 忽略自我指向: F4',
+]
+
+# Ranking语料（覆盖完整ID与纯数字ID、重复对象、性别不匹配、格式错误与空白）
+RANKING_ROWS = [
+    {'嘉宾类型': '男', '编号': 1, '对象1ID': 'F2', '对象2ID': '3'},
+    {'嘉宾类型': '女', '编号': 2, '对象1ID': 5, '对象2ID': 'M5'},
+    {'嘉宾类型': '女', '编号': 3, '对象1ID': 'F1', '对象2ID': ''},
+    {'嘉宾类型': '男', '编号': 2, '对象1ID': '13', '对象2ID': 'abc'},
+    {'嘉宾类型': ' 男 ', '编号': '4', '对象1ID': ' F4 ', '对象2ID': None},
+    {'嘉宾类型': '其他', '编号': 1, '对象1ID': 'F1', '对象2ID': 'F2'},
+    {'嘉宾类型': '男', '编号': 'x', '对象1ID': 'F1', '对象2ID': 'F2'},
+]
+
+RANKING_WEIGHTED_EDGES = [('M1', 'F2', 2.0), ('M1', 'F3', 1.0), ('F2', 'M5', 2.0), ('M4', 'F4', 2.0)]
+
+RANKING_WARNINGS = [
+    '第2行: 对象1和对象2相同，忽略重复: M5',
+    '第3行: 对象1ID性别不匹配: 女嘉宾不能选择F1',
+    '第4行: 对象1ID超出范围: 13 (最大FID: 12)',
+    '第4行: 对象2ID格式错误: abc',
+    '第6行: 嘉宾类型无效: 其他',
+    '第7行: 编号无效: x',
+]
+
+
+def test_chinese_parser_corpus():
+    """中文解析器在固定语料上的边与警告"""
+    result = ChinesePreferenceParser().parse_all_preferences(TEXT_ROWS)
+    assert result.edges == TEXT_EDGES
+    assert list(result.warnings) == TEXT_WARNINGS
+
+
+def test_ranking_parser_corpus():
+    """Ranking解析器在固定语料上的加权边与警告"""
+    result = RankingPreferenceParser().parse_all_preferences(RANKING_ROWS)
+    assert result.weighted_edges == RANKING_WEIGHTED_EDGES
+    assert result.edges == [(src, dst) for src, dst, _ in RANKING_WEIGHTED_EDGES]
+    assert list(result.warnings) == RANKING_WARNINGS
+
+
+def test_parallel_parse_matches_serial():
+    """多进程分块解析与串行解析结果一致（行数超过并行阈值）"""
+    for parser, rows in ((ChinesePreferenceParser(), TEXT_ROWS), (RankingPreferenceParser(), RANKING_ROWS)):
+        data = rows * 400
+        serial = parser.parse_all_preferences(data)
+        parallel = parser.parse_all_preferences_parallel(data, n_jobs=2)
+        assert parallel.edges == serial.edges
+        assert list(parallel.warnings) == list(serial.warnings)
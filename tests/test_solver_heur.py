@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+启发式求解器测试
+"""
+
+import random
+
+import pytest
+
+from src.graph import PreferenceGraph
+from src.solver_heur import HeuristicSolver
+
+
+def _small_graph():
+    """4男4女的小型偏好图"""
+    edges = [("M1", "F1"), ("F1", "M1"), ("M2", "F2"), ("F3", "M3"), ("M4", "F4"), ("F4", "M4"), ("M1", "M2")]
+    return PreferenceGraph(edges)
+
+
+def test_single_argument_callback():
+    """进度回调只接收一个消息参数（格式化后再调用）"""
+    messages = []
+    solver = HeuristicSolver(_small_graph(), seed=1, max_iterations=200, num_males=4, num_females=4)
+    for algorithm in ("hill_climbing", "simulated_annealing"):
+        solution, info = solver.solve(algorithm, "random", num_restarts=2, callback=messages.append)
+        assert info["status"] == "completed"
+        assert solution is not None
+    assert messages and all(isinstance(message, str) for message in messages)
+
+
+def _random_graph(seed: int, num_males: int, num_females: int, num_edges: int):
+    """随机偏好图（固定种子）"""
+    rng = random.Random(seed)
+    people = [f"M{i}" for i in range(1, num_males + 1)] + [f"F{i}" for i in range(1, num_females + 1)]
+    edges = [(a, b) for a, b in {(rng.choice(people), rng.choice(people)) for _ in range(num_edges)} if a != b]
+    return PreferenceGraph(edges)
+
+
+@pytest.mark.parametrize("algorithm", ["hill_climbing", "simulated_annealing"])
+def test_seeded_solve_is_deterministic(algorithm):
+    """相同种子的求解结果完全一致，且与并行进程数无关"""
+    graph = _random_graph(3, 8, 8, 60)
+    results = []
+    for n_jobs in (1, 1, 2):
+        solver = HeuristicSolver(graph, seed=42, max_iterations=300, num_males=8, num_females=8)
+        solution, info = solver.solve(algorithm, "random", num_restarts=3, n_jobs=n_jobs)
+        assert info["status"] == "completed"
+        assert solution is not None
+        results.append((solution, info["best_score"], info["total_iterations"]))
+    assert results[0] == results[1] == results[2]
+    assert results[0][1] == graph.calculate_total_score(results[0][0])
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+ILP求解器测试（pulp后端固定使用PuLP自带的CBC，不随已安装的HiGHS变化）
+"""
+
+import itertools
+import random
+
+import pytest
+
+from src.graph import PreferenceGraph
+from src.solver_ilp import ILPSolver
+
+pytest.importorskip("pulp")
+
+# pulp后端固定使用的求解器（cbc_lp后端本身直接调用CBC命令行）
+MIP_SOLVER = "PULP_CBC_CMD"
+
+
+def _small_graph():
+    """4男4女的小型偏好图：F2只单向喜欢M4，但M1、M2、F1所在的组得分最高"""
+    edges = [("M1", "F1"), ("F1", "M1"), ("M1", "M2"), ("M2", "M1"), ("M2", "F2"), ("F1", "F2"),
+             ("M3", "F3"), ("F3", "M3"), ("M4", "F4"), ("F4", "M4"), ("F2", "M4")]
+    return PreferenceGraph(edges)
+
+
+@pytest.mark.parametrize("backend", ["pulp", "cbc_lp"])
+def test_multithreaded_privileged_solve(backend):
+    """多线程求解：特权嘉宾与喜欢的人同组，目标值与单线程一致且低于无特权约束时"""
+    graph = _small_graph()
+    unconstrained = ILPSolver(graph, time_limit=30, num_males=4, num_females=4, group_size=4,
+                              threads=1, backend=backend, mip_solver=MIP_SOLVER).solve()[1]["objective_value"]
+    objectives = []
+    for threads in (1, 2):
+        solver = ILPSolver(graph, time_limit=30, num_males=4, num_females=4, group_size=4,
+                           privileged_guests={"F2"}, threads=threads, backend=backend, mip_solver=MIP_SOLVER)
+        solution, info = solver.solve()
+        assert info["status"] == "optimal", info
+        assert any("F2" in group and "M4" in group for group in solution)
+        objectives.append(info["objective_value"])
+    assert objectives[0] == pytest.approx(objectives[1])
+    assert objectives[0] < unconstrained
+
+
+@pytest.mark.parametrize("first_line, values, found", [
+    ("Optimal - objective value 8.00000000", {"x_M1_0": 1.0}, True),
+    ("Stopped on time - objective value 8.00000000", {"x_M1_0": 1.0, "x_M1_1": 0.0}, True),
+    ("Stopped on iterations - objective value 8.00000000", {"x_M1_0": 0.9999999999}, True),
+    ("Stopped on time - objective value 8.50000000", {"x_M1_0": 0.5, "x_M1_1": 0.5}, False),
+    ("Stopped on time (no integer solution - continuous used) - objective value 9.00000000", {"x_M1_0": 1.0}, False),
+    ("Stopped on difficulties - objective value 8.00000000", {"x_M1_0": 1.0}, False),
+    ("Infeasible - objective value 0.00000000", {}, False),
+    ("", {}, False),
+])
+def test_cbc_solution_status(first_line, values, found):
+    """CBC解文件首行：只接受最优解，或提前停止且x均为0/1的解"""
+    assert ILPSolver._cbc_found_solution(first_line.split(), values) is found
+
+
+def _brute_force_optimum(graph, males, females, num_groups):
+    """枚举所有每组等量男女的分组，返回最高总分"""
+    best = float("-inf")
+    per_group = len(males) // num_groups
+    
+    def assignments(people):
+        # 人员按组的分配：people[k] 分到 labels[k] 组，每组 per_group 人（组编号按首次出现排序以去掉组的对称性）
+        for labels in itertools.product(range(num_groups), repeat=len(people)):
+            if all(labels.count(g) == per_group for g in range(num_groups)):
+                yield labels
+    
+    for male_labels in assignments(males):
+        if list(dict.fromkeys(male_labels)) != list(range(num_groups)):
+            continue
+        for female_labels in assignments(females):
+            groups = [[p for p, g in zip(males, male_labels) if g == k] + [p for p, g in zip(females, female_labels) if g == k]
+                      for k in range(num_groups)]
+            best = max(best, graph.calculate_total_score(groups))
+    return best
+
+
+@pytest.mark.parametrize("backend", ["pulp", "cbc_lp"])
+def test_ilp_reaches_brute_force_optimum(backend):
+    """小规模随机实例上ILP目标值等于枚举得到的最优总分"""
+    rng = random.Random(11)
+    males = [f"M{i}" for i in range(1, 7)]
+    females = [f"F{i}" for i in range(1, 7)]
+    people = males + females
+    edges = [(a, b) for a, b in {(rng.choice(people), rng.choice(people)) for _ in range(40)} if a != b]
+    # ILP目标按传统模式计分（单向1分，互相喜欢mutual_weight分），与无权重偏好图的总分一致
+    graph = PreferenceGraph(edges)
+    
+    solver = ILPSolver(graph, time_limit=60, num_males=6, num_females=6, group_size=4, threads=1, backend=backend,
+                       mip_solver=MIP_SOLVER)
+    solution, info = solver.solve()
+    assert info["status"] == "optimal", info
+    optimum = _brute_force_optimum(graph, males, females, 3)
+    assert info["objective_value"] == pytest.approx(optimum)
+    assert graph.calculate_total_score(solution) == pytest.approx(optimum)
+
+
+def test_highs_threads_pinned_per_process():
+    """HiGHS在同一进程内以不同线程数先后求解都能得到最优解（线程数按首次求解固定）"""
+    pytest.importorskip("highspy")
+    graph = _small_graph()
+    for threads in (4, 2):
+        solver = ILPSolver(graph, time_limit=30, num_males=4, num_females=4, group_size=4,
+                           threads=threads, mip_solver="HiGHS")
+        solution, info = solver.solve()
+        assert info["status"] == "optimal", info
+        assert info["solver"] == "HiGHS"
+
+
+def test_unknown_mip_solver_rejected():
+    """不支持的MIP求解器名称抛出ValueError"""
+    with pytest.raises(ValueError):
+        ILPSolver(_small_graph(), num_males=4, num_females=4, group_size=4, mip_solver="GUROBI")
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+匹配求解器测试（未安装scipy时走内置的匈牙利算法）
+"""
+
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from src.graph import PreferenceGraph
+from src.solver_matching import MatchingSolver, _hungarian_min_cost, max_weight_assignment
+
+
+def _bipartite_graph(seed: int, num_males: int, num_females: int, num_edges: int):
+    """只含男女之间偏好的随机偏好图"""
+    rng = random.Random(seed)
+    males = [f"M{i}" for i in range(1, num_males + 1)]
+    females = [f"F{i}" for i in range(1, num_females + 1)]
+    edges = set()
+    for _ in range(num_edges):
+        male, female = rng.choice(males), rng.choice(females)
+        edges.add((male, female) if rng.random() < 0.5 else (female, male))
+    return PreferenceGraph(sorted(edges)), males, females
+
+
+def test_hungarian_matches_brute_force():
+    """内置匈牙利算法的最小代价与枚举所有指派的结果一致（含行数少于列数的矩阵）"""
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(1, 6))
+        m = int(rng.integers(n, 7))
+        cost = rng.integers(-5, 10, size=(n, m)).astype(np.float64)
+        assignment = _hungarian_min_cost(cost)
+        assert len(set(assignment)) == n
+        best = min(sum(cost[i, j] for i, j in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+        assert sum(cost[i, j] for i, j in enumerate(assignment)) == pytest.approx(best)
+
+
+def test_max_weight_assignment_matches_brute_force():
+    """最大权指派与枚举结果一致"""
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        n = int(rng.integers(1, 5))
+        m = int(rng.integers(n, 6))
+        weights = rng.random((n, m))
+        assignment = max_weight_assignment(weights)
+        best = max(sum(weights[i, j] for i, j in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+        assert sum(weights[i, j] for i, j in enumerate(assignment)) == pytest.approx(best)
+
+
+@pytest.mark.parametrize("num_males, num_females", [(5, 5), (4, 6), (6, 4)])
+def test_pairing_mode_is_optimal(num_males, num_females):
+    """配对模式的总分等于枚举所有一男一女配对得到的最优总分（人数不等时多出的人不参与配对）"""
+    for seed in range(5):
+        graph, males, females = _bipartite_graph(seed, num_males, num_females, 20)
+        solver = MatchingSolver(graph, num_males=num_males, num_females=num_females, pairing_mode=True, seed=seed)
+        pairs = solver._solve_pairing()
+        assert len(pairs) == min(num_males, num_females)
+        assert len({p for pair in pairs for p in pair}) == 2 * len(pairs)
+        
+        if num_males <= num_females:
+            candidates = ([[m, f] for m, f in zip(males, chosen)] for chosen in itertools.permutations(females, num_males))
+        else:
+            candidates = ([[m, f] for m, f in zip(chosen, females)] for chosen in itertools.permutations(males, num_females))
+        best = max(graph.calculate_total_score(candidate) for candidate in candidates)
+        assert graph.calculate_total_score(pairs) == pytest.approx(best)
+        
+        if num_males == num_females:
+            solution, info = solver.solve()
+            assert info["status"] == "optimal", info
+            assert info["best_score"] == pytest.approx(best)
+
+
+def test_group_mode_returns_valid_local_optimum():
+    """分组模式返回有效的等量男女分组，得分不超过枚举最优解"""
+    graph, males, females = _bipartite_graph(3, 4, 4, 14)
+    solver = MatchingSolver(graph, num_males=4, num_females=4, group_size=4, num_restarts=5, seed=1)
+    solution, info = solver.solve()
+    assert info["status"] == "local_optimum", info
+    assert sorted(p for group in solution for p in group) == sorted(males + females)
+    assert all(len(group) == 4 and sum(p.startswith("M") for p in group) == 2 for group in solution)
+    
+    best = max(graph.calculate_total_score([list(m) + list(f), [p for p in males if p not in m] + [p for p in females if p not in f]])
+               for m in itertools.combinations(males, 2) for f in itertools.combinations(females, 2))
+    assert info["best_score"] == pytest.approx(graph.calculate_total_score(solution))
+    assert info["best_score"] <= best + 1e-9
+
+
+def test_unsupported_reasons():
+    """特权嘉宾与同性之间的偏好不能用匹配模型求解"""
+    graph, _, _ = _bipartite_graph(0, 4, 4, 10)
+    assert MatchingSolver(graph, num_males=4, num_females=4).unsupported_reason() is None
+    
+    privileged = MatchingSolver(graph, num_males=4, num_females=4, privileged_guests={"M1"})
+    assert privileged.unsupported_reason() is not None
+    assert privileged.solve()[1]["status"] == "unsupported"
+    
+    same_gender = PreferenceGraph([("M1", "F1"), ("M1", "M2")])
+    for pairing_mode in (False, True):
+        solver = MatchingSolver(same_gender, num_males=4, num_females=4, pairing_mode=pairing_mode)
+        assert solver.unsupported_reason() is not None
+        assert solver.solve()[1]["status"] == "unsupported"